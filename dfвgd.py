@@ -1,8 +1,25 @@
+import argparse
 import arcade
+import asyncio
+import gc
+import numpy as np
+import pyglet
 import random
 import math
+import json
+import heapq
+import multiprocessing
 import sqlite3
 import os
+import queue
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
 
 SCREEN_WIDTH = 2048
 SCREEN_HEIGHT = 1080
@@ -14,11 +31,44 @@ BULLET_LIFETIME = 2.0
 BASE_METEORITE_SPAWN_RATE = 2.0
 DEFAULT_METEORITE_SPEED = 8
 PLAYER_MAX_HITS = 3
+PLAYER_INVULNERABLE_TIME = 2.0
+PLAYER_BLINK_INTERVAL = 0.1
+METEORITE_FLASH_TIME = 0.5
+REFERENCE_FRAME_RATE = 60
+SIM_TICK_RATE = 120
+RENDER_RATE = 60
+MAX_SIM_STEPS_PER_FRAME = 8
 DIFFICULTY_EASY = "easy"
 DIFFICULTY_MEDIUM = "medium"
 DIFFICULTY_HARD = "hard"
+DIFFICULTIES = (DIFFICULTY_EASY, DIFFICULTY_MEDIUM, DIFFICULTY_HARD)
+DIFFICULTY_NAMES = {DIFFICULTY_EASY: "Легкая", DIFFICULTY_MEDIUM: "Средняя", DIFFICULTY_HARD: "Сложная"}
 SCORE_SPEED_BONUS_THRESHOLD = 100
+SPEED_BONUS_STEP = 0.1
 MAX_SPEED_BONUS = 1.0
+DIFFICULTY_SETTINGS = {
+    DIFFICULTY_EASY: {
+        "base_meteorite_speed_multiplier": 1.0,
+        "meteorite_frequency_multiplier": 2.0,
+        "bullet_speed_multiplier": 1.0,
+        "bullet_frequency_multiplier": 1.0,
+        "meteorite_max_hits": 3,
+    },
+    DIFFICULTY_MEDIUM: {
+        "base_meteorite_speed_multiplier": 1.5,
+        "meteorite_frequency_multiplier": 3.0,
+        "bullet_speed_multiplier": 2.0,
+        "bullet_frequency_multiplier": 2.0,
+        "meteorite_max_hits": 3,
+    },
+    DIFFICULTY_HARD: {
+        "base_meteorite_speed_multiplier": 2.0,
+        "meteorite_frequency_multiplier": 4.0,
+        "bullet_speed_multiplier": 4.0,
+        "bullet_frequency_multiplier": 4.0,
+        "meteorite_max_hits": 5,
+    },
+}
 SECRET_MESSAGE_X_OFFSET = 500
 SECRET_MESSAGE = "by tamerlan"
 SECRET_MESSAGE_COLOR = arcade.color.GOLD
@@ -26,6 +76,10 @@ PARTICLE_COUNT = 15
 PARTICLE_MIN_SPEED = 2
 PARTICLE_MAX_SPEED = 8
 PARTICLE_LIFETIME = 1.0
+PARTICLE_DRAG = 0.98
+PARTICLE_GRAVITY = 0.1
+PARTICLE_TEXTURE_SIZE = 10
+PARTICLE_CAPACITY = 1024
 PARTICLE_COLORS = [
     arcade.color.ORANGE,
     arcade.color.YELLOW,
@@ -33,18 +87,188 @@ PARTICLE_COLORS = [
     arcade.color.WHITE
 ]
 DB_FILE = "high_scores.db"
+LEADERBOARD_RETENTION = 100
+LEADERBOARD_PAGE_SIZE = 10
+TELEMETRY_SAMPLE_INTERVAL = 60.0
+TELEMETRY_FLUSH_SAMPLES = 5
+TELEMETRY_BUCKET_MS = 0.1
+TELEMETRY_BUCKETS = 1000
+MEMORY_GROWTH_RUNS = 20
+MEMORY_GROWTH_KIB = 256
+MEMORY_HISTORY = 256
+MEMORY_TRACE_FRAMES = 1
+MEMORY_TOP_STATS = 10
+MEMORY_REPORT_FILE = "memory_report.json"
+SOAK_CYCLES = 300
+SOAK_FRAMES = 120
+SOAK_DRAW_INTERVAL = 10
+MEMORY_TRACKED_TYPES = ("GameView", "MenuView", "PauseView", "GameSimulation", "EntityStore", "SpritePool",
+                        "ParticleSystem", "InputRecorder", "TextLayer", "DatabaseManager", "SnapshotAutosaver",
+                        "Player", "Meteorite", "Bullet", "SpriteList", "Text", "Thread")
+TEXTURE_FILES = ["41.png", "meteorite.png", "ddd.png"]
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+HIT_SHAPES_DATA = {
+    "player": (256.0, ((-87.0, 111.0), (-96.0, 102.0), (-96.0, -102.0), (-87.0, -111.0), (10.0, -111.0),
+                       (92.0, -29.0), (92.0, 29.0), (10.0, 111.0))),
+    "meteorite": (138.0, ((-69.0, -51.82499999999999), (67.05000000000018, -51.82499999999999), (69.0, -49.875),
+                          (69.0, 49.575000000000045), (66.75, 51.825000000000045),
+                          (-66.90000000000009, 51.825000000000045), (-69.0, 49.72500000000002))),
+    "bullet": (50, ((-25.0, -1.5), (25.0, -1.5), (25.0, 1.5), (-25.0, 1.5))),
+}
 NEW_RECORD_DISPLAY_TIME = 1.0
+COLLISION_CELL_SIZE = 128
+COLLISION_DISCRETE = "discrete"
+COLLISION_SWEPT = "swept"
+COLLISION_MODES = (COLLISION_DISCRETE, COLLISION_SWEPT)
+ENTITY_STORE_CAPACITY = 256
+TIMER_SPAWN = 1
+TIMER_SHOT = 2
+TIMER_INVULNERABLE_END = 3
+TIMER_BLINK = 4
+TIMER_FLASH_END = 5
+TIMER_BULLET_EXPIRE = 6
+TIMER_EPSILON = 1e-9
+PROFILER_HISTORY = 600
+PROFILER_OVERLAY_INTERVAL = 30
+PROFILE_CSV_FILE = "frame_profile.csv"
+PROFILE_JSON_FILE = "frame_profile.json"
+BENCHMARK_BASELINE_FILE = "bench_baseline.json"
+BENCHMARK_RESULTS_FILE = "bench_results.json"
+BENCHMARK_THRESHOLD = 0.25
+BENCHMARK_REPEATS = 2
+QUALITY_LEVELS = (
+    {"particle_scale": 1.0, "lifetime_scale": 1.0, "hit_flash": True},
+    {"particle_scale": 0.6, "lifetime_scale": 0.75, "hit_flash": True},
+    {"particle_scale": 0.3, "lifetime_scale": 0.5, "hit_flash": False},
+    {"particle_scale": 0.1, "lifetime_scale": 0.3, "hit_flash": False},
+)
+QUALITY_WINDOW = 60
+QUALITY_EVALUATE_INTERVAL = 15
+QUALITY_THROTTLE_RATIO = 0.9
+QUALITY_RESTORE_RATIO = 0.5
+QUALITY_RESTORE_DELAY = 120
+QUALITY_DECISION_HISTORY = 64
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_UP = 4
+INPUT_DOWN = 8
+EVENT_METEORITE_DESTROYED = "meteorite_destroyed"
+EVENT_PLAYER_HIT = "player_hit"
+EVENT_NEW_RECORD = "new_record"
+EVENT_GAME_OVER = "game_over"
+RECORDINGS_DIR = "recordings"
+RECORDINGS_RETENTION = 100
+RECORDING_MAGIC = b"DFRP"
+RECORDING_VERSION = 2
+RECORDING_HEADER = struct.Struct("<4sHqdBB")
+RECORDING_SUMMARY = struct.Struct("<IiIIIi")
+RECORDING_SUMMARY_FIELDS = ("ticks", "score", "kills", "hits_landed", "shots_fired", "player_health")
+RECORDING_RUN_COUNT = struct.Struct("<I")
+RECORDING_RUN = struct.Struct("<BH")
+RECORDING_RUN_RECORD = np.dtype([("inputs", "u1"), ("length", "<u2")])
+REPLAY_PROFILE_FILE = "replay_profile.json"
+AUTOPILOT_DODGE_DISTANCE = 450
+AUTOPILOT_DODGE_HEIGHT = 180
+AUTOPILOT_AIM_TOLERANCE = 10
+AUTOPILOT_LANES = 24
+AUTOPILOT_AIM_WEIGHT = 0.2
+AUTOPILOT_TRAVEL_WEIGHT = 1e-6
+BATCH_RESULTS_FILE = "batch_results.jsonl"
+BATCH_MAX_SECONDS = 600
+SERVER_TICK_RATE = 60
+SERVER_TICK_BUDGET = 0.9
+SERVER_MAX_COALESCED_TICKS = 4
+SERVER_INPUT_QUEUE_SIZE = 16
+SERVER_LATENCY_HISTORY = 1024
+SERVER_INPUT_INTERVAL = (0.05, 0.3)
+STREAM_HOST = "127.0.0.1"
+STREAM_PORT = 50007
+STREAM_POSITION_SCALE = 4
+STREAM_KEYFRAME_INTERVAL = 600
+STREAM_MAX_BUFFERED = 1 << 20
+STREAM_KEYFRAME = 1
+STREAM_DELTA = 2
+STREAM_SCORE_CHANGED = 1
+STREAM_HEALTH_CHANGED = 2
+STREAM_PLAYER_MOVED = 4
+STREAM_HEADER = struct.Struct("<BI")
+STREAM_SCORE = struct.Struct("<i")
+STREAM_HEALTH = struct.Struct("<b")
+STREAM_POSITION = struct.Struct("<hh")
+STREAM_COUNT = struct.Struct("<I")
+STREAM_LENGTH = struct.Struct("<I")
+STREAM_ADDED_RECORD = np.dtype([("id", "<u4"), ("position", "<i2", 2)])
+STREAM_KEYFRAME_RECORD = np.dtype([("id", "<u4"), ("position", "<i2", 2), ("velocity", "<i2", 2)])
+STREAM_SNAPSHOT_RECORD = np.dtype([("id", "<u4"), ("x", "<f4"), ("y", "<f4")])
+SNAPSHOT_MAGIC = b"DFSS"
+SNAPSHOT_VERSION = 2
+SNAPSHOT_FILE = "autosave.dfs"
+SNAPSHOT_AUTOSAVE_INTERVAL = 5.0
+SNAPSHOT_SETTINGS = ("base_meteorite_speed_multiplier", "meteorite_frequency_multiplier", "bullet_speed_multiplier",
+                     "bullet_frequency_multiplier", "meteorite_max_hits", "speed_bonus_threshold", "speed_bonus_step",
+                     "max_speed_bonus")
+SNAPSHOT_SIM_FIELDS = ("tick", "total_time", "player_health", "score", "kills", "shots_fired", "hits_landed",
+                       "speed_bonus", "current_meteorite_speed_multiplier", "last_bonus_score", "is_new_record",
+                       "new_record_until", "is_game_over", "next_entity_id")
+SNAPSHOT_PLAYER_FIELDS = ("center_x", "center_y", "prev_center_x", "prev_center_y", "change_x", "change_y", "hits",
+                          "invulnerable", "visible")
+SNAPSHOT_PLAYER = np.dtype([("entity_id", "<i8"), ("center_x", "<f8"), ("center_y", "<f8"),
+                            ("prev_center_x", "<f8"), ("prev_center_y", "<f8"), ("change_x", "<f8"),
+                            ("change_y", "<f8"), ("hits", "<i4"), ("invulnerable", "u1"), ("visible", "u1")])
+SNAPSHOT_HEADER = np.dtype([
+    ("magic", "S4"), ("version", "<u2"), ("difficulty", "S16"), ("collision_mode", "S16"), ("seed", "<i8"),
+    ("sim_rate", "<f8"), ("high_score", "<i8"),
+    ("tick", "<i8"), ("total_time", "<f8"), ("player_health", "<i4"), ("score", "<i8"), ("kills", "<i8"),
+    ("shots_fired", "<i8"), ("hits_landed", "<i8"), ("speed_bonus", "<f8"),
+    ("current_meteorite_speed_multiplier", "<f8"), ("last_bonus_score", "<i8"), ("is_new_record", "u1"),
+    ("new_record_until", "<f8"), ("is_game_over", "u1"), ("next_entity_id", "<i8"), ("timer_seq", "<i8"),
+    ("base_meteorite_speed_multiplier", "<f8"), ("meteorite_frequency_multiplier", "<f8"),
+    ("bullet_speed_multiplier", "<f8"), ("bullet_frequency_multiplier", "<f8"), ("meteorite_max_hits", "<i4"),
+    ("speed_bonus_threshold", "<i8"), ("speed_bonus_step", "<f8"), ("max_speed_bonus", "<f8"),
+    ("player", SNAPSHOT_PLAYER),
+    ("rng_state", "<u4", 625), ("rng_gauss", "<f8"), ("rng_has_gauss", "u1"),
+    ("meteorites", "<u4"), ("bullets", "<u4"), ("bullet_hits", "<u4"), ("particles", "<u4"), ("input_runs", "<u4"),
+    ("timers", "<u4"),
+])
+SNAPSHOT_TIMER = np.dtype([("due", "<f8"), ("seq", "<i8"), ("kind", "u1"), ("payload", "<i8")])
+SNAPSHOT_BULLET_HIT = np.dtype([("bullet", "<i8"), ("meteorite", "<i8")])
+SNAPSHOT_PARTICLE = np.dtype([("position", "<f4", 2), ("velocity", "<f4", 2), ("lifetime", "<f4"),
+                              ("duration", "<f4"), ("color", "<f4", 4), ("size", "<f4")])
+SYNTHETIC_INPUTS = (0, INPUT_UP, INPUT_DOWN, INPUT_LEFT, INPUT_RIGHT, INPUT_UP | INPUT_RIGHT, INPUT_DOWN | INPUT_LEFT)
 
 
 class DatabaseManager:
-    def __init__(self, db_file):
+    def __init__(self, db_file, retention=LEADERBOARD_RETENTION, prepared=False):
         self.db_file = db_file
-        self.init_database()
+        self.retention = retention
+        self.conn = sqlite3.connect(db_file)
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        if not prepared:
+            self.init_database(self.conn)
+        self.high_scores = {}
+        self.pending_scores = {}
+        self.next_run = 0
+        self.lock = threading.Lock()
+        self.write_queue = queue.Queue()
+        self.write_delay = 0.0
+        self.writes = 0
+        self.failed_writes = 0
+        self.load_high_scores()
+        self.writer = threading.Thread(target=self.write_loop, daemon=True)
+        self.writer.start()
 
-    def init_database(self):
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        cursor.execute('''
+    @classmethod
+    def prepare(cls, db_file):
+        conn = sqlite3.connect(db_file)
+        try:
+            cls.init_database(conn)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def init_database(conn):
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute('''
             CREATE TABLE IF NOT EXISTS high_scores (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 difficulty TEXT NOT NULL,
@@ -52,205 +276,1158 @@ class DatabaseManager:
                 timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_high_scores_difficulty_score
+            ON high_scores (difficulty, score DESC, id)
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS sessions (
+                id INTEGER PRIMARY KEY,
+                difficulty TEXT NOT NULL,
+                seed INTEGER NOT NULL,
+                duration REAL NOT NULL,
+                score INTEGER NOT NULL,
+                kills INTEGER NOT NULL,
+                shots_fired INTEGER NOT NULL,
+                hits_landed INTEGER NOT NULL,
+                hits_taken INTEGER NOT NULL,
+                speed_bonus_level INTEGER NOT NULL,
+                game_over INTEGER NOT NULL,
+                frames INTEGER NOT NULL,
+                frame_p50 REAL,
+                frame_p95 REAL,
+                frame_p99 REAL,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS session_samples (
+                session_id INTEGER NOT NULL,
+                minute INTEGER NOT NULL,
+                score INTEGER NOT NULL,
+                kills INTEGER NOT NULL,
+                shots_fired INTEGER NOT NULL,
+                hits_taken INTEGER NOT NULL,
+                speed_bonus_level INTEGER NOT NULL,
+                meteorites INTEGER NOT NULL,
+                bullets INTEGER NOT NULL,
+                frames INTEGER NOT NULL,
+                frame_p50 REAL,
+                frame_p95 REAL,
+                frame_p99 REAL,
+                PRIMARY KEY (session_id, minute)
+            )
+        ''')
         conn.commit()
-        conn.close()
+
+    def load_high_scores(self):
+        self.high_scores = {}
+        for difficulty in DIFFICULTIES:
+            result = self.conn.execute('''
+                SELECT score FROM high_scores 
+                WHERE difficulty = ? 
+                ORDER BY score DESC 
+                LIMIT 1
+            ''', (difficulty,)).fetchone()
+            if result:
+                self.high_scores[difficulty] = result[0]
+
+    def get_leaderboard(self, difficulty, limit=LEADERBOARD_PAGE_SIZE, after=None):
+        if after is None:
+            cursor = self.conn.execute('''
+                SELECT id, score, timestamp FROM high_scores
+                WHERE difficulty = ?
+                ORDER BY score DESC, id
+                LIMIT ?
+            ''', (difficulty, limit))
+        else:
+            after_score, after_id = after
+            cursor = self.conn.execute('''
+                SELECT id, score, timestamp FROM high_scores
+                WHERE difficulty = ? AND (score < ? OR (score = ? AND id > ?))
+                ORDER BY score DESC, id
+                LIMIT ?
+            ''', (difficulty, after_score, after_score, after_id, limit))
+        rows = cursor.fetchall()
+        next_page = (rows[-1][1], rows[-1][0]) if len(rows) == limit else None
+        return rows, next_page
+
+    def get_rank(self, difficulty, score):
+        result = self.conn.execute('''
+            SELECT COUNT(*) FROM high_scores
+            WHERE difficulty = ? AND score > ?
+        ''', (difficulty, score)).fetchone()
+        return result[0] + 1
+
+    def prune(self, keep=None):
+        keep = self.retention if keep is None else keep
+        for difficulty in DIFFICULTIES:
+            self.write_queue.put(("prune", (difficulty, keep)))
 
     def get_high_score(self, difficulty):
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT score FROM high_scores 
-            WHERE difficulty = ? 
-            ORDER BY score DESC 
-            LIMIT 1
-        ''', (difficulty,))
-        result = cursor.fetchone()
-        conn.close()
-        return result[0] if result else 0
-
-    def save_score(self, difficulty, score):
-        current_high = self.get_high_score(difficulty)
-        if score > current_high:
-            conn = sqlite3.connect(self.db_file)
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO high_scores (difficulty, score) 
-                VALUES (?, ?)
-            ''', (difficulty, score))
-            conn.commit()
-            conn.close()
-            return True
-        return False
+        return self.high_scores.get(difficulty, 0)
 
     def get_all_high_scores(self):
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT difficulty, MAX(score) as max_score 
-            FROM high_scores 
+        return dict(self.high_scores)
+
+    def begin_run(self, resume=None):
+        self.next_run += 1
+        if resume is not None:
+            self.write_queue.put(("claim", (self.next_run, *resume)))
+        return self.next_run
+
+    def update_run_score(self, run, difficulty, score):
+        return self.submit_score(run, difficulty, score, False)
+
+    def add_run_score(self, difficulty, score, run=None):
+        return self.submit_score(self.begin_run() if run is None else run, difficulty, score, True)
+
+    def submit_score(self, run, difficulty, score, final):
+        is_record = score > self.get_high_score(difficulty)
+        if is_record:
+            self.high_scores[difficulty] = score
+        with self.lock:
+            queued = run in self.pending_scores
+            self.pending_scores[run] = (difficulty, score, final)
+        if not queued:
+            self.write_queue.put(("run", run))
+        return is_record
+
+    def pending_writes(self):
+        with self.lock:
+            return len(self.pending_scores)
+
+    def reset_scores(self):
+        with self.lock:
+            self.pending_scores.clear()
+        self.high_scores.clear()
+        self.write_queue.put(("reset", None))
+
+    def record_telemetry(self, session, samples):
+        self.write_queue.put(("telemetry", (session, samples)))
+
+    def get_telemetry_rollup(self):
+        rows = self.conn.execute('''
+            SELECT difficulty, COUNT(*), AVG(duration), AVG(score), AVG(kills), AVG(shots_fired),
+                   SUM(hits_landed) * 1.0 / MAX(SUM(shots_fired), 1), AVG(hits_taken), MAX(speed_bonus_level),
+                   AVG(game_over), AVG(frame_p95), MAX(frame_p99)
+            FROM sessions
             GROUP BY difficulty
-        ''')
-        results = cursor.fetchall()
+            ORDER BY difficulty
+        ''').fetchall()
+        columns = ("difficulty", "sessions", "avg_duration", "avg_score", "avg_kills", "avg_shots", "accuracy",
+                   "avg_hits_taken", "max_speed_bonus_level", "game_over_rate", "avg_frame_p95", "max_frame_p99")
+        return [dict(zip(columns, row)) for row in rows]
+
+    def get_minute_rollup(self, difficulty):
+        rows = self.conn.execute('''
+            SELECT session_samples.minute, COUNT(*), AVG(session_samples.kills), AVG(session_samples.hits_taken),
+                   AVG(session_samples.speed_bonus_level), AVG(session_samples.meteorites),
+                   AVG(session_samples.frame_p95)
+            FROM session_samples
+            JOIN sessions ON sessions.id = session_samples.session_id
+            WHERE sessions.difficulty = ?
+            GROUP BY session_samples.minute
+            ORDER BY session_samples.minute
+        ''', (difficulty,)).fetchall()
+        columns = ("minute", "sessions", "avg_kills", "avg_hits_taken", "avg_speed_bonus_level", "avg_meteorites",
+                   "avg_frame_p95")
+        return [dict(zip(columns, row)) for row in rows]
+
+    def flush(self, timeout=None):
+        done = threading.Event()
+        self.write_queue.put(("flush", done))
+        return done.wait(timeout)
+
+    def write_loop(self):
+        conn = sqlite3.connect(self.db_file)
+        run_rows = {}
+        while True:
+            item = self.write_queue.get()
+            if item is None:
+                break
+            kind, value = item
+            if kind == "flush":
+                value.set()
+                continue
+            if kind == "claim":
+                run, difficulty, score = value
+                row = conn.execute('''
+                    SELECT id FROM high_scores
+                    WHERE difficulty = ? AND score >= ?
+                    ORDER BY id DESC
+                    LIMIT 1
+                ''', (difficulty, score)).fetchone()
+                if row is not None:
+                    run_rows[run] = row[0]
+                continue
+            if kind == "run":
+                with self.lock:
+                    pending = self.pending_scores.pop(value, None)
+                if pending is None:
+                    continue
+            if self.write_delay:
+                time.sleep(self.write_delay)
+            try:
+                if kind == "run":
+                    difficulty, score, final = pending
+                    row = run_rows.pop(value, None) if final else run_rows.get(value)
+                    if row is None or not conn.execute('''
+                        UPDATE high_scores SET score = ? WHERE id = ?
+                    ''', (score, row)).rowcount:
+                        row = conn.execute('''
+                            INSERT INTO high_scores (difficulty, score) 
+                            VALUES (?, ?)
+                        ''', (difficulty, score)).lastrowid
+                        if not final:
+                            run_rows[value] = row
+                    if self.retention:
+                        self.prune_rows(conn, difficulty, self.retention)
+                elif kind == "prune":
+                    self.prune_rows(conn, *value)
+                elif kind == "reset":
+                    conn.execute("DELETE FROM high_scores")
+                    run_rows.clear()
+                elif kind == "telemetry":
+                    session, samples = value
+                    conn.executemany('''
+                        INSERT OR REPLACE INTO session_samples
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', samples)
+                    if session is not None:
+                        conn.execute('''
+                            INSERT OR REPLACE INTO sessions (id, difficulty, seed, duration, score, kills,
+                                shots_fired, hits_landed, hits_taken, speed_bonus_level, game_over, frames,
+                                frame_p50, frame_p95, frame_p99)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ''', session)
+                conn.commit()
+                self.writes += 1
+            except sqlite3.Error:
+                self.failed_writes += 1
         conn.close()
-        high_scores = {}
-        for difficulty, score in results:
-            high_scores[difficulty] = score
-        return high_scores
 
+    def prune_rows(self, conn, difficulty, keep):
+        boundary = conn.execute('''
+            SELECT score, id FROM high_scores
+            WHERE difficulty = ?
+            ORDER BY score DESC, id
+            LIMIT 1 OFFSET ?
+        ''', (difficulty, keep - 1)).fetchone()
+        if boundary is not None:
+            conn.execute('''
+                DELETE FROM high_scores
+                WHERE difficulty = ? AND (score < ? OR (score = ? AND id > ?))
+            ''', (difficulty, boundary[0], boundary[0], boundary[1]))
+
+    def close(self):
+        if self.writer.is_alive():
+            self.write_queue.put(None)
+            self.writer.join()
+        self.conn.close()
+
+
+def asset_path(name):
+    path = os.path.join(ASSET_DIR, name)
+    return path if os.path.exists(path) else name
+
+
+class AssetManager:
+    def __init__(self):
+        self.textures = {}
+        self.hits = 0
+        self.misses = 0
+        self.load_time = 0.0
+
+    def get_generated(self, key, factory, *args):
+        texture = self.textures.get(key)
+        if texture is None:
+            self.misses += 1
+            start = time.perf_counter()
+            texture = self.textures[key] = factory(*args)
+            self.load_time += time.perf_counter() - start
+        else:
+            self.hits += 1
+        return texture
+
+    def get_texture(self, path):
+        return self.get_generated(path, arcade.load_texture, asset_path(path))
+
+    def bullet_texture(self):
+        return self.get_generated("bullet", arcade.make_soft_square_texture, 20, arcade.color.RED, 255, 255)
+
+    def preload(self, atlas=None):
+        for path in TEXTURE_FILES:
+            if os.path.exists(asset_path(path)):
+                self.get_texture(path)
+        self.bullet_texture()
+        if atlas is not None:
+            for texture in self.textures.values():
+                atlas.add(texture)
+
+    def stats(self):
+        return {
+            "textures": len(self.textures),
+            "hits": self.hits,
+            "misses": self.misses,
+            "bytes": sum(texture.width * texture.height * 4 for texture in self.textures.values()),
+            "load_time": self.load_time,
+        }
+
+
+asset_manager = AssetManager()
+
+
+class StartupLoader:
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self.error = None
+        self.timings = {}
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        try:
+            start = time.perf_counter()
+            DatabaseManager.prepare(self.db_file)
+            loaded = time.perf_counter()
+            self.timings["database"] = loaded - start
+            asset_manager.preload()
+            for kind in ("player", "meteorite", "bullet"):
+                get_hit_shape(kind)
+            self.timings["textures"] = time.perf_counter() - loaded
+        except Exception as error:
+            self.error = error
+        finally:
+            self.done.set()
+
+
+class ViewRegistry:
+    def __init__(self, window):
+        self.window = window
+        self.factories = {}
+        self.views = {}
+        self.build_times = {}
+        self.transitions = {}
+        self.current = None
+
+    def register(self, name, factory):
+        self.factories[name] = factory
+
+    def get(self, name):
+        view = self.views.get(name)
+        if view is None:
+            start = time.perf_counter()
+            view = self.views[name] = self.factories[name]()
+            self.build_times[name] = time.perf_counter() - start
+        return view
+
+    def show(self, name, **kwargs):
+        start = time.perf_counter()
+        previous = self.current
+        if previous is not None:
+            self.views[previous].exit()
+        view = self.get(name)
+        view.enter(**kwargs)
+        self.window.show_view(view)
+        self.current = name
+        elapsed = time.perf_counter() - start
+        stats = self.transitions.setdefault(f"{previous}->{name}", [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += elapsed
+        stats[2] = max(stats[2], elapsed)
+        return view
+
+    def report(self):
+        return {
+            "build_ms": {name: elapsed * 1000 for name, elapsed in self.build_times.items()},
+            "transitions_ms": {key: {"count": count, "mean": total * 1000 / count, "max": longest * 1000}
+                               for key, (count, total, longest) in self.transitions.items()},
+        }
+
+
+class FrameProfiler:
+    def __init__(self, history=PROFILER_HISTORY, enabled=False):
+        self.history = history
+        self.enabled = enabled
+        self.phases = {}
+        self.counts = {}
+        self.current = {}
+        self.frames = 0
+
+    def mark(self):
+        if not self.enabled:
+            return 0.0
+        return time.perf_counter()
+
+    def lap(self, phase, start):
+        if not self.enabled:
+            return 0.0
+        now = time.perf_counter()
+        self.current[phase] = self.current.get(phase, 0.0) + now - start
+        return now
+
+    def end_frame(self, **counts):
+        if not self.enabled:
+            return
+        index = self.frames % self.history
+        for phase, elapsed in self.current.items():
+            if phase not in self.phases:
+                self.phases[phase] = np.zeros(self.history, dtype=np.float64)
+        for phase, samples in self.phases.items():
+            samples[index] = self.current.get(phase, 0.0)
+        for name, count in counts.items():
+            if name not in self.counts:
+                self.counts[name] = np.zeros(self.history, dtype=np.int64)
+            self.counts[name][index] = count
+        self.current.clear()
+        self.frames += 1
+
+    def reset(self):
+        self.phases.clear()
+        self.counts.clear()
+        self.current.clear()
+        self.frames = 0
+
+    def ordered(self, samples):
+        if self.frames <= self.history:
+            return samples[:self.frames]
+        index = self.frames % self.history
+        return np.concatenate((samples[index:], samples[:index]))
+
+    def report(self):
+        filled = min(self.frames, self.history)
+        phases = {}
+        counts = {}
+        if filled:
+            for phase, samples in self.phases.items():
+                p50, p95, p99 = np.percentile(samples[:filled], (50, 95, 99)) * 1000
+                phases[phase] = {"p50": float(p50), "p95": float(p95), "p99": float(p99)}
+            for name, samples in self.counts.items():
+                recent = self.ordered(samples)
+                counts[name] = {"last": int(recent[-1]), "max": int(recent.max())}
+        return {"frames": self.frames, "phases_ms": phases, "counts": counts}
+
+    def format_report(self):
+        report = self.report()
+        lines = [f"{'фаза':<14} {'p50':>7} {'p95':>7} {'p99':>7}"]
+        for phase, stats in report["phases_ms"].items():
+            lines.append(f"{phase:<14} {stats['p50']:>7.3f} {stats['p95']:>7.3f} {stats['p99']:>7.3f}")
+        for name, stats in report["counts"].items():
+            lines.append(f"{name:<14} {stats['last']:>7} {stats['max']:>7}")
+        return "\n".join(lines)
+
+    def export_csv(self, path):
+        columns = [self.ordered(samples) * 1000 for samples in self.phases.values()]
+        columns += [self.ordered(samples) for samples in self.counts.values()]
+        first_frame = self.frames - min(self.frames, self.history)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(",".join(["frame"] + [f"{phase}_ms" for phase in self.phases] + list(self.counts)) + "\n")
+            for row in range(len(columns[0]) if columns else 0):
+                values = [str(first_frame + row)] + [f"{column[row]:.6g}" for column in columns]
+                file.write(",".join(values) + "\n")
+
+    def export_json(self, path):
+        report = self.report()
+        report["samples_ms"] = {phase: (self.ordered(samples) * 1000).tolist() for phase, samples in self.phases.items()}
+        report["samples_counts"] = {name: self.ordered(samples).tolist() for name, samples in self.counts.items()}
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+class QualityGovernor:
+    def __init__(self, budget=1 / RENDER_RATE, levels=QUALITY_LEVELS, window=QUALITY_WINDOW, enabled=True):
+        self.budget = budget
+        self.levels = levels
+        self.enabled = enabled
+        self.samples = np.zeros(window, dtype=np.float64)
+        self.frames = 0
+        self.next_decision = window
+        self.level = 0
+        self.headroom_frames = 0
+        self.throttles = 0
+        self.restores = 0
+        self.decisions = []
+        self.last_p90 = 0.0
+
+    @property
+    def settings(self):
+        return self.levels[self.level]
+
+    @property
+    def hit_flash(self):
+        return self.settings["hit_flash"]
+
+    @property
+    def particle_lifetime(self):
+        return PARTICLE_LIFETIME * self.settings["lifetime_scale"]
+
+    def particle_count(self, count=PARTICLE_COUNT):
+        return max(1, round(count * self.settings["particle_scale"]))
+
+    def record(self, frame_time):
+        samples = self.samples
+        samples[self.frames % len(samples)] = frame_time
+        self.frames += 1
+        if not self.enabled or self.frames < self.next_decision or self.frames % QUALITY_EVALUATE_INTERVAL:
+            return
+        self.last_p90 = p90 = float(np.percentile(samples, 90))
+        if p90 > self.budget * QUALITY_THROTTLE_RATIO:
+            self.headroom_frames = 0
+            if self.level < len(self.levels) - 1:
+                self.change_level(self.level + 1, p90)
+                self.throttles += 1
+        elif p90 < self.budget * QUALITY_RESTORE_RATIO:
+            self.headroom_frames += QUALITY_EVALUATE_INTERVAL
+            if self.level and self.headroom_frames >= QUALITY_RESTORE_DELAY:
+                self.headroom_frames = 0
+                self.change_level(self.level - 1, p90)
+                self.restores += 1
+        else:
+            self.headroom_frames = 0
+
+    def change_level(self, level, p90):
+        self.decisions.append({"frame": self.frames, "from": self.level, "to": level, "p90_ms": p90 * 1000})
+        del self.decisions[:-QUALITY_DECISION_HISTORY]
+        self.level = level
+        self.next_decision = self.frames + len(self.samples)
+
+    def stats(self):
+        return {
+            "level": self.level,
+            "settings": dict(self.settings),
+            "budget_ms": self.budget * 1000,
+            "p90_ms": self.last_p90 * 1000,
+            "frames": self.frames,
+            "throttles": self.throttles,
+            "restores": self.restores,
+            "decisions": list(self.decisions),
+        }
+
+
+def histogram_percentiles(histogram, percentiles=(50, 95, 99)):
+    total = histogram.sum()
+    if not total:
+        return (None,) * len(percentiles)
+    cumulative = np.cumsum(histogram)
+    return tuple(float((np.searchsorted(cumulative, total * percentile / 100) + 0.5) * TELEMETRY_BUCKET_MS)
+                 for percentile in percentiles)
+
+
+class SessionTelemetry:
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self.active = False
+        self.samples = []
+        self.histogram = [0] * (TELEMETRY_BUCKETS + 1)
+        self.session_histogram = np.zeros(TELEMETRY_BUCKETS + 1, dtype=np.int64)
+
+    def counts(self, sim):
+        return sim.score, sim.kills, sim.shots_fired, sim.hits_landed, sim.player.hits
+
+    def start(self, sim):
+        self.active = True
+        self.session_id = time.time_ns()
+        self.seed = sim.seed
+        self.difficulty_id = sim.difficulty_id
+        self.start_time = sim.total_time
+        self.start_counts = self.minute_counts = self.counts(sim)
+        self.next_sample = sim.total_time + TELEMETRY_SAMPLE_INTERVAL
+        self.minute = 0
+        self.samples = []
+        self.histogram = [0] * (TELEMETRY_BUCKETS + 1)
+        self.session_histogram[:] = 0
+
+    def record_frame(self, frame_time):
+        bucket = int(frame_time * 1000 / TELEMETRY_BUCKET_MS)
+        self.histogram[bucket if bucket < TELEMETRY_BUCKETS else TELEMETRY_BUCKETS] += 1
+
+    def update(self, sim):
+        if self.active and sim.total_time >= self.next_sample:
+            self.sample(sim)
+            self.next_sample += TELEMETRY_SAMPLE_INTERVAL
+            if len(self.samples) >= TELEMETRY_FLUSH_SAMPLES:
+                self.flush()
+
+    def sample(self, sim):
+        histogram = np.array(self.histogram, dtype=np.int64)
+        self.histogram = [0] * (TELEMETRY_BUCKETS + 1)
+        self.session_histogram += histogram
+        counts = self.counts(sim)
+        _, kills, shots_fired, _, hits_taken = (now - before for now, before in zip(counts, self.minute_counts))
+        self.minute_counts = counts
+        self.samples.append((self.session_id, self.minute, sim.score, kills, shots_fired, hits_taken,
+                             round(sim.speed_bonus / sim.speed_bonus_step), len(sim.meteorites), len(sim.bullets),
+                             int(histogram.sum()), *histogram_percentiles(histogram)))
+        self.minute += 1
+
+    def flush(self, session=None):
+        if self.samples or session is not None:
+            self.db_manager.record_telemetry(session, self.samples)
+            self.samples = []
+
+    def finish(self, sim):
+        if not self.active:
+            return
+        self.active = False
+        if sim.total_time == self.start_time:
+            self.samples = []
+            return
+        if sim.total_time > self.next_sample - TELEMETRY_SAMPLE_INTERVAL:
+            self.sample(sim)
+        score, kills, shots_fired, hits_landed, hits_taken = (
+            now - before for now, before in zip(self.counts(sim), self.start_counts))
+        histogram = self.session_histogram
+        self.flush((self.session_id, self.difficulty_id, self.seed, sim.total_time - self.start_time, score, kills,
+                    shots_fired, hits_landed, hits_taken, round(sim.speed_bonus / sim.speed_bonus_step),
+                    int(sim.is_game_over), int(histogram.sum()), *histogram_percentiles(histogram)))
+
+
+class MemoryMonitor:
+    def __init__(self, runs=MEMORY_GROWTH_RUNS, threshold_kib=MEMORY_GROWTH_KIB):
+        self.runs = runs
+        self.threshold_kib = threshold_kib
+        self.enabled = False
+        self.started_trace = False
+        self.totals = []
+        self.completed = 0
+        self.reference = None
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(MEMORY_TRACE_FRAMES)
+            self.started_trace = True
+        self.enabled = True
+        self.totals.clear()
+        self.completed = 0
+        self.reference = None
+
+    def stop(self):
+        if self.started_trace:
+            tracemalloc.stop()
+            self.started_trace = False
+        self.enabled = False
+        self.reference = None
+
+    def record_run(self):
+        if not self.enabled:
+            return
+        gc.collect()
+        self.totals.append(tracemalloc.get_traced_memory()[0])
+        del self.totals[:-MEMORY_HISTORY]
+        self.completed += 1
+        if self.completed == self.runs:
+            self.reference = tracemalloc.take_snapshot()
+
+    def deltas(self):
+        totals = self.totals
+        return [after - before for before, after in zip(totals, totals[1:])]
+
+    def growth(self):
+        if len(self.totals) <= self.runs:
+            return None
+        return self.totals[-1] - self.totals[-1 - self.runs]
+
+    @property
+    def leaking(self):
+        growth = self.growth()
+        return growth is not None and growth > self.threshold_kib * 1024
+
+    def top_growth(self, limit=MEMORY_TOP_STATS):
+        if self.reference is None:
+            return []
+        stats = tracemalloc.take_snapshot().compare_to(self.reference, "lineno")
+        return [str(stat) for stat in stats[:limit] if stat.size_diff > 0]
+
+    def stats(self):
+        growth = self.growth()
+        deltas = self.deltas()
+        return {
+            "runs": self.completed,
+            "traced_kib": self.totals[-1] / 1024 if self.totals else 0.0,
+            "last_delta_kib": deltas[-1] / 1024 if deltas else 0.0,
+            "growth_kib": growth / 1024 if growth is not None else None,
+            "window_runs": self.runs,
+            "leaking": self.leaking,
+        }
+
+
+def object_footprint(root):
+    shared = (type, types.ModuleType, types.FunctionType, threading.Thread, arcade.Window, arcade.View,
+              arcade.ArcadeContext, arcade.texture_atlas.TextureAtlasBase, arcade.Texture, DatabaseManager,
+              AssetManager)
+    seen = {id(root)}
+    stack = [root]
+    count = 0
+    size = 0
+    while stack:
+        obj = stack.pop()
+        count += 1
+        size += sys.getsizeof(obj)
+        for referent in gc.get_referents(obj):
+            if id(referent) not in seen and not isinstance(referent, shared):
+                seen.add(id(referent))
+                stack.append(referent)
+    return count, size
+
+
+def live_object_counts(type_names=MEMORY_TRACKED_TYPES):
+    counts = {name: [0, 0] for name in type_names}
+    for obj in gc.get_objects():
+        stats = counts.get(type(obj).__name__)
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += sys.getsizeof(obj)
+    return {name: {"count": count, "bytes": size} for name, (count, size) in counts.items()}
+
+
+def memory_report(window):
+    views = window.views
+    report = {"objects": live_object_counts(), "views": {}, "entities": {}}
+    for name, view in views.views.items():
+        count, size = object_footprint(view)
+        report["views"][name] = {"objects": count, "kib": size / 1024}
+    game_view = views.views.get("game")
+    if game_view is not None:
+        report["entities"] = game_view.memory_stats()
+    memory = getattr(window, "memory", None)
+    if memory is not None and memory.enabled:
+        report["runs"] = memory.stats()
+        report["top_growth"] = memory.top_growth()
+    return report
+
+
+class SpatialHash:
+    def __init__(self, cell_size=COLLISION_CELL_SIZE, collide=arcade.check_for_collision):
+        self.cell_size = cell_size
+        self.collide = collide
+        self.cells = {}
+        self.entries = {}
+        self.next_order = 0
+
+    def cell_bounds(self, left, bottom, right, top):
+        size = self.cell_size
+        return int(left // size), int(bottom // size), int(right // size), int(top // size)
+
+    def link(self, item, bounds):
+        cells = self.cells
+        for cell_x in range(bounds[0], bounds[2] + 1):
+            for cell_y in range(bounds[1], bounds[3] + 1):
+                bucket = cells.get((cell_x, cell_y))
+                if bucket is None:
+                    bucket = cells[(cell_x, cell_y)] = set()
+                bucket.add(item)
+
+    def unlink(self, item, bounds):
+        cells = self.cells
+        for cell_x in range(bounds[0], bounds[2] + 1):
+            for cell_y in range(bounds[1], bounds[3] + 1):
+                bucket = cells[(cell_x, cell_y)]
+                bucket.discard(item)
+                if not bucket:
+                    del cells[(cell_x, cell_y)]
+
+    def insert(self, item, left, bottom, right, top):
+        bounds = self.cell_bounds(left, bottom, right, top)
+        self.entries[item] = [self.next_order, bounds, left, bottom, right, top]
+        self.next_order += 1
+        self.link(item, bounds)
+
+    def move(self, item, left, bottom, right, top):
+        entry = self.entries.get(item)
+        if entry is None:
+            self.insert(item, left, bottom, right, top)
+            return
+        entry[2:] = left, bottom, right, top
+        bounds = self.cell_bounds(left, bottom, right, top)
+        if bounds != entry[1]:
+            self.unlink(item, entry[1])
+            self.link(item, bounds)
+            entry[1] = bounds
+
+    def remove(self, item):
+        entry = self.entries.pop(item, None)
+        if entry is not None:
+            self.unlink(item, entry[1])
+
+    def clear(self):
+        self.cells.clear()
+        self.entries.clear()
 
-class Particle(arcade.Sprite):
-    def __init__(self, x, y):
+    def query(self, left, bottom, right, top):
+        x0, y0, x1, y1 = self.cell_bounds(left, bottom, right, top)
+        cells = self.cells
+        found = set()
+        for cell_x in range(x0, x1 + 1):
+            for cell_y in range(y0, y1 + 1):
+                bucket = cells.get((cell_x, cell_y))
+                if bucket:
+                    found.update(bucket)
+        entries = self.entries
+        overlapping = []
+        for item in found:
+            entry = entries[item]
+            if entry[2] <= right and entry[4] >= left and entry[3] <= top and entry[5] >= bottom:
+                overlapping.append(item)
+        if len(overlapping) > 1:
+            overlapping.sort(key=lambda item: entries[item][0])
+        return overlapping
+
+    def update_items(self, items):
+        for item in items:
+            self.move(item, item.left, item.bottom, item.right, item.top)
+
+    def check_for_collision(self, item):
+        candidates = self.query(item.left, item.bottom, item.right, item.top)
+        collide = self.collide
+        return [other for other in candidates if other is not item and collide(item, other)]
+
+
+PARTICLE_VERTEX_SHADER = """
+#version 330
+
+uniform WindowBlock {
+    mat4 projection;
+    mat4 view;
+} window;
+
+in vec2 in_vert;
+in vec2 in_position;
+in vec4 in_color;
+in float in_size;
+
+out vec2 v_offset;
+out vec4 v_color;
+
+void main() {
+    v_offset = in_vert;
+    v_color = in_color;
+    gl_Position = window.projection * window.view * vec4(in_position + in_vert * in_size * 0.5, 0.0, 1.0);
+}
+"""
+
+PARTICLE_FRAGMENT_SHADER = """
+#version 330
+
+in vec2 v_offset;
+in vec4 v_color;
+
+out vec4 fragColor;
+
+void main() {
+    if (dot(v_offset, v_offset) > 1.0) {
+        discard;
+    }
+    fragColor = v_color;
+}
+"""
+
+
+class ParticleSystem:
+    def __init__(self, capacity=PARTICLE_CAPACITY, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.palette = np.array([color[:3] for color in PARTICLE_COLORS], dtype=np.float32) / 255
+        self.count = 0
+        self.allocate(capacity)
+        self.program = None
+        self.geometry = None
+        self.buffer_capacity = 0
+
+    def allocate(self, capacity):
+        count = self.count
+        position = np.zeros((capacity, 2), dtype=np.float32)
+        velocity = np.zeros((capacity, 2), dtype=np.float32)
+        lifetime = np.zeros(capacity, dtype=np.float32)
+        duration = np.ones(capacity, dtype=np.float32)
+        color = np.zeros((capacity, 4), dtype=np.float32)
+        size = np.zeros(capacity, dtype=np.float32)
+        if count:
+            position[:count] = self.position[:count]
+            velocity[:count] = self.velocity[:count]
+            lifetime[:count] = self.lifetime[:count]
+            duration[:count] = self.duration[:count]
+            color[:count] = self.color[:count]
+            size[:count] = self.size[:count]
+        self.capacity = capacity
+        self.position = position
+        self.velocity = velocity
+        self.lifetime = lifetime
+        self.duration = duration
+        self.color = color
+        self.size = size
+        self.vertices = np.zeros((capacity, 7), dtype=np.float32)
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in (self.position, self.velocity, self.lifetime, self.duration,
+                                               self.color, self.size, self.vertices))
+
+    def clear(self):
+        self.count = 0
+
+    def emit(self, x, y, count=PARTICLE_COUNT, lifetime=PARTICLE_LIFETIME):
+        start = self.count
+        end = start + count
+        if end > self.capacity:
+            capacity = self.capacity
+            while capacity < end:
+                capacity *= 2
+            self.allocate(capacity)
+        rng = self.rng
+        angle = rng.uniform(0, 2 * math.pi, count)
+        speed = rng.uniform(PARTICLE_MIN_SPEED, PARTICLE_MAX_SPEED, count)
+        self.position[start:end] = x, y
+        self.velocity[start:end, 0] = np.cos(angle) * speed
+        self.velocity[start:end, 1] = np.sin(angle) * speed
+        self.lifetime[start:end] = lifetime
+        self.duration[start:end] = lifetime
+        self.color[start:end, :3] = self.palette[rng.integers(len(self.palette), size=count)]
+        self.color[start:end, 3] = 1.0
+        self.size[start:end] = PARTICLE_TEXTURE_SIZE * rng.uniform(0.2, 0.5, count)
+        self.count = end
+
+    def update(self, delta_time=1 / 60):
+        count = self.count
+        if not count:
+            return
+        position = self.position[:count]
+        velocity = self.velocity[:count]
+        lifetime = self.lifetime[:count]
+        scale = delta_time * REFERENCE_FRAME_RATE
+        position += velocity * scale
+        lifetime -= delta_time
+        alive = lifetime > 0
+        if not alive.all():
+            count = int(np.count_nonzero(alive))
+            for array in (self.position, self.velocity, self.lifetime, self.duration, self.color, self.size):
+                array[:count] = array[:self.count][alive]
+            self.count = count
+            position = self.position[:count]
+            velocity = self.velocity[:count]
+            lifetime = self.lifetime[:count]
+        self.color[:count, 3] = np.floor(255 * (lifetime / self.duration[:count])) / 255
+        velocity *= PARTICLE_DRAG ** scale
+        velocity[:, 1] -= PARTICLE_GRAVITY * scale
+
+    def pack_vertices(self):
+        count = self.count
+        vertices = self.vertices[:count]
+        vertices[:, 0:2] = self.position[:count]
+        vertices[:, 2:6] = self.color[:count]
+        vertices[:, 6] = self.size[:count]
+        return vertices
+
+    def draw(self):
+        if not self.count:
+            return
+        ctx = arcade.get_window().ctx
+        if self.program is None:
+            self.program = ctx.program(vertex_shader=PARTICLE_VERTEX_SHADER,
+                                       fragment_shader=PARTICLE_FRAGMENT_SHADER)
+            self.quad_buffer = ctx.buffer(data=np.array([-1, -1, 1, -1, -1, 1, 1, 1], dtype=np.float32))
+        if self.buffer_capacity != self.capacity:
+            self.instance_buffer = ctx.buffer(reserve=self.vertices.nbytes, usage="stream")
+            self.geometry = ctx.geometry([
+                arcade.gl.BufferDescription(self.quad_buffer, "2f", ["in_vert"]),
+                arcade.gl.BufferDescription(self.instance_buffer, "2f 4f 1f",
+                                            ["in_position", "in_color", "in_size"], instanced=True)
+            ], mode=ctx.TRIANGLE_STRIP)
+            self.buffer_capacity = self.capacity
+        self.instance_buffer.write(self.pack_vertices())
+        ctx.enable(ctx.BLEND)
+        self.geometry.render(self.program, instances=self.count)
+
+
+class TextLayer:
+    def __init__(self):
+        self.batch = pyglet.graphics.Batch()
+        self.texts = {}
+        self.layouts_built = 0
+        self.counted_layouts = 0
+        self.frame_layouts = 0
+
+    def add(self, key, text, x, y, color, font_size=12, **kwargs):
+        label = arcade.Text(text, x, y, color, font_size, batch=self.batch, **kwargs)
+        self.texts[key] = label
+        self.layouts_built += 1
+        return label
+
+    def set_text(self, key, text):
+        label = self.texts[key]
+        if label.text != text:
+            label.text = text
+            self.layouts_built += 1
+
+    def warm(self, key, variants):
+        label = self.texts[key]
+        text = label.text
+        for variant in variants:
+            label.text = variant
+        label.text = text
+
+    def set_color(self, key, color):
+        label = self.texts[key]
+        if label.color != color:
+            label.color = color
+
+    def set_x(self, key, x):
+        label = self.texts[key]
+        if label.x != x:
+            label.x = x
+
+    def set_visible(self, key, visible):
+        label = self.texts[key]
+        if label.visible != visible:
+            label.visible = visible
+
+    def draw(self):
+        self.batch.draw()
+        self.frame_layouts = self.layouts_built - self.counted_layouts
+        self.counted_layouts = self.layouts_built
+
+
+class LoadingView(arcade.View):
+    def __init__(self, loader, stages):
         super().__init__()
-        self.texture = arcade.make_circle_texture(10, random.choice(PARTICLE_COLORS))
-        self.scale = random.uniform(0.2, 0.5)
-        self.center_x = x
-        self.center_y = y
-        angle = random.uniform(0, 2 * math.pi)
-        speed = random.uniform(PARTICLE_MIN_SPEED, PARTICLE_MAX_SPEED)
-        self.change_x = math.cos(angle) * speed
-        self.change_y = math.sin(angle) * speed
-        self.lifetime = PARTICLE_LIFETIME
-        self.initial_lifetime = PARTICLE_LIFETIME
-        self.fade_rate = 1.0 / PARTICLE_LIFETIME
-
-    def update(self, delta_time: float = 1 / 60):
-        super().update()
-        self.lifetime -= delta_time
-        if self.lifetime <= 0:
-            self.remove_from_sprite_lists()
+        self.loader = loader
+        self.stages = list(stages)
+        self.first_frame_drawn = False
+        self.label = arcade.Text("Загрузка...", SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2, arcade.color.WHITE,
+                                 font_size=40, anchor_x="center")
+
+    def on_draw(self):
+        self.clear()
+        self.label.draw()
+        if not self.first_frame_drawn:
+            self.first_frame_drawn = True
+            self.window.startup_timings["first_frame"] = time.perf_counter() - self.window.startup_start
+
+    def on_update(self, delta_time):
+        if not self.first_frame_drawn or not self.loader.done.is_set():
+            return
+        if self.loader.error is not None:
+            raise self.loader.error
+        if self.stages:
+            name, stage = self.stages.pop(0)
+            start = time.perf_counter()
+            stage()
+            self.window.startup_timings[name] = time.perf_counter() - start
             return
-        alpha = int(255 * (self.lifetime / self.initial_lifetime))
-        if alpha < 0:
-            alpha = 0
-        self.color = (self.color[0], self.color[1], self.color[2], alpha)
-        self.change_x *= 0.98
-        self.change_y *= 0.98
-        self.change_y -= 0.1
+        self.window.startup_ready()
 
 
 class MenuView(arcade.View):
-    def __init__(self):
+    def __init__(self, db_manager):
         super().__init__()
-        self.db_manager = DatabaseManager(DB_FILE)
+        self.db_manager = db_manager
         self.high_scores = self.db_manager.get_all_high_scores()
         self.background_color = arcade.color.BLUE_GRAY
         self.selected_difficulty = 0
         self.difficulties = [
-            (DIFFICULTY_EASY, "Легкая", arcade.color.GREEN),
-            (DIFFICULTY_MEDIUM, "Средняя", arcade.color.YELLOW),
-            (DIFFICULTY_HARD, "Сложная", arcade.color.RED)
+            (DIFFICULTY_EASY, DIFFICULTY_NAMES[DIFFICULTY_EASY], arcade.color.GREEN),
+            (DIFFICULTY_MEDIUM, DIFFICULTY_NAMES[DIFFICULTY_MEDIUM], arcade.color.YELLOW),
+            (DIFFICULTY_HARD, DIFFICULTY_NAMES[DIFFICULTY_HARD], arcade.color.RED)
         ]
         self.camera_offset = 0
         self.secret_visible = False
+        self.saved_game = None
+        self.build_layout()
 
-    def update_high_scores(self):
-        self.high_scores = self.db_manager.get_all_high_scores()
+    def enter(self):
+        self.update_high_scores()
+        saved_game = self.saved_game = peek_snapshot(SNAPSHOT_FILE)
+        self.text_layer.set_visible("continue", saved_game is not None)
+        if saved_game is not None:
+            name = DIFFICULTY_NAMES[saved_game["difficulty"]]
+            self.text_layer.set_text("continue", f"L - продолжить игру ({name}, {saved_game['score']} очков)")
 
-    def on_draw(self):
-        self.clear()
-        arcade.draw_rect_filled(
-            arcade.rect.XYWH(
-                SCREEN_WIDTH // 2 - self.camera_offset,
-                SCREEN_HEIGHT // 2,
-                SCREEN_WIDTH,
-                SCREEN_HEIGHT
-            ),
-            self.background_color
-        )
-        arcade.draw_text("Space Attack",
-                         SCREEN_WIDTH // 2 - self.camera_offset,
-                         SCREEN_HEIGHT - 100,
-                         arcade.color.WHITE,
-                         font_size=50,
-                         anchor_x="center",
-                         bold=True)
-        arcade.draw_text("Лучшие результаты:",
-                         SCREEN_WIDTH // 2 - self.camera_offset + 500,
-                         SCREEN_HEIGHT - 180,
-                         arcade.color.GOLD,
-                         font_size=30,
-                         anchor_x="center")
+    def exit(self):
+        pass
+
+    def build_layout(self):
+        center_x = SCREEN_WIDTH // 2
+        secret_x = center_x - 600
+        texts = self.text_layer = TextLayer()
+        texts.add("title", "Space Attack", center_x, SCREEN_HEIGHT - 100, arcade.color.WHITE,
+                  font_size=50, anchor_x="center", bold=True)
+        texts.add("scores_title", "Лучшие результаты:", center_x + 500, SCREEN_HEIGHT - 180, arcade.color.GOLD,
+                  font_size=30, anchor_x="center")
         y_pos = SCREEN_HEIGHT - 220
         for difficulty_id, name, color in self.difficulties:
             score = self.high_scores.get(difficulty_id, 0)
-            arcade.draw_text(f"{name}: {score} очков",
-                             SCREEN_WIDTH // 2 - self.camera_offset + 500,
-                             y_pos,
-                             color,
-                             font_size=24,
-                             anchor_x="center")
+            texts.add(f"score_{difficulty_id}", f"{name}: {score} очков", center_x + 500, y_pos, color,
+                      font_size=24, anchor_x="center")
             y_pos -= 40
-        arcade.draw_text("Выберите сложность:",
-                         SCREEN_WIDTH // 2 - self.camera_offset,
-                         SCREEN_HEIGHT // 2 + 100,
-                         arcade.color.WHITE,
-                         font_size=30,
-                         anchor_x="center")
+        texts.add("choose", "Выберите сложность:", center_x, SCREEN_HEIGHT // 2 + 100, arcade.color.WHITE,
+                  font_size=30, anchor_x="center")
         for i, (difficulty_id, name, color) in enumerate(self.difficulties):
-            y_pos = SCREEN_HEIGHT // 2 - i * 60
-            if i == self.selected_difficulty:
-                arcade.draw_rect_filled(
-                    arcade.rect.XYWH(SCREEN_WIDTH // 2 - self.camera_offset, y_pos, 400, 50),
-                    arcade.color.LIGHT_GRAY
-                )
-                arcade.draw_rect_outline(
-                    arcade.rect.XYWH(SCREEN_WIDTH // 2 - self.camera_offset, y_pos, 400, 50),
-                    arcade.color.WHITE,
-                    3
-                )
-            arcade.draw_text(name,
-                             SCREEN_WIDTH // 2 - self.camera_offset,
-                             y_pos,
-                             color,
-                             font_size=28,
-                             anchor_x="center")
-        arcade.draw_text("Используйте W/S или ↑/↓ для выбора",
-                         SCREEN_WIDTH // 2 - self.camera_offset,
-                         SCREEN_HEIGHT // 2 - 300,
-                         arcade.color.WHITE,
-                         font_size=20,
-                         anchor_x="center")
-        arcade.draw_text("Нажмите SPACE для начала игры",
-                         SCREEN_WIDTH // 2 - self.camera_offset,
-                         SCREEN_HEIGHT // 2 - 340,
-                         arcade.color.WHITE,
-                         font_size=20,
-                         anchor_x="center")
-        arcade.draw_text("Нажмите ESC для выхода",
-                         SCREEN_WIDTH // 2 - self.camera_offset,
-                         SCREEN_HEIGHT // 2 - 380,
-                         arcade.color.WHITE,
-                         font_size=20,
-                         anchor_x="center")
-        arcade.draw_text("Нажмите C для сброса всех рекордов",
-                         SCREEN_WIDTH // 2 - self.camera_offset,
-                         SCREEN_HEIGHT // 2 - 420,
-                         arcade.color.LIGHT_GRAY,
-                         font_size=18,
-                         anchor_x="center")
+            texts.add(f"option_{difficulty_id}", name, center_x, SCREEN_HEIGHT // 2 - i * 60, color,
+                      font_size=28, anchor_x="center")
+        texts.add("continue", "", center_x, SCREEN_HEIGHT // 2 - 200, arcade.color.GOLD,
+                  font_size=22, anchor_x="center")
+        texts.warm("continue", [f"L - продолжить игру ({name}, 0123456789 очков)" for name in DIFFICULTY_NAMES.values()])
+        texts.set_visible("continue", False)
+        texts.add("help_select", "Используйте W/S или ↑/↓ для выбора", center_x, SCREEN_HEIGHT // 2 - 300,
+                  arcade.color.WHITE, font_size=20, anchor_x="center")
+        texts.add("help_start", "Нажмите SPACE для начала игры", center_x, SCREEN_HEIGHT // 2 - 340,
+                  arcade.color.WHITE, font_size=20, anchor_x="center")
+        texts.add("help_exit", "Нажмите ESC для выхода", center_x, SCREEN_HEIGHT // 2 - 380,
+                  arcade.color.WHITE, font_size=20, anchor_x="center")
+        texts.add("help_reset", "Нажмите C для сброса всех рекордов", center_x, SCREEN_HEIGHT // 2 - 420,
+                  arcade.color.LIGHT_GRAY, font_size=18, anchor_x="center")
+        texts.add("secret", SECRET_MESSAGE, secret_x, SCREEN_HEIGHT // 2, SECRET_MESSAGE_COLOR,
+                  font_size=36, anchor_x="center", bold=True)
+        texts.add("secret_caption", "Секретная пасхалка!", secret_x, SCREEN_HEIGHT // 2 - 40,
+                  arcade.color.LIGHT_GRAY, font_size=20, anchor_x="center")
+        texts.set_visible("secret", False)
+        texts.set_visible("secret_caption", False)
+        self.text_x = {key: label.x for key, label in texts.texts.items()}
+        self.layout_offset = 0
+        self.background_shapes = arcade.shape_list.ShapeElementList()
+        self.background_shapes.append(arcade.shape_list.create_rectangle_filled(
+            0, 0, SCREEN_WIDTH, SCREEN_HEIGHT, self.background_color))
+        self.selection_shapes = arcade.shape_list.ShapeElementList()
+        self.selection_shapes.append(arcade.shape_list.create_rectangle_filled(
+            0, 0, 400, 50, arcade.color.LIGHT_GRAY))
+        self.selection_shapes.append(arcade.shape_list.create_rectangle_outline(
+            0, 0, 400, 50, arcade.color.WHITE, 3))
+        self.secret_shapes = arcade.shape_list.ShapeElementList()
+        self.secret_shapes.append(arcade.shape_list.create_rectangle_filled(
+            0, 0, 400, 100, arcade.color.DARK_SLATE_GRAY))
+        self.secret_shapes.append(arcade.shape_list.create_rectangle_outline(
+            0, 0, 400, 100, SECRET_MESSAGE_COLOR, 3))
+
+    def update_high_scores(self):
+        self.high_scores = self.db_manager.get_all_high_scores()
+
+    def update_layout(self):
+        texts = self.text_layer
+        offset = self.camera_offset
+        if offset != self.layout_offset:
+            for key, x in self.text_x.items():
+                texts.set_x(key, x - offset)
+            self.layout_offset = offset
+        for difficulty_id, name, _ in self.difficulties:
+            texts.set_text(f"score_{difficulty_id}", f"{name}: {self.high_scores.get(difficulty_id, 0)} очков")
+        texts.set_visible("secret", self.secret_visible)
+        texts.set_visible("secret_caption", self.secret_visible)
+        self.background_shapes.position = (SCREEN_WIDTH // 2 - offset, SCREEN_HEIGHT // 2)
+        self.selection_shapes.position = (SCREEN_WIDTH // 2 - offset,
+                                          SCREEN_HEIGHT // 2 - self.selected_difficulty * 60)
+        self.secret_shapes.position = (SCREEN_WIDTH // 2 - offset - 600, SCREEN_HEIGHT // 2)
+
+    def on_draw(self):
+        self.clear()
+        self.update_layout()
+        self.background_shapes.draw()
+        self.selection_shapes.draw()
         if self.secret_visible:
-            secret_x = SCREEN_WIDTH // 2 - self.camera_offset - 600
-            arcade.draw_rect_filled(
-                arcade.rect.XYWH(secret_x, SCREEN_HEIGHT // 2, 400, 100),
-                arcade.color.DARK_SLATE_GRAY
-            )
-            arcade.draw_rect_outline(
-                arcade.rect.XYWH(secret_x, SCREEN_HEIGHT // 2, 400, 100),
-                SECRET_MESSAGE_COLOR,
-                3)
-            arcade.draw_text(SECRET_MESSAGE,
-                             secret_x,
-                             SCREEN_HEIGHT // 2,
-                             SECRET_MESSAGE_COLOR,
-                             font_size=36,
-                             anchor_x="center",
-                             bold=True)
-            arcade.draw_text("Секретная пасхалка!",
-                             secret_x,
-                             SCREEN_HEIGHT // 2 - 40,
-                             arcade.color.LIGHT_GRAY,
-                             font_size=20,
-                             anchor_x="center")
+            self.secret_shapes.draw()
+        self.text_layer.draw()
 
     def on_key_press(self, key, modifiers):
         if key == arcade.key.W or key == arcade.key.UP:
@@ -259,8 +1436,14 @@ class MenuView(arcade.View):
             self.selected_difficulty = (self.selected_difficulty + 1) % len(self.difficulties)
         elif key == arcade.key.SPACE:
             difficulty_id, difficulty_name, _ = self.difficulties[self.selected_difficulty]
-            game_view = GameView(difficulty_id, difficulty_name, self.db_manager)
-            self.window.show_view(game_view)
+            self.window.views.show("game", difficulty_id=difficulty_id, difficulty_name=difficulty_name)
+        elif key == arcade.key.L and self.saved_game is not None:
+            try:
+                self.window.views.show("game", snapshot=SNAPSHOT_FILE)
+            except (OSError, ValueError, KeyError):
+                if os.path.exists(SNAPSHOT_FILE):
+                    os.remove(SNAPSHOT_FILE)
+                self.enter()
         elif key == arcade.key.ESCAPE:
             arcade.close_window()
         elif key == arcade.key.A:
@@ -270,9 +1453,7 @@ class MenuView(arcade.View):
             self.camera_offset = 0
             self.secret_visible = False
         elif key == arcade.key.C:
-            if os.path.exists(DB_FILE):
-                os.remove(DB_FILE)
-            self.db_manager = DatabaseManager(DB_FILE)
+            self.db_manager.reset_scores()
             self.update_high_scores()
 
 
@@ -280,322 +1461,1894 @@ class PauseView(arcade.View):
     def __init__(self, game_view):
         super().__init__()
         self.game_view = game_view
-        self.background_texture = arcade.load_texture("ddd.png")
+        self.background_texture = asset_manager.get_texture("ddd.png")
+        center_x = self.window.width / 2
+        center_y = self.window.height / 2
+        texts = self.text_layer = TextLayer()
+        texts.add("title", "Пауза", center_x, center_y + 100, arcade.color.WHITE,
+                  font_size=40, anchor_x="center")
+        texts.add("difficulty", "Сложность: " + game_view.difficulty_name, center_x, center_y + 50,
+                  game_view.difficulty_color, font_size=30, anchor_x="center")
+        texts.add("score", f"Очки: {game_view.score}", center_x, center_y, arcade.color.WHITE,
+                  font_size=30, anchor_x="center")
+        texts.add("high_score", f"Лучший счет: {game_view.db_manager.get_high_score(game_view.difficulty_id)}",
+                  center_x, center_y - 50, arcade.color.LIGHT_BLUE, font_size=25, anchor_x="center")
+        texts.add("help_continue", "Нажми SPACE, чтобы продолжить", center_x, center_y - 180,
+                  arcade.color.WHITE, font_size=20, anchor_x="center")
+        texts.add("help_menu", "M чтобы выйти в главное меню", center_x, center_y - 100,
+                  arcade.color.WHITE, font_size=20, anchor_x="center")
+        texts.warm("difficulty", ["Сложность: " + name for name in DIFFICULTY_NAMES.values()])
+
+    def enter(self):
+        game_view = self.game_view
+        self.text_layer.set_text("difficulty", "Сложность: " + game_view.difficulty_name)
+        self.text_layer.set_color("difficulty", game_view.difficulty_color)
+
+    def exit(self):
+        pass
 
     def on_draw(self):
         self.clear()
+        game_view = self.game_view
         arcade.draw_texture_rect(self.background_texture,
                                  arcade.rect.XYWH(self.width // 2, self.height // 2, self.width, self.height))
-        arcade.draw_text("Пауза",
-                         self.window.width / 2,
-                         self.window.height / 2 + 100,
-                         arcade.color.WHITE,
-                         font_size=40,
-                         anchor_x="center")
-        arcade.draw_text("Сложность: " + self.game_view.difficulty_name,
-                         self.window.width / 2,
-                         self.window.height / 2 + 50,
-                         self.game_view.difficulty_color,
-                         font_size=30,
-                         anchor_x="center")
-        arcade.draw_text(f"Очки: {self.game_view.score}",
-                         self.window.width / 2,
-                         self.window.height / 2,
-                         arcade.color.WHITE,
-                         font_size=30,
-                         anchor_x="center")
-        arcade.draw_text(f"Лучший счет: {self.game_view.db_manager.get_high_score(self.game_view.difficulty_id)}",
-                         self.window.width / 2,
-                         self.window.height / 2 - 50,
-                         arcade.color.LIGHT_BLUE,
-                         font_size=25,
-                         anchor_x="center")
-        arcade.draw_text("Нажми SPACE, чтобы продолжить",
-                         self.window.width / 2,
-                         self.window.height / 2 - 180,
-                         arcade.color.WHITE,
-                         font_size=20,
-                         anchor_x="center")
-        arcade.draw_text("M чтобы выйти в главное меню",
-                         self.window.width / 2,
-                         self.window.height / 2 - 100,
-                         arcade.color.WHITE,
-                         font_size=20,
-                         anchor_x="center")
+        self.text_layer.set_text("score", f"Очки: {game_view.score}")
+        self.text_layer.set_text("high_score",
+                                 f"Лучший счет: {game_view.db_manager.get_high_score(game_view.difficulty_id)}")
+        self.text_layer.draw()
 
     def on_key_press(self, key, modifiers):
         if key == arcade.key.SPACE:
-            self.window.show_view(self.game_view)
+            self.window.views.show("game", resume=True)
         elif key == arcade.key.M:
-            menu_view = MenuView()
-            self.window.show_view(menu_view)
+            self.game_view.end_run()
+            self.window.views.show("menu")
 
 
 class Player(arcade.Sprite):
     def __init__(self):
-        super().__init__("41.png")
+        super().__init__(asset_manager.get_texture("41.png"))
         self.scale = 0.5
         self.center_x = 100
         self.center_y = SCREEN_HEIGHT // 2
         self.angle = 90
-        self.shoot_timer = 0
-        self.hits = 0
-        self.invulnerable = False
-        self.invulnerable_timer = 0
-        self.hit_animation_timer = 0
-        self.visible = True
 
 
 class Meteorite(arcade.Sprite):
-    def __init__(self, speed_multiplier=1.0, max_hits=3):
-        super().__init__('meteorite.png', METEORITE_SCALE)
+    def __init__(self):
+        super().__init__(asset_manager.get_texture('meteorite.png'), METEORITE_SCALE)
         self.center_x = SCREEN_WIDTH + 50
-        self.center_y = random.randint(50, SCREEN_HEIGHT - 50)
-        self.change_x = -DEFAULT_METEORITE_SPEED * speed_multiplier
-        self.change_y = 0
-        self.angle = 0
-        self.change_angle = 0
-        self.hits = 0
-        self.max_hits = max_hits
-        self.hit_animation_timer = 0
+        self.center_y = SCREEN_HEIGHT // 2
         self.color = arcade.color.WHITE
 
-    def update(self, delta_time: float = 1 / 60):
-        super().update()
-        if self.hit_animation_timer > 0:
-            self.hit_animation_timer -= delta_time
-
 
 class Bullet(arcade.Sprite):
-    def __init__(self, x, y, speed_multiplier=1.0):
+    def __init__(self):
         super().__init__()
-        self.texture = arcade.make_soft_square_texture(20, arcade.color.RED, 255, 255)
+        self.texture = asset_manager.bullet_texture()
         self.scale = 0.1
         self.width = 50
         self.height = 3
-        self.center_x = x + 30
-        self.center_y = y
-        self.angle = 0
-        self.change_x = DEFAULT_BULLET_SPEED * speed_multiplier
-        self.change_y = 0
-        self.lifetime = BULLET_LIFETIME
-        self.hit_meteorites = []
 
-    def update(self, delta_time: float = 1 / 60):
-        super().update()
 
+class HitShape:
+    def __init__(self, radius, points):
+        self.points = [tuple(point) for point in points]
+        self.radius = radius
+        self.left = min(x for x, _ in self.points)
+        self.right = max(x for x, _ in self.points)
+        self.bottom = min(y for _, y in self.points)
+        self.top = max(y for _, y in self.points)
+        self.width = self.right - self.left
+        self.height = self.top - self.bottom
 
-class GameView(arcade.View):
-    def __init__(self, difficulty_id, difficulty_name, db_manager):
-        super().__init__()
-        self.difficulty_id = difficulty_id
-        self.difficulty_name = difficulty_name
-        self.db_manager = db_manager
-        self.is_new_record = False
-        self.new_record_timer = 0.0
-        if difficulty_id == DIFFICULTY_EASY:
-            self.difficulty_color = arcade.color.GREEN
-            self.base_meteorite_speed_multiplier = 1.0
-            self.meteorite_frequency_multiplier = 2.0
-            self.bullet_speed_multiplier = 1.0
-            self.bullet_frequency_multiplier = 1.0
-            self.meteorite_max_hits = 3
-        elif difficulty_id == DIFFICULTY_MEDIUM:
-            self.difficulty_color = arcade.color.YELLOW
-            self.base_meteorite_speed_multiplier = 1.5
-            self.meteorite_frequency_multiplier = 3.0
-            self.bullet_speed_multiplier = 2.0
-            self.bullet_frequency_multiplier = 2.0
-            self.meteorite_max_hits = 3
-        else:
-            self.difficulty_color = arcade.color.RED
-            self.base_meteorite_speed_multiplier = 2.0
-            self.meteorite_frequency_multiplier = 4.0
-            self.bullet_speed_multiplier = 4.0
-            self.bullet_frequency_multiplier = 4.0
-            self.meteorite_max_hits = 5
-        self.speed_bonus = 0.0
-        self.current_meteorite_speed_multiplier = self.base_meteorite_speed_multiplier
-        self.last_bonus_score = 0
-        self.meteorite_spawn_rate = BASE_METEORITE_SPAWN_RATE / self.meteorite_frequency_multiplier
-        self.background_texture = arcade.load_texture("ddd.png")
-        self.player = Player()
-        self.player_list = arcade.SpriteList()
-        self.player_list.append(self.player)
-        self.meteorite_list = arcade.SpriteList()
-        self.bullet_list = arcade.SpriteList()
-        self.particle_list = arcade.SpriteList()
-        self.left_pressed = False
-        self.right_pressed = False
-        self.up_pressed = False
-        self.down_pressed = False
-        self.meteorite_timer = 0
-        self.total_time = 0
-        self.player_health = PLAYER_MAX_HITS
-        self.score = 0
+    @classmethod
+    def from_sprite(cls, sprite):
+        return cls(max(sprite.width, sprite.height), [(x - sprite.center_x, y - sprite.center_y)
+                                                      for x, y in sprite.hit_box.get_adjusted_points()])
 
-    def create_explosion_particles(self, x, y):
-        for _ in range(PARTICLE_COUNT):
-            particle = Particle(x, y)
-            self.particle_list.append(particle)
 
-    def on_draw(self):
-        self.clear()
-        arcade.draw_texture_rect(self.background_texture,
-                                 arcade.rect.XYWH(self.width // 2, self.height // 2, self.width, self.height))
-        if self.player.visible:
-            self.player_list.draw()
-        self.meteorite_list.draw()
-        self.bullet_list.draw()
-        self.particle_list.draw()
-
-        arcade.draw_text(f"Здоровье: {self.player_health}/{PLAYER_MAX_HITS}",
-                         10, SCREEN_HEIGHT - 40, arcade.color.WHITE, 24)
-        arcade.draw_text(f"Счет: {self.score}",
-                         10, SCREEN_HEIGHT - 80, arcade.color.WHITE, 24)
-        arcade.draw_text(f"Сложность: {self.difficulty_name}",
-                         10, SCREEN_HEIGHT - 120, self.difficulty_color, 24)
-        arcade.draw_text(f"Попаданий для метеорита: {self.meteorite_max_hits}",
-                         10, SCREEN_HEIGHT - 160, self.difficulty_color, 20)
-        high_score = self.db_manager.get_high_score(self.difficulty_id)
-        arcade.draw_text(f"Лучший счет: {high_score}",
-                         SCREEN_WIDTH - 300, SCREEN_HEIGHT - 40, arcade.color.GOLD, 22)
-        if self.is_new_record and self.new_record_timer > 0:
-            alpha = int(255 * (self.new_record_timer / NEW_RECORD_DISPLAY_TIME))
-            alpha = max(0, min(255, alpha))
-            color_with_alpha = (arcade.color.GOLD[0], arcade.color.GOLD[1], arcade.color.GOLD[2], alpha)
-            arcade.draw_text("НОВЫЙ РЕКОРД!",
-                             SCREEN_WIDTH // 2,
-                             SCREEN_HEIGHT // 2,
-                             color_with_alpha,
-                             font_size=60,
-                             anchor_x="center",
-                             bold=True)
+HIT_SHAPES = {}
 
-    def update_speed_bonus(self):
-        bonus_count = self.score // SCORE_SPEED_BONUS_THRESHOLD
-        new_bonus = min(bonus_count * 0.1, MAX_SPEED_BONUS)
-        if new_bonus != self.speed_bonus:
-            self.speed_bonus = new_bonus
-            self.last_bonus_score = self.score - (self.score % SCORE_SPEED_BONUS_THRESHOLD)
-            self.current_meteorite_speed_multiplier = self.base_meteorite_speed_multiplier + self.speed_bonus
 
-    def on_update(self, delta_time):
-        self.total_time += delta_time
-        self.meteorite_timer += delta_time
-        if self.is_new_record and self.new_record_timer > 0:
-            self.new_record_timer -= delta_time
-            if self.new_record_timer <= 0:
-                self.new_record_timer = 0
-        self.update_speed_bonus()
-        shoot_interval = 1.0 / self.bullet_frequency_multiplier
-        self.player.shoot_timer += delta_time
-        if not self.is_new_record:
-            high_score = self.db_manager.get_high_score(self.difficulty_id)
-            if self.score > high_score:
-                self.is_new_record = True
-                self.new_record_timer = NEW_RECORD_DISPLAY_TIME
-                self.db_manager.save_score(self.difficulty_id, self.score)
-        if self.player.invulnerable:
-            self.player.invulnerable_timer += delta_time
-            self.player.hit_animation_timer += delta_time
-            if self.player.hit_animation_timer >= 0.1:
-                self.player.visible = not self.player.visible
-                self.player.hit_animation_timer = 0
-            if self.player.invulnerable_timer >= 2.0:
-                self.player.invulnerable = False
-                self.player.invulnerable_timer = 0
-                self.player.hit_animation_timer = 0
-                self.player.visible = True
-        self.player.change_x = 0
-        self.player.change_y = 0
-        if self.left_pressed:
-            self.player.change_x = -PLAYER_MOVEMENT_SPEED
-        if self.right_pressed:
-            self.player.change_x = PLAYER_MOVEMENT_SPEED
-        if self.up_pressed:
-            self.player.change_y = PLAYER_MOVEMENT_SPEED
-        if self.down_pressed:
-            self.player.change_y = -PLAYER_MOVEMENT_SPEED
-        self.player_list.update()
-        if self.player.left < 0:
-            self.player.left = 0
-        elif self.player.right > SCREEN_WIDTH // 2:
-            self.player.right = SCREEN_WIDTH // 2
-        if self.player.bottom < 0:
-            self.player.bottom = 0
-        elif self.player.top > SCREEN_HEIGHT - 1:
-            self.player.top = SCREEN_HEIGHT - 1
-        if self.meteorite_timer >= self.meteorite_spawn_rate:
-            meteorite = Meteorite(self.current_meteorite_speed_multiplier, self.meteorite_max_hits)
-            self.meteorite_list.append(meteorite)
-            self.meteorite_timer = 0
-        for meteorite in self.meteorite_list:
-            if meteorite.hit_animation_timer > 0:
-                if int(meteorite.hit_animation_timer * 10) % 2 == 0:
-                    meteorite.color = arcade.color.RED
-                else:
-                    meteorite.color = arcade.color.WHITE
-            else:
-                meteorite.color = arcade.color.WHITE
-        self.meteorite_list.update(delta_time)
-        if self.player.shoot_timer >= shoot_interval:
-            self.shoot()
-            self.player.shoot_timer = 0
-        for bullet in self.bullet_list:
-            bullet.lifetime -= delta_time
-            if bullet.lifetime <= 0:
-                bullet.remove_from_sprite_lists()
-        self.bullet_list.update(delta_time)
-        self.particle_list.update(delta_time)
-        destroyed_meteorites = []
-        for bullet in self.bullet_list:
-            hit_list = arcade.check_for_collision_with_list(bullet, self.meteorite_list)
-            for meteorite in hit_list:
-                if meteorite not in bullet.hit_meteorites:
-                    bullet.hit_meteorites.append(meteorite)
-                    meteorite.hits += 1
-                    meteorite.hit_animation_timer = 0.5
-                    if meteorite.hits >= meteorite.max_hits:
-                        destroyed_meteorites.append((meteorite.center_x, meteorite.center_y))
-                        meteorite.remove_from_sprite_lists()
-                        self.score += 10
-                    else:
-                        bullet.center_x += bullet.change_x * 2
-                        bullet.center_y += bullet.change_y * 2
-        for x, y in destroyed_meteorites:
-            self.create_explosion_particles(x, y)
-        if not self.player.invulnerable:
-            player_hit_list = arcade.check_for_collision_with_list(self.player, self.meteorite_list)
-            if player_hit_list:
-                self.player_hit()
-        for meteorite in self.meteorite_list:
-            if meteorite.center_x < -100:
-                meteorite.remove_from_sprite_lists()
-        for bullet in self.bullet_list:
-            if bullet.center_x > SCREEN_WIDTH + 100:
-                bullet.remove_from_sprite_lists()
+def get_hit_shape(kind):
+    shape = HIT_SHAPES.get(kind)
+    if shape is None:
+        shape = HIT_SHAPES[kind] = HitShape(*HIT_SHAPES_DATA[kind])
+    return shape
 
-    def shoot(self):
-        bullet = Bullet(self.player.center_x, self.player.center_y, self.bullet_speed_multiplier)
-        self.bullet_list.append(bullet)
 
-    def player_hit(self):
-        self.player_health -= 1
-        self.player.hits += 1
-        self.player.invulnerable = True
-        self.player.invulnerable_timer = 0
+def shapes_collide(first_shape, first_x, first_y, second_shape, second_x, second_y):
+    radius_sum = (first_shape.radius + second_shape.radius) * 0.71
+    radius_sum_sq = radius_sum * radius_sum
+    diff_x = first_x - second_x
+    diff_x_sq = diff_x * diff_x
+    if diff_x_sq > radius_sum_sq:
+        return False
+    diff_y = first_y - second_y
+    diff_y_sq = diff_y * diff_y
+    if diff_y_sq > radius_sum_sq or diff_x_sq + diff_y_sq > radius_sum_sq:
+        return False
+    return arcade.geometry.are_polygons_intersecting(
+        [(first_x + x, first_y + y) for x, y in first_shape.points],
+        [(second_x + x, second_y + y) for x, y in second_shape.points])
+
+
+def shapes_sweep_collide(first_shape, first_start, first_end, second_shape, second_start, second_end):
+    offset_x = first_start[0] - second_start[0]
+    offset_y = first_start[1] - second_start[1]
+    move_x = (first_end[0] - first_start[0]) - (second_end[0] - second_start[0])
+    move_y = (first_end[1] - first_start[1]) - (second_end[1] - second_start[1])
+    enter = 0.0
+    leave = 1.0
+    for offset, move, low, high in ((offset_x, move_x, second_shape.left - first_shape.right,
+                                     second_shape.right - first_shape.left),
+                                    (offset_y, move_y, second_shape.bottom - first_shape.top,
+                                     second_shape.top - first_shape.bottom)):
+        if move == 0:
+            if offset < low or offset > high:
+                return False
+            continue
+        low_time = (low - offset) / move
+        high_time = (high - offset) / move
+        if low_time > high_time:
+            low_time, high_time = high_time, low_time
+        enter = max(enter, low_time)
+        leave = min(leave, high_time)
+        if enter > leave:
+            return False
+    distance = math.hypot(move_x, move_y)
+    samples = 1
+    if distance:
+        along_x = abs(move_x) / distance
+        along_y = abs(move_y) / distance
+        step = min(first_shape.width * along_x + first_shape.height * along_y,
+                   second_shape.width * along_x + second_shape.height * along_y) / 2
+        samples = int(distance * (leave - enter) / step) + 1
+    for sample in range(samples + 1):
+        time_of_impact = enter + (leave - enter) * sample / samples
+        if shapes_collide(first_shape, offset_x + move_x * time_of_impact, offset_y + move_y * time_of_impact,
+                          second_shape, 0.0, 0.0):
+            return True
+    return False
+
+
+class Entity:
+    shape_kind = None
+
+    def __init__(self, entity_id, center_x, center_y):
+        self.entity_id = entity_id
+        self.shape = get_hit_shape(self.shape_kind)
+        self.center_x = center_x
+        self.center_y = center_y
+        self.prev_center_x = center_x
+        self.prev_center_y = center_y
+        self.change_x = 0
+        self.change_y = 0
+
+    @property
+    def left(self):
+        return self.center_x + self.shape.left
+
+    @left.setter
+    def left(self, value):
+        self.center_x = value - self.shape.left
+
+    @property
+    def right(self):
+        return self.center_x + self.shape.right
+
+    @right.setter
+    def right(self, value):
+        self.center_x = value - self.shape.right
+
+    @property
+    def bottom(self):
+        return self.center_y + self.shape.bottom
+
+    @bottom.setter
+    def bottom(self, value):
+        self.center_y = value - self.shape.bottom
+
+    @property
+    def top(self):
+        return self.center_y + self.shape.top
+
+    @top.setter
+    def top(self, value):
+        self.center_y = value - self.shape.top
+
+    def move(self, delta_time):
+        self.prev_center_x = self.center_x
+        self.prev_center_y = self.center_y
+        self.center_x += self.change_x * delta_time
+        self.center_y += self.change_y * delta_time
+
+    def interpolated(self, alpha):
+        return (self.prev_center_x + (self.center_x - self.prev_center_x) * alpha,
+                self.prev_center_y + (self.center_y - self.prev_center_y) * alpha)
+
+
+class PlayerState(Entity):
+    shape_kind = "player"
+
+    def __init__(self, entity_id):
+        super().__init__(entity_id, 100, SCREEN_HEIGHT // 2)
+        self.hits = 0
+        self.invulnerable = False
+        self.invulnerable_end = None
+        self.blink_timer = None
+        self.visible = True
+
+
+class EntityStore:
+    fields = (
+        ("ids", np.int64),
+        ("x", np.float64),
+        ("y", np.float64),
+        ("prev_x", np.float64),
+        ("prev_y", np.float64),
+        ("change_x", np.float64),
+        ("change_y", np.float64),
+        ("hits", np.int32),
+        ("max_hits", np.int32),
+    )
+    record = np.dtype([(name, np.dtype(dtype).newbyteorder("<")) for name, dtype in fields])
+
+    def __init__(self, shape_kind, capacity=ENTITY_STORE_CAPACITY):
+        self.shape = get_hit_shape(shape_kind)
+        self.count = 0
+        self.capacity = 0
+        self.allocate(capacity)
+
+    def allocate(self, capacity):
+        for name, dtype in self.fields:
+            array = np.zeros(capacity, dtype=dtype)
+            if self.count:
+                array[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name, _ in self.fields)
+
+    def add(self, entity_id, x, y, change_x, change_y=0.0, max_hits=0):
+        index = self.count
+        if index == self.capacity:
+            self.allocate(self.capacity * 2)
+        self.ids[index] = entity_id
+        self.x[index] = x
+        self.y[index] = y
+        self.prev_x[index] = x
+        self.prev_y[index] = y
+        self.change_x[index] = change_x
+        self.change_y[index] = change_y
+        self.hits[index] = 0
+        self.max_hits[index] = max_hits
+        self.count = index + 1
+        return index
+
+    def move(self, delta_time):
+        count = self.count
+        self.prev_x[:count] = self.x[:count]
+        self.prev_y[:count] = self.y[:count]
+        self.x[:count] += self.change_x[:count] * delta_time
+        self.y[:count] += self.change_y[:count] * delta_time
+
+    def interpolated(self, alpha):
+        count = self.count
+        if alpha >= 1.0:
+            return self.x[:count], self.y[:count]
+        prev_x = self.prev_x[:count]
+        prev_y = self.prev_y[:count]
+        return prev_x + (self.x[:count] - prev_x) * alpha, prev_y + (self.y[:count] - prev_y) * alpha
+
+    def compact(self, keep):
+        count = int(np.count_nonzero(keep))
+        if count == self.count:
+            return []
+        removed = self.ids[:self.count][~keep].tolist()
+        for name, _ in self.fields:
+            array = getattr(self, name)
+            array[:count] = array[:self.count][keep]
+        self.count = count
+        return removed
+
+    def clear(self):
+        self.count = 0
+
+    def bounds(self):
+        count = self.count
+        shape = self.shape
+        x = self.x[:count]
+        y = self.y[:count]
+        return x + shape.left, y + shape.bottom, x + shape.right, y + shape.top
+
+    def swept_bounds(self):
+        count = self.count
+        shape = self.shape
+        x = self.x[:count]
+        y = self.y[:count]
+        prev_x = self.prev_x[:count]
+        prev_y = self.prev_y[:count]
+        return (np.minimum(x, prev_x) + shape.left, np.minimum(y, prev_y) + shape.bottom,
+                np.maximum(x, prev_x) + shape.right, np.maximum(y, prev_y) + shape.top)
+
+    def index_map(self):
+        return {entity_id: index for index, entity_id in enumerate(self.ids[:self.count].tolist())}
+
+    def records(self):
+        records = np.empty(self.count, dtype=self.record)
+        for name, _ in self.fields:
+            records[name] = getattr(self, name)[:self.count]
+        return records
+
+    def load_records(self, records):
+        count = len(records)
+        self.count = 0
+        if count > self.capacity:
+            self.allocate(max(count, self.capacity * 2))
+        for name, _ in self.fields:
+            getattr(self, name)[:count] = records[name]
+        self.count = count
+
+
+class FixedTimestep:
+    def __init__(self, rate=SIM_TICK_RATE, max_steps=MAX_SIM_STEPS_PER_FRAME):
+        self.rate = rate
+        self.step = 1.0 / rate
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.last_steps = 0
+        self.total_steps = 0
+        self.dropped_time = 0.0
+
+    @property
+    def alpha(self):
+        return min(self.accumulator * self.rate, 1.0)
+
+    def advance(self, frame_time):
+        self.accumulator += frame_time
+        steps = int(self.accumulator * self.rate + 1e-9)
+        if steps > self.max_steps:
+            self.dropped_time += self.accumulator - self.max_steps * self.step
+            self.accumulator = self.max_steps * self.step
+            steps = self.max_steps
+        self.accumulator = max(self.accumulator - steps * self.step, 0.0)
+        self.last_steps = steps
+        self.total_steps += steps
+        return steps
+
+    def set_rate(self, rate):
+        self.rate = rate
+        self.step = 1.0 / rate
+
+    def reset(self):
+        self.accumulator = 0.0
+        self.last_steps = 0
+        self.total_steps = 0
+        self.dropped_time = 0.0
+
+
+class Scheduler:
+    def __init__(self):
+        self.queue = []
+        self.next_seq = 0
+        self.pending = 0
+        self.fired = 0
+        self.cancelled = 0
+
+    def __len__(self):
+        return self.pending
+
+    def push(self, due, seq, kind, payload=0):
+        entry = [due, seq, kind, payload, True]
+        heapq.heappush(self.queue, entry)
+        self.pending += 1
+        return entry
+
+    def schedule(self, due, kind, payload=0):
+        self.next_seq += 1
+        return self.push(due, self.next_seq, kind, payload)
+
+    def cancel(self, entry):
+        if entry is not None and entry[4]:
+            entry[4] = False
+            self.pending -= 1
+            self.cancelled += 1
+
+    def due(self, now):
+        queue = self.queue
+        limit = now + TIMER_EPSILON
+        while queue and queue[0][0] <= limit:
+            entry = heapq.heappop(queue)
+            if entry[4]:
+                entry[4] = False
+                self.pending -= 1
+                self.fired += 1
+                yield entry
+
+    def entries(self):
+        return sorted(entry for entry in self.queue if entry[4])
+
+    def clear(self):
+        self.queue.clear()
+        self.pending = 0
+
+
+class GameSimulation:
+    def __init__(self, difficulty_id, seed=None, high_score=0, profiler=None, collision_mode=COLLISION_SWEPT,
+                 settings=None):
+        self.difficulty_id = difficulty_id
+        self.collision_mode = collision_mode
+        self.profiler = profiler if profiler is not None else FrameProfiler()
+        self.seed = seed
+        self.high_score = high_score
+        self.speed_bonus_threshold = SCORE_SPEED_BONUS_THRESHOLD
+        self.speed_bonus_step = SPEED_BONUS_STEP
+        self.max_speed_bonus = MAX_SPEED_BONUS
+        for name, value in DIFFICULTY_SETTINGS.get(difficulty_id, DIFFICULTY_SETTINGS[DIFFICULTY_HARD]).items():
+            setattr(self, name, value)
+        for name, value in (settings or {}).items():
+            if not hasattr(self, name):
+                raise ValueError(f"unknown difficulty setting: {name}")
+            setattr(self, name, value)
+        self.meteorite_spawn_rate = BASE_METEORITE_SPAWN_RATE / self.meteorite_frequency_multiplier
+        self.next_entity_id = 0
+        self.player = PlayerState(self.new_entity_id())
+        self.meteorites = EntityStore("meteorite")
+        self.bullets = EntityStore("bullet")
+        self.bullet_hits = {}
+        self.bullet_timers = {}
+        self.flash_timers = {}
+        self.meteorite_grid = SpatialHash()
+        self.scheduler = Scheduler()
+        self.events = []
+        self.reset()
+
+    def new_entity_id(self):
+        self.next_entity_id += 1
+        return self.next_entity_id
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.seed = seed
+        self.rng = random.Random(self.seed)
+        self.tick = 0
+        self.total_time = 0
+        self.player_health = PLAYER_MAX_HITS
+        self.score = 0
+        self.kills = 0
+        self.shots_fired = 0
+        self.hits_landed = 0
+        self.speed_bonus = 0.0
+        self.current_meteorite_speed_multiplier = self.base_meteorite_speed_multiplier
+        self.last_bonus_score = 0
+        self.is_new_record = False
+        self.new_record_until = 0.0
+        self.is_game_over = False
+        self.player.center_x = self.player.prev_center_x = 100
+        self.player.center_y = self.player.prev_center_y = SCREEN_HEIGHT // 2
+        self.player.hits = 0
+        self.player.invulnerable = False
+        self.player.invulnerable_end = None
+        self.player.blink_timer = None
+        self.player.visible = True
+        self.meteorites.clear()
+        self.bullets.clear()
+        self.bullet_hits.clear()
+        self.bullet_timers.clear()
+        self.flash_timers.clear()
+        self.meteorite_grid.clear()
+        self.scheduler.clear()
+        self.tick_start = 0.0
+        self.spawn_timer = self.scheduler.schedule(self.meteorite_spawn_rate, TIMER_SPAWN)
+        self.shot_timer = self.scheduler.schedule(1.0 / self.bullet_frequency_multiplier, TIMER_SHOT)
+
+    @property
+    def new_record_timer(self):
+        if not self.is_new_record:
+            return 0.0
+        return max(self.new_record_until - self.total_time, 0.0)
+
+    def flashing_ids(self):
+        now = self.total_time
+        return [entity_id for entity_id, entry in self.flash_timers.items()
+                if entry[0] > now and int((entry[0] - now) * 10) % 2 == 0]
+
+    def link_timer(self, entry):
+        kind = entry[2]
+        if kind == TIMER_SPAWN:
+            self.spawn_timer = entry
+        elif kind == TIMER_SHOT:
+            self.shot_timer = entry
+        elif kind == TIMER_INVULNERABLE_END:
+            self.player.invulnerable_end = entry
+        elif kind == TIMER_BLINK:
+            self.player.blink_timer = entry
+        elif kind == TIMER_FLASH_END:
+            self.flash_timers[entry[3]] = entry
+        elif kind == TIMER_BULLET_EXPIRE:
+            self.bullet_timers[entry[3]] = entry
+
+    def update_speed_bonus(self):
+        bonus_count = self.score // self.speed_bonus_threshold
+        new_bonus = min(bonus_count * self.speed_bonus_step, self.max_speed_bonus)
+        if new_bonus != self.speed_bonus:
+            self.speed_bonus = new_bonus
+            self.last_bonus_score = self.score - (self.score % self.speed_bonus_threshold)
+            self.current_meteorite_speed_multiplier = self.base_meteorite_speed_multiplier + self.speed_bonus
+
+    def step(self, delta_time, inputs=0):
+        self.events = []
+        if self.is_game_over:
+            return self.events
+        profiler = self.profiler
+        mark = profiler.mark()
+        self.tick_start = self.total_time
+        self.tick += 1
+        self.total_time += delta_time
+        now = self.total_time
+        scheduler = self.scheduler
+        player = self.player
+        spawn_due = False
+        shot_due = False
+        expired = []
+        for entry in scheduler.due(now):
+            kind = entry[2]
+            if kind == TIMER_BULLET_EXPIRE:
+                del self.bullet_timers[entry[3]]
+                expired.append(entry[3])
+            elif kind == TIMER_FLASH_END:
+                del self.flash_timers[entry[3]]
+            elif kind == TIMER_SPAWN:
+                spawn_due = True
+            elif kind == TIMER_SHOT:
+                shot_due = True
+            elif kind == TIMER_BLINK:
+                player.visible = not player.visible
+                player.blink_timer = scheduler.schedule(now + PLAYER_BLINK_INTERVAL, TIMER_BLINK)
+            elif kind == TIMER_INVULNERABLE_END:
+                player.invulnerable = False
+                player.invulnerable_end = None
+                scheduler.cancel(player.blink_timer)
+                player.blink_timer = None
+                player.visible = True
+        self.update_speed_bonus()
+        if not self.is_new_record and self.score > self.high_score:
+            self.is_new_record = True
+            self.new_record_until = now + NEW_RECORD_DISPLAY_TIME
+            self.events.append((EVENT_NEW_RECORD, self.score))
+        player.change_x = 0
+        player.change_y = 0
+        if inputs & INPUT_LEFT:
+            player.change_x = -PLAYER_MOVEMENT_SPEED * REFERENCE_FRAME_RATE
+        if inputs & INPUT_RIGHT:
+            player.change_x = PLAYER_MOVEMENT_SPEED * REFERENCE_FRAME_RATE
+        if inputs & INPUT_UP:
+            player.change_y = PLAYER_MOVEMENT_SPEED * REFERENCE_FRAME_RATE
+        if inputs & INPUT_DOWN:
+            player.change_y = -PLAYER_MOVEMENT_SPEED * REFERENCE_FRAME_RATE
+        player.move(delta_time)
+        if player.left < 0:
+            player.left = 0
+        elif player.right > SCREEN_WIDTH // 2:
+            player.right = SCREEN_WIDTH // 2
+        if player.bottom < 0:
+            player.bottom = 0
+        elif player.top > SCREEN_HEIGHT - 1:
+            player.top = SCREEN_HEIGHT - 1
+        mark = profiler.lap("player", mark)
+        if spawn_due:
+            self.spawn_meteorite()
+            self.spawn_timer = scheduler.schedule(now + self.meteorite_spawn_rate, TIMER_SPAWN)
+        mark = profiler.lap("spawn", mark)
+        self.update_meteorites(delta_time)
+        mark = profiler.lap("meteorites", mark)
+        if shot_due:
+            self.shoot()
+            self.shot_timer = scheduler.schedule(now + 1.0 / self.bullet_frequency_multiplier, TIMER_SHOT)
+        self.update_bullets(delta_time, expired)
+        mark = profiler.lap("bullets", mark)
+        self.check_collisions()
+        mark = profiler.lap("collision", mark)
+        self.cleanup()
+        profiler.lap("cleanup", mark)
+        return self.events
+
+    def spawn_meteorite(self):
+        self.meteorites.add(self.new_entity_id(),
+                            SCREEN_WIDTH + 50,
+                            self.rng.randint(50, SCREEN_HEIGHT - 50),
+                            -DEFAULT_METEORITE_SPEED * self.current_meteorite_speed_multiplier * REFERENCE_FRAME_RATE,
+                            max_hits=self.meteorite_max_hits)
+
+    def shoot(self):
+        entity_id = self.new_entity_id()
+        self.bullets.add(entity_id,
+                         self.player.center_x + 30,
+                         self.player.center_y,
+                         DEFAULT_BULLET_SPEED * self.bullet_speed_multiplier * REFERENCE_FRAME_RATE)
+        self.bullet_timers[entity_id] = self.scheduler.schedule(self.tick_start + BULLET_LIFETIME,
+                                                                TIMER_BULLET_EXPIRE, entity_id)
+        self.shots_fired += 1
+
+    def update_meteorites(self, delta_time):
+        meteorites = self.meteorites
+        meteorites.move(delta_time)
+        grid = self.meteorite_grid
+        if self.collision_mode == COLLISION_SWEPT:
+            bounds = meteorites.swept_bounds()
+        else:
+            bounds = meteorites.bounds()
+        for entity_id, left, bottom, right, top in zip(meteorites.ids[:meteorites.count].tolist(),
+                                                       *(bound.tolist() for bound in bounds)):
+            grid.move(entity_id, left, bottom, right, top)
+
+    def update_bullets(self, delta_time, expired=()):
+        bullets = self.bullets
+        if expired:
+            keep = ~sorted_membership(bullets.ids[:bullets.count], np.sort(np.array(expired, dtype=np.int64)))
+            self.forget_bullets(bullets.compact(keep))
+        bullets.move(delta_time)
+
+    def forget_bullets(self, removed):
+        bullet_hits = self.bullet_hits
+        bullet_timers = self.bullet_timers
+        cancel = self.scheduler.cancel
+        for entity_id in removed:
+            bullet_hits.pop(entity_id, None)
+            cancel(bullet_timers.pop(entity_id, None))
+
+    def cleanup(self):
+        meteorites = self.meteorites
+        count = meteorites.count
+        keep = (meteorites.hits[:count] < meteorites.max_hits[:count]) & (meteorites.x[:count] >= -100)
+        grid = self.meteorite_grid
+        flash_timers = self.flash_timers
+        for entity_id in meteorites.compact(keep):
+            grid.remove(entity_id)
+            if flash_timers:
+                self.scheduler.cancel(flash_timers.pop(entity_id, None))
+        bullets = self.bullets
+        self.forget_bullets(bullets.compact(bullets.x[:bullets.count] <= SCREEN_WIDTH + 100))
+
+    def check_collisions(self):
+        grid = self.meteorite_grid
+        meteorites = self.meteorites
+        bullets = self.bullets
+        swept = self.collision_mode == COLLISION_SWEPT
+        if meteorites.count and bullets.count:
+            meteorite_index = meteorites.index_map()
+            meteorite_shape = meteorites.shape
+            bullet_shape = bullets.shape
+            bullet_hits = self.bullet_hits
+            if swept:
+                bullet_bounds = zip(*(bound.tolist() for bound in bullets.swept_bounds()))
+            else:
+                bullet_bounds = zip(*(bound.tolist() for bound in bullets.bounds()))
+            for index, (left, bottom, right, top) in enumerate(bullet_bounds):
+                bullet_x = bullets.x[index]
+                bullet_y = bullets.y[index]
+                for entity_id in grid.query(left, bottom, right, top):
+                    target = meteorite_index[entity_id]
+                    meteorite_x = meteorites.x[target]
+                    meteorite_y = meteorites.y[target]
+                    if swept:
+                        hit = shapes_sweep_collide(bullet_shape, (bullets.prev_x[index], bullets.prev_y[index]),
+                                                   (bullet_x, bullet_y), meteorite_shape,
+                                                   (meteorites.prev_x[target], meteorites.prev_y[target]),
+                                                   (meteorite_x, meteorite_y))
+                    else:
+                        hit = shapes_collide(bullet_shape, bullet_x, bullet_y,
+                                             meteorite_shape, meteorite_x, meteorite_y)
+                    if not hit:
+                        continue
+                    hit_set = bullet_hits.get(bullets.ids[index])
+                    if hit_set is None:
+                        hit_set = bullet_hits[int(bullets.ids[index])] = set()
+                    if entity_id in hit_set:
+                        continue
+                    hit_set.add(entity_id)
+                    self.hits_landed += 1
+                    meteorites.hits[target] += 1
+                    self.scheduler.cancel(self.flash_timers.get(entity_id))
+                    self.flash_timers[entity_id] = self.scheduler.schedule(self.total_time + METEORITE_FLASH_TIME,
+                                                                           TIMER_FLASH_END, entity_id)
+                    if meteorites.hits[target] >= meteorites.max_hits[target]:
+                        self.events.append((EVENT_METEORITE_DESTROYED, float(meteorite_x), float(meteorite_y)))
+                        grid.remove(entity_id)
+                        self.score += 10
+                        self.kills += 1
+        player = self.player
+        if not player.invulnerable and meteorites.count:
+            meteorite_index = meteorites.index_map()
+            if swept:
+                candidates = grid.query(min(player.prev_center_x, player.center_x) + player.shape.left,
+                                        min(player.prev_center_y, player.center_y) + player.shape.bottom,
+                                        max(player.prev_center_x, player.center_x) + player.shape.right,
+                                        max(player.prev_center_y, player.center_y) + player.shape.top)
+            else:
+                candidates = grid.query(player.left, player.bottom, player.right, player.top)
+            for entity_id in candidates:
+                target = meteorite_index[entity_id]
+                if swept:
+                    hit = shapes_sweep_collide(player.shape, (player.prev_center_x, player.prev_center_y),
+                                               (player.center_x, player.center_y), meteorites.shape,
+                                               (meteorites.prev_x[target], meteorites.prev_y[target]),
+                                               (meteorites.x[target], meteorites.y[target]))
+                else:
+                    hit = shapes_collide(player.shape, player.center_x, player.center_y,
+                                         meteorites.shape, meteorites.x[target], meteorites.y[target])
+                if hit:
+                    self.player_hit()
+                    break
+
+    def player_hit(self):
+        self.player_health -= 1
+        self.player.hits += 1
+        self.player.invulnerable = True
+        self.player.invulnerable_end = self.scheduler.schedule(self.total_time + PLAYER_INVULNERABLE_TIME,
+                                                               TIMER_INVULNERABLE_END)
+        self.player.blink_timer = self.scheduler.schedule(self.total_time + PLAYER_BLINK_INTERVAL, TIMER_BLINK)
+        self.events.append((EVENT_PLAYER_HIT, self.player_health))
         if self.player_health <= 0:
-            self.game_over()
+            self.is_game_over = True
+            self.events.append((EVENT_GAME_OVER, self.score))
+
+
+def prune_recordings(directory=RECORDINGS_DIR, keep=RECORDINGS_RETENTION):
+    paths = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".dfr")]
+    if len(paths) <= keep:
+        return 0
+    paths.sort(key=os.path.getmtime)
+    removed = 0
+    for path in paths[:len(paths) - keep]:
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+class InputRecorder:
+    def __init__(self, seed, difficulty_id, sim_rate=SIM_TICK_RATE, collision_mode=COLLISION_SWEPT):
+        self.seed = seed
+        self.difficulty_id = difficulty_id
+        self.sim_rate = sim_rate
+        self.collision_mode = collision_mode
+        self.runs = []
+
+    def __len__(self):
+        return sum(length for _, length in self.runs)
+
+    def record(self, inputs):
+        runs = self.runs
+        if runs and runs[-1][0] == inputs and runs[-1][1] < 0xFFFF:
+            runs[-1][1] += 1
+        else:
+            runs.append([inputs, 1])
+
+    def save(self, path, sim):
+        summary = (sim.tick, sim.score, sim.kills, sim.hits_landed, sim.shots_fired, sim.player_health)
+        with open(path, "wb") as file:
+            file.write(RECORDING_HEADER.pack(RECORDING_MAGIC, RECORDING_VERSION, self.seed, self.sim_rate,
+                                             DIFFICULTIES.index(self.difficulty_id),
+                                             COLLISION_MODES.index(self.collision_mode)))
+            file.write(RECORDING_SUMMARY.pack(*summary))
+            file.write(RECORDING_RUN_COUNT.pack(len(self.runs)))
+            file.write(b"".join(RECORDING_RUN.pack(inputs, length) for inputs, length in self.runs))
+
+
+class Recording:
+    def __init__(self, seed, difficulty_id, sim_rate, collision_mode, summary, inputs):
+        self.seed = seed
+        self.difficulty_id = difficulty_id
+        self.sim_rate = sim_rate
+        self.collision_mode = collision_mode
+        self.summary = summary
+        self.inputs = inputs
+
+    def __len__(self):
+        return len(self.inputs)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as file:
+            data = file.read()
+        magic, version, seed, sim_rate, difficulty, collision = RECORDING_HEADER.unpack_from(data)
+        if magic != RECORDING_MAGIC or version != RECORDING_VERSION:
+            raise ValueError(f"{path}: not a version {RECORDING_VERSION} recording")
+        offset = RECORDING_HEADER.size
+        summary = dict(zip(RECORDING_SUMMARY_FIELDS, RECORDING_SUMMARY.unpack_from(data, offset)))
+        offset += RECORDING_SUMMARY.size
+        run_count, = RECORDING_RUN_COUNT.unpack_from(data, offset)
+        offset += RECORDING_RUN_COUNT.size
+        runs = np.frombuffer(data, dtype=RECORDING_RUN_RECORD, count=run_count, offset=offset)
+        inputs = np.repeat(runs["inputs"], runs["length"])
+        return cls(seed, DIFFICULTIES[difficulty], sim_rate, COLLISION_MODES[collision], summary, inputs)
+
+
+class ReplaySession:
+    def __init__(self, recording, profiler=None):
+        self.recording = recording
+        self.profiler = profiler
+        self.inputs = recording.inputs.tolist()
+        self.sim = None
+        self.restart()
+
+    def restart(self):
+        recording = self.recording
+        self.sim = GameSimulation(recording.difficulty_id, recording.seed, profiler=self.profiler,
+                                  collision_mode=recording.collision_mode)
+
+    def seek(self, tick):
+        tick = min(tick, len(self.inputs))
+        if tick < self.sim.tick:
+            self.restart()
+        sim = self.sim
+        step = 1 / self.recording.sim_rate
+        inputs = self.inputs
+        profiler = self.profiler
+        while sim.tick < tick and not sim.is_game_over:
+            sim.step(step, inputs[sim.tick])
+            if profiler is not None:
+                profiler.end_frame(meteorites=len(sim.meteorites), bullets=len(sim.bullets))
+        return sim
+
+    def run(self):
+        return self.seek(len(self.inputs))
+
+    def mismatches(self):
+        sim = self.sim
+        actual = (sim.tick, sim.score, sim.kills, sim.hits_landed, sim.shots_fired, sim.player_health)
+        return {field: (expected, value) for (field, expected), value
+                in zip(self.recording.summary.items(), actual) if expected != value}
+
+
+class ServerSession:
+    def __init__(self, session_id, difficulty_id, seed):
+        self.session_id = session_id
+        self.sim = GameSimulation(difficulty_id, seed)
+        self.inputs = asyncio.Queue(SERVER_INPUT_QUEUE_SIZE)
+        self.current_input = 0
+        self.pending_ticks = 0
+        self.latencies = np.zeros(SERVER_LATENCY_HISTORY, dtype=np.float64)
+        self.latency_count = 0
+        self.ticks = 0
+        self.steps = 0
+        self.skipped = 0
+        self.coalesced = 0
+        self.dropped_inputs = 0
+        self.restarts = 0
+
+    def submit(self, inputs):
+        queue = self.inputs
+        if queue.full():
+            queue.get_nowait()
+            self.dropped_inputs += 1
+        queue.put_nowait(inputs)
+
+    def advance(self, step):
+        queue = self.inputs
+        while not queue.empty():
+            self.current_input = queue.get_nowait()
+        ticks = min(self.pending_ticks, SERVER_MAX_COALESCED_TICKS)
+        self.skipped += self.pending_ticks - ticks
+        self.coalesced += ticks - 1
+        self.pending_ticks = 0
+        sim = self.sim
+        sim.step(step * ticks, self.current_input)
+        self.ticks += ticks
+        self.steps += 1
+        if sim.is_game_over:
+            sim.reset(sim.seed + 1)
+            self.restarts += 1
+
+    def record_latency(self, latency):
+        self.latencies[self.latency_count % SERVER_LATENCY_HISTORY] = latency
+        self.latency_count += 1
+
+    def recent_latencies(self):
+        return self.latencies[:min(self.latency_count, SERVER_LATENCY_HISTORY)]
+
+
+class TickServer:
+    def __init__(self, tick_rate=SERVER_TICK_RATE, budget=SERVER_TICK_BUDGET):
+        self.tick_rate = tick_rate
+        self.period = 1.0 / tick_rate
+        self.budget = budget
+        self.sessions = []
+        self.next_index = 0
+        self.ticks = 0
+        self.overruns = 0
+        self.running = False
+
+    def add_session(self, difficulty_id, seed):
+        session = ServerSession(len(self.sessions), difficulty_id, seed)
+        self.sessions.append(session)
+        return session
+
+    def run_tick(self, deadline):
+        sessions = self.sessions
+        count = len(sessions)
+        budget_end = deadline + self.period * self.budget
+        start = self.next_index
+        for session in sessions:
+            session.pending_ticks += 1
+        for offset in range(count):
+            if time.perf_counter() > budget_end:
+                self.next_index = (start + offset) % count
+                return
+            session = sessions[(start + offset) % count]
+            session.advance(self.period)
+            session.record_latency(time.perf_counter() - deadline)
+        self.next_index = start
+
+    async def run(self, seconds):
+        self.running = True
+        period = self.period
+        next_tick = time.perf_counter()
+        end = next_tick + seconds
+        try:
+            while next_tick < end:
+                delay = next_tick - time.perf_counter()
+                await asyncio.sleep(max(delay, 0))
+                behind = int((time.perf_counter() - next_tick) / period)
+                if behind:
+                    self.overruns += behind
+                    next_tick += behind * period
+                    for session in self.sessions:
+                        session.pending_ticks += behind
+                self.run_tick(next_tick)
+                self.ticks += 1
+                next_tick += period
+        finally:
+            self.running = False
+
+    def report(self, wall_time, cpu_time):
+        sessions = self.sessions
+        latencies = np.concatenate([session.recent_latencies() for session in sessions]) * 1000
+        session_p99 = [np.percentile(session.recent_latencies(), 99) * 1000
+                       for session in sessions if session.latency_count]
+        ticks = sum(session.ticks for session in sessions)
+        steps = sum(session.steps for session in sessions)
+        utilization = cpu_time / wall_time if wall_time else 0.0
+        p50, p95, p99 = np.percentile(latencies, (50, 95, 99)) if len(latencies) else (0.0, 0.0, 0.0)
+        return {
+            "sessions": len(sessions),
+            "tick_rate": self.tick_rate,
+            "scheduler_ticks": self.ticks,
+            "scheduler_overruns": self.overruns,
+            "latency_ms": {"p50": float(p50), "p95": float(p95), "p99": float(p99),
+                           "worst_session_p99": float(max(session_p99, default=0.0))},
+            "session_ticks": ticks,
+            "steps": steps,
+            "skipped_ticks": sum(session.skipped for session in sessions),
+            "coalesced_ticks": sum(session.coalesced for session in sessions),
+            "dropped_inputs": sum(session.dropped_inputs for session in sessions),
+            "restarts": sum(session.restarts for session in sessions),
+            "cpu_utilization": utilization,
+            "sessions_per_core": steps / cpu_time / self.tick_rate if cpu_time else 0.0,
+        }
+
+
+class StreamEntities:
+    def __init__(self):
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.position = np.zeros((0, 2), dtype=np.int32)
+        self.velocity = np.zeros((0, 2), dtype=np.int32)
+
+    @property
+    def count(self):
+        return len(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def set(self, ids, position, velocity):
+        self.ids = ids
+        self.position = position
+        self.velocity = velocity
+
+    def records(self):
+        records = np.empty(self.count, dtype=STREAM_KEYFRAME_RECORD)
+        records["id"] = self.ids
+        records["position"] = self.position
+        records["velocity"] = self.velocity
+        return records
+
+    def interpolated(self, alpha=1.0):
+        return self.position[:, 0] / STREAM_POSITION_SCALE, self.position[:, 1] / STREAM_POSITION_SCALE
+
+
+class StreamState:
+    kinds = ("meteorites", "bullets")
+
+    def __init__(self):
+        self.tick = 0
+        self.score = 0
+        self.health = PLAYER_MAX_HITS
+        self.player_x = 0
+        self.player_y = 0
+        self.meteorites = StreamEntities()
+        self.bullets = StreamEntities()
+
+
+def quantize(values):
+    return np.rint(values * STREAM_POSITION_SCALE).astype(np.int32)
+
+
+def sorted_membership(values, sorted_ids):
+    if not len(sorted_ids):
+        return np.zeros(len(values), dtype=bool)
+    index = np.minimum(np.searchsorted(sorted_ids, values), len(sorted_ids) - 1)
+    return sorted_ids[index] == values
+
+
+class StateEncoder:
+    def __init__(self):
+        self.state = StreamState()
+        self.frames = 0
+
+    def encode(self, sim):
+        state = self.state
+        parts = []
+        flags = 0
+        player_x, player_y = quantize(np.array((sim.player.center_x, sim.player.center_y))).tolist()
+        if sim.score != state.score:
+            flags |= STREAM_SCORE_CHANGED
+            state.score = sim.score
+            parts.append(STREAM_SCORE.pack(sim.score))
+        if sim.player_health != state.health:
+            flags |= STREAM_HEALTH_CHANGED
+            state.health = sim.player_health
+            parts.append(STREAM_HEALTH.pack(sim.player_health))
+        if (player_x, player_y) != (state.player_x, state.player_y):
+            flags |= STREAM_PLAYER_MOVED
+            state.player_x = player_x
+            state.player_y = player_y
+            parts.append(STREAM_POSITION.pack(player_x, player_y))
+        resync = False
+        for kind in StreamState.kinds:
+            delta = self.encode_entities(getattr(state, kind), getattr(sim, kind))
+            if delta is None:
+                resync = True
+            else:
+                parts.append(delta)
+        if resync:
+            return self.keyframe(sim.tick)
+        state.tick = sim.tick
+        self.frames += 1
+        return STREAM_HEADER.pack(STREAM_DELTA, sim.tick) + bytes((flags,)) + b"".join(parts)
+
+    def encode_entities(self, entities, store):
+        count = store.count
+        ids = store.ids[:count]
+        position = quantize(np.column_stack((store.x[:count], store.y[:count])))
+        if np.array_equal(entities.ids, ids):
+            velocity = position - entities.position
+            correction = velocity - entities.velocity
+            changed = correction.view(np.int64).ravel() != 0
+            entities.set(entities.ids, position, velocity)
+            return b"".join((STREAM_COUNT.pack(0), np.packbits(changed).tobytes(),
+                             correction[changed].astype("<i2").tobytes(), STREAM_COUNT.pack(0)))
+        survived = sorted_membership(entities.ids, ids)
+        current = sorted_membership(ids, entities.ids)
+        if not np.array_equal(entities.ids[survived], ids[current]):
+            entities.set(ids.copy(), position, np.zeros((count, 2), dtype=np.int32))
+            return None
+        velocity = np.zeros((count, 2), dtype=np.int32)
+        velocity[current] = position[current] - entities.position[survived]
+        correction = velocity[current] - entities.velocity[survived]
+        changed = correction.view(np.int64).ravel() != 0
+        added = np.empty(count - len(correction), dtype=STREAM_ADDED_RECORD)
+        added["id"] = ids[~current]
+        added["position"] = position[~current]
+        removed = entities.ids[~survived].astype("<u4")
+        entities.set(ids.copy(), position, velocity)
+        return b"".join((STREAM_COUNT.pack(len(removed)), removed.tobytes(),
+                         np.packbits(changed).tobytes(), correction[changed].astype("<i2").tobytes(),
+                         STREAM_COUNT.pack(len(added)), added.tobytes()))
+
+    def keyframe(self, tick=None):
+        state = self.state
+        if tick is not None:
+            state.tick = tick
+        parts = [STREAM_HEADER.pack(STREAM_KEYFRAME, state.tick),
+                 STREAM_SCORE.pack(state.score), STREAM_HEALTH.pack(state.health),
+                 STREAM_POSITION.pack(state.player_x, state.player_y)]
+        for kind in StreamState.kinds:
+            records = getattr(state, kind).records()
+            parts.append(STREAM_COUNT.pack(len(records)))
+            parts.append(records.tobytes())
+        self.frames += 1
+        return b"".join(parts)
+
+
+class StateDecoder:
+    def __init__(self):
+        self.state = StreamState()
+        self.synced = False
+        self.frames = 0
+
+    def apply(self, frame):
+        kind, tick = STREAM_HEADER.unpack_from(frame)
+        offset = STREAM_HEADER.size
+        if kind == STREAM_KEYFRAME:
+            self.apply_keyframe(frame, offset)
+            self.synced = True
+        elif not self.synced:
+            return False
+        else:
+            self.apply_delta(frame, offset)
+        self.state.tick = tick
+        self.frames += 1
+        return True
+
+    def apply_keyframe(self, frame, offset):
+        state = self.state
+        state.score, = STREAM_SCORE.unpack_from(frame, offset)
+        offset += STREAM_SCORE.size
+        state.health, = STREAM_HEALTH.unpack_from(frame, offset)
+        offset += STREAM_HEALTH.size
+        state.player_x, state.player_y = STREAM_POSITION.unpack_from(frame, offset)
+        offset += STREAM_POSITION.size
+        for kind in StreamState.kinds:
+            count, = STREAM_COUNT.unpack_from(frame, offset)
+            offset += STREAM_COUNT.size
+            records = np.frombuffer(frame, dtype=STREAM_KEYFRAME_RECORD, count=count, offset=offset)
+            offset += records.nbytes
+            getattr(state, kind).set(records["id"].astype(np.int64), records["position"].astype(np.int32),
+                                     records["velocity"].astype(np.int32))
+
+    def apply_delta(self, frame, offset):
+        state = self.state
+        flags = frame[offset]
+        offset += 1
+        if flags & STREAM_SCORE_CHANGED:
+            state.score, = STREAM_SCORE.unpack_from(frame, offset)
+            offset += STREAM_SCORE.size
+        if flags & STREAM_HEALTH_CHANGED:
+            state.health, = STREAM_HEALTH.unpack_from(frame, offset)
+            offset += STREAM_HEALTH.size
+        if flags & STREAM_PLAYER_MOVED:
+            state.player_x, state.player_y = STREAM_POSITION.unpack_from(frame, offset)
+            offset += STREAM_POSITION.size
+        for kind in StreamState.kinds:
+            offset = self.apply_entities(getattr(state, kind), frame, offset)
+
+    def apply_entities(self, entities, frame, offset):
+        count, = STREAM_COUNT.unpack_from(frame, offset)
+        offset += STREAM_COUNT.size
+        removed = np.frombuffer(frame, dtype="<u4", count=count, offset=offset)
+        offset += removed.nbytes
+        keep = ~sorted_membership(entities.ids, removed)
+        survivors = int(np.count_nonzero(keep))
+        mask_size = (survivors + 7) // 8
+        changed = np.unpackbits(np.frombuffer(frame, dtype=np.uint8, count=mask_size, offset=offset),
+                                count=survivors).astype(bool)
+        offset += mask_size
+        correction = np.frombuffer(frame, dtype="<i2", count=int(np.count_nonzero(changed)) * 2,
+                                   offset=offset).reshape(-1, 2)
+        offset += correction.nbytes
+        velocity = entities.velocity[keep]
+        velocity[changed] += correction
+        count, = STREAM_COUNT.unpack_from(frame, offset)
+        offset += STREAM_COUNT.size
+        added = np.frombuffer(frame, dtype=STREAM_ADDED_RECORD, count=count, offset=offset)
+        offset += added.nbytes
+        entities.set(np.concatenate((entities.ids[keep], added["id"])),
+                     np.concatenate((entities.position[keep] + velocity, added["position"])),
+                     np.concatenate((velocity, np.zeros((count, 2), dtype=np.int32))))
+        return offset
+
+
+def encode_snapshot(sim):
+    parts = [STREAM_HEADER.pack(STREAM_KEYFRAME, sim.tick), STREAM_SCORE.pack(sim.score),
+             STREAM_HEALTH.pack(sim.player_health),
+             struct.pack("<ff", sim.player.center_x, sim.player.center_y)]
+    for kind in StreamState.kinds:
+        store = getattr(sim, kind)
+        records = np.empty(store.count, dtype=STREAM_SNAPSHOT_RECORD)
+        records["id"] = store.ids[:store.count]
+        records["x"] = store.x[:store.count]
+        records["y"] = store.y[:store.count]
+        parts.append(STREAM_COUNT.pack(len(records)))
+        parts.append(records.tobytes())
+    return b"".join(parts)
+
+
+class StateStreamServer:
+    def __init__(self, host=STREAM_HOST, port=STREAM_PORT, keyframe_interval=STREAM_KEYFRAME_INTERVAL):
+        self.host = host
+        self.port = port
+        self.keyframe_interval = keyframe_interval
+        self.encoder = StateEncoder()
+        self.active = set()
+        self.pending = set()
+        self.join_requested = False
+        self.bytes_sent = 0
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+        self.ready.wait()
+
+    def serve(self):
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(asyncio.start_server(self.handle_client, self.host, self.port))
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.ready.set()
+        self.loop.run_forever()
+        self.server.close()
+        self.loop.run_until_complete(self.server.wait_closed())
+        self.loop.close()
+
+    async def handle_client(self, reader, writer):
+        self.pending.add(writer)
+        self.join_requested = True
+        try:
+            await reader.read()
+        finally:
+            self.active.discard(writer)
+            self.pending.discard(writer)
+            writer.close()
+
+    def publish(self, sim):
+        frame = self.encoder.encode(sim)
+        keyframe = None
+        if self.join_requested or (self.keyframe_interval and self.encoder.frames % self.keyframe_interval == 0):
+            self.join_requested = False
+            keyframe = self.encoder.keyframe()
+        self.loop.call_soon_threadsafe(self.broadcast, frame, keyframe)
+
+    def broadcast(self, frame, keyframe):
+        if keyframe is not None and frame[0] != STREAM_KEYFRAME:
+            self.pending |= self.active
+            self.active.clear()
+        for writer in list(self.active):
+            if writer.transport.get_write_buffer_size() > STREAM_MAX_BUFFERED:
+                self.active.discard(writer)
+                self.pending.add(writer)
+                self.join_requested = True
+                continue
+            self.send(writer, frame)
+        if keyframe is None:
+            return
+        for writer in list(self.pending):
+            if writer.transport.get_write_buffer_size() <= STREAM_MAX_BUFFERED:
+                self.send(writer, keyframe)
+                self.pending.discard(writer)
+                self.active.add(writer)
+
+    def send(self, writer, frame):
+        writer.write(STREAM_LENGTH.pack(len(frame)) + frame)
+        self.bytes_sent += STREAM_LENGTH.size + len(frame)
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+class StateStreamClient:
+    def __init__(self, host=STREAM_HOST, port=STREAM_PORT):
+        self.decoder = StateDecoder()
+        self.frames = queue.Queue()
+        self.bytes_received = 0
+        self.sock = socket.create_connection((host, port))
+        self.thread = threading.Thread(target=self.receive_loop, daemon=True)
+        self.thread.start()
+
+    @property
+    def state(self):
+        return self.decoder.state
+
+    def receive_exactly(self, size):
+        data = bytearray()
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("stream closed")
+            data += chunk
+        return bytes(data)
+
+    def receive_loop(self):
+        try:
+            while True:
+                size, = STREAM_LENGTH.unpack(self.receive_exactly(STREAM_LENGTH.size))
+                self.frames.put(self.receive_exactly(size))
+                self.bytes_received += STREAM_LENGTH.size + size
+        except (ConnectionError, OSError):
+            self.frames.put(None)
+
+    def poll(self):
+        applied = 0
+        while True:
+            try:
+                frame = self.frames.get_nowait()
+            except queue.Empty:
+                return applied
+            if frame is None:
+                raise ConnectionError("stream closed")
+            applied += self.decoder.apply(frame)
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+        self.thread.join()
+
+
+def pack_snapshot(sim, particles=None, recorder=None, sim_rate=SIM_TICK_RATE):
+    header = np.zeros(1, dtype=SNAPSHOT_HEADER)
+    state = header[0]
+    state["magic"] = SNAPSHOT_MAGIC
+    state["version"] = SNAPSHOT_VERSION
+    state["difficulty"] = sim.difficulty_id.encode()
+    state["collision_mode"] = sim.collision_mode.encode()
+    state["seed"] = sim.seed
+    state["sim_rate"] = sim_rate
+    state["high_score"] = sim.high_score
+    for name in SNAPSHOT_SIM_FIELDS + SNAPSHOT_SETTINGS:
+        state[name] = getattr(sim, name)
+    player = state["player"]
+    player["entity_id"] = sim.player.entity_id
+    for name in SNAPSHOT_PLAYER_FIELDS:
+        player[name] = getattr(sim.player, name)
+    _, rng_state, gauss = sim.rng.getstate()
+    state["rng_state"] = rng_state
+    state["rng_has_gauss"] = gauss is not None
+    state["rng_gauss"] = gauss or 0.0
+    hits = [(bullet, meteorite) for bullet, targets in sim.bullet_hits.items() for meteorite in sorted(targets)]
+    hits = np.array(hits, dtype=np.int64).reshape(-1, 2)
+    bullet_hits = np.empty(len(hits), dtype=SNAPSHOT_BULLET_HIT)
+    bullet_hits["bullet"] = hits[:, 0]
+    bullet_hits["meteorite"] = hits[:, 1]
+    count = len(particles) if particles is not None else 0
+    particle_records = np.empty(count, dtype=SNAPSHOT_PARTICLE)
+    if count:
+        for name in SNAPSHOT_PARTICLE.names:
+            particle_records[name] = getattr(particles, name)[:count]
+    runs = np.array([tuple(run) for run in recorder.runs] if recorder is not None else [], dtype=RECORDING_RUN_RECORD)
+    timers = np.array([tuple(entry[:4]) for entry in sim.scheduler.entries()], dtype=SNAPSHOT_TIMER)
+    state["timer_seq"] = sim.scheduler.next_seq
+    state["timers"] = len(timers)
+    state["meteorites"] = len(sim.meteorites)
+    state["bullets"] = len(sim.bullets)
+    state["bullet_hits"] = len(bullet_hits)
+    state["particles"] = count
+    state["input_runs"] = len(runs)
+    return b"".join((header.tobytes(), sim.meteorites.records().tobytes(), sim.bullets.records().tobytes(),
+                     bullet_hits.tobytes(), particle_records.tobytes(), runs.tobytes(), timers.tobytes()))
+
+
+def read_snapshot_header(buffer):
+    if len(buffer) < SNAPSHOT_HEADER.itemsize:
+        raise ValueError("snapshot is truncated")
+    state = np.frombuffer(buffer, dtype=SNAPSHOT_HEADER, count=1)[0]
+    if state["magic"] != SNAPSHOT_MAGIC or state["version"] != SNAPSHOT_VERSION:
+        raise ValueError(f"not a version {SNAPSHOT_VERSION} snapshot")
+    if state["difficulty"].decode() not in DIFFICULTIES or state["collision_mode"].decode() not in COLLISION_MODES:
+        raise ValueError("snapshot has an unknown difficulty or collision mode")
+    return state
+
+
+def snapshot_sections(state):
+    return ((EntityStore.record, int(state["meteorites"])), (EntityStore.record, int(state["bullets"])),
+            (SNAPSHOT_BULLET_HIT, int(state["bullet_hits"])), (SNAPSHOT_PARTICLE, int(state["particles"])),
+            (RECORDING_RUN_RECORD, int(state["input_runs"])), (SNAPSHOT_TIMER, int(state["timers"])))
+
+
+def snapshot_size(state):
+    return SNAPSHOT_HEADER.itemsize + sum(dtype.itemsize * count for dtype, count in snapshot_sections(state))
+
+
+def restore_snapshot(buffer, particles=None, profiler=None):
+    state = read_snapshot_header(buffer)
+    sections = snapshot_sections(state)
+    if len(buffer) != snapshot_size(state):
+        raise ValueError("snapshot size does not match its header")
+    offset = SNAPSHOT_HEADER.itemsize
+    arrays = []
+    for dtype, count in sections:
+        arrays.append(np.frombuffer(buffer, dtype=dtype, count=count, offset=offset))
+        offset += dtype.itemsize * count
+    meteorites, bullets, bullet_hits, particle_records, runs, timers = arrays
+    difficulty_id = state["difficulty"].decode()
+    settings = {name: state[name].item() for name in SNAPSHOT_SETTINGS}
+    sim = GameSimulation(difficulty_id, int(state["seed"]), int(state["high_score"]), profiler=profiler,
+                         collision_mode=state["collision_mode"].decode(), settings=settings)
+    for name in SNAPSHOT_SIM_FIELDS:
+        setattr(sim, name, state[name].item())
+    sim.is_new_record = bool(sim.is_new_record)
+    sim.is_game_over = bool(sim.is_game_over)
+    player = state["player"]
+    sim.player.entity_id = int(player["entity_id"])
+    for name in SNAPSHOT_PLAYER_FIELDS:
+        setattr(sim.player, name, player[name].item())
+    sim.player.invulnerable = bool(sim.player.invulnerable)
+    sim.player.visible = bool(sim.player.visible)
+    gauss = float(state["rng_gauss"]) if state["rng_has_gauss"] else None
+    sim.rng.setstate((3, tuple(state["rng_state"].tolist()), gauss))
+    scheduler = sim.scheduler
+    scheduler.clear()
+    for due, seq, kind, payload in zip(timers["due"].tolist(), timers["seq"].tolist(), timers["kind"].tolist(),
+                                       timers["payload"].tolist()):
+        sim.link_timer(scheduler.push(due, seq, kind, payload))
+    scheduler.next_seq = int(state["timer_seq"])
+    sim.meteorites.load_records(meteorites)
+    sim.bullets.load_records(bullets)
+    for bullet, meteorite in zip(bullet_hits["bullet"].tolist(), bullet_hits["meteorite"].tolist()):
+        sim.bullet_hits.setdefault(bullet, set()).add(meteorite)
+    if particles is not None:
+        count = len(particle_records)
+        particles.clear()
+        if count > particles.capacity:
+            particles.allocate(count)
+        for name in SNAPSHOT_PARTICLE.names:
+            getattr(particles, name)[:count] = particle_records[name]
+        particles.count = count
+    recorder = InputRecorder(sim.seed, difficulty_id, float(state["sim_rate"]), sim.collision_mode)
+    recorder.runs = [[inputs, length] for inputs, length in zip(runs["inputs"].tolist(), runs["length"].tolist())]
+    return sim, recorder
+
+
+def save_snapshot(path, data):
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+
+def load_snapshot(path, particles=None, profiler=None):
+    with open(path, "rb") as file:
+        data = file.read()
+    return restore_snapshot(data, particles, profiler)
+
+
+def peek_snapshot(path):
+    try:
+        with open(path, "rb") as file:
+            state = read_snapshot_header(file.read(SNAPSHOT_HEADER.itemsize))
+            if os.fstat(file.fileno()).st_size != snapshot_size(state):
+                return None
+    except (OSError, ValueError):
+        return None
+    return {"difficulty": state["difficulty"].decode(), "score": int(state["score"]), "tick": int(state["tick"])}
+
+
+class SnapshotAutosaver:
+    def __init__(self, path=SNAPSHOT_FILE):
+        self.path = path
+        self.pending = None
+        self.lock = threading.Lock()
+        self.write_queue = queue.Queue()
+        self.saves = 0
+        self.failed_saves = 0
+        self.writer = threading.Thread(target=self.write_loop, daemon=True)
+        self.writer.start()
+
+    def save(self, data):
+        with self.lock:
+            queued = self.pending is not None
+            self.pending = data
+        if not queued:
+            self.write_queue.put("save")
+
+    def discard(self):
+        with self.lock:
+            self.pending = None
+        self.write_queue.put("discard")
+
+    def flush(self, timeout=None):
+        done = threading.Event()
+        self.write_queue.put(done)
+        return done.wait(timeout)
+
+    def write_loop(self):
+        while True:
+            item = self.write_queue.get()
+            if item is None:
+                break
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+            try:
+                if item == "save":
+                    with self.lock:
+                        data, self.pending = self.pending, None
+                    if data is None:
+                        continue
+                    save_snapshot(self.path, data)
+                    self.saves += 1
+                elif os.path.exists(self.path):
+                    os.remove(self.path)
+            except OSError:
+                self.failed_saves += 1
+
+    def close(self):
+        if self.writer.is_alive():
+            self.write_queue.put(None)
+            self.writer.join()
+
+
+class SpritePool:
+    def __init__(self, sprite_list, sprite_class, enabled=True, default_color=arcade.color.WHITE):
+        self.sprite_list = sprite_list
+        self.sprite_class = sprite_class
+        self.enabled = enabled
+        self.default_color = default_color
+        self.active = {}
+        self.free = []
+        self.tinted = set()
+        self.created = 0
+        self.writes = 0
+
+    def __getitem__(self, entity_id):
+        return self.active[entity_id]
+
+    def acquire(self, entity_id):
+        if self.free:
+            sprite = self.free.pop()
+            sprite.visible = True
+            self.writes += 1
+        else:
+            sprite = self.sprite_class()
+            self.sprite_list.append(sprite)
+            self.created += 1
+        self.active[entity_id] = sprite
+        return sprite
+
+    def release(self, entity_id):
+        sprite = self.active.pop(entity_id)
+        if entity_id in self.tinted:
+            self.tinted.discard(entity_id)
+            sprite.color = self.default_color
+            self.writes += 1
+        if self.enabled:
+            sprite.visible = False
+            self.writes += 1
+            self.free.append(sprite)
+        else:
+            sprite.remove_from_sprite_lists()
+
+    def release_all(self):
+        for entity_id in list(self.active):
+            self.release(entity_id)
+
+    def sync(self, store, alpha=1.0):
+        active = self.active
+        ids = store.ids[:store.count].tolist()
+        seen = set(ids)
+        xs, ys = store.interpolated(alpha)
+        writes = 0
+        for entity_id, position in zip(ids, zip(xs.tolist(), ys.tolist())):
+            sprite = active.get(entity_id)
+            if sprite is None:
+                sprite = self.acquire(entity_id)
+            if sprite.position != position:
+                sprite.position = position
+                writes += 1
+        self.writes += writes
+        if len(active) > len(seen):
+            for entity_id in [entity_id for entity_id in active if entity_id not in seen]:
+                self.release(entity_id)
+
+    def tint(self, entity_ids, color):
+        tinted = set(entity_ids)
+        active = self.active
+        for entity_id in tinted - self.tinted:
+            active[entity_id].color = color
+            self.writes += 1
+        for entity_id in self.tinted - tinted:
+            sprite = active.get(entity_id)
+            if sprite is not None:
+                sprite.color = self.default_color
+                self.writes += 1
+        self.tinted = tinted
+
+    def take_writes(self):
+        writes = self.writes
+        self.writes = 0
+        return writes
+
+
+class GameView(arcade.View):
+    def __init__(self, difficulty_id, difficulty_name, db_manager, seed=None):
+        super().__init__()
+        self.db_manager = db_manager
+        self.profiler = FrameProfiler()
+        self.quality = QualityGovernor(1 / getattr(self.window, "render_rate", RENDER_RATE))
+        self.autosaver = SnapshotAutosaver()
+        self.last_autosave = 0.0
+        self.telemetry = SessionTelemetry(db_manager)
+        self.frame_start = None
+        self.sim = None
+        self.recorder = None
+        self.run = None
+        self.recorded_score = 0
+        self.clock = FixedTimestep(getattr(self.window, "sim_rate", SIM_TICK_RATE))
+        self.streamer = getattr(self.window, "streamer", None)
+        self.memory = getattr(self.window, "memory", None)
+        self.background_texture = asset_manager.get_texture("ddd.png")
+        self.player = Player()
+        self.player_list = arcade.SpriteList()
+        self.player_list.append(self.player)
+        self.meteorite_list = arcade.SpriteList()
+        self.bullet_list = arcade.SpriteList()
+        self.particles = ParticleSystem()
+        self.meteorite_sprites = SpritePool(self.meteorite_list, Meteorite)
+        self.bullet_sprites = SpritePool(self.bullet_list, Bullet)
+        self.sprite_writes = 0
+        self.frame_sprite_writes = 0
+        self.left_pressed = False
+        self.right_pressed = False
+        self.up_pressed = False
+        self.down_pressed = False
+        self.show_text_stats = False
+        self.build_hud()
+        self.start_game(difficulty_id, difficulty_name, seed)
+
+    @property
+    def score(self):
+        return self.sim.score
+
+    def enter(self, difficulty_id=None, difficulty_name=None, seed=None, resume=False, snapshot=None):
+        if snapshot is not None:
+            self.restore_game(snapshot)
+        elif not resume:
+            self.start_game(difficulty_id, difficulty_name, seed)
+
+    def exit(self):
+        self.left_pressed = False
+        self.right_pressed = False
+        self.up_pressed = False
+        self.down_pressed = False
+
+    def start_game(self, difficulty_id, difficulty_name, seed=None):
+        if seed is None:
+            seed = random.getrandbits(63)
+        high_score = self.db_manager.get_high_score(difficulty_id)
+        if self.sim is None or self.sim.difficulty_id != difficulty_id:
+            self.sim = GameSimulation(difficulty_id, seed, high_score, profiler=self.profiler)
+        else:
+            self.sim.high_score = high_score
+            self.sim.reset(seed)
+        self.clock.set_rate(getattr(self.window, "sim_rate", SIM_TICK_RATE))
+        self.recorder = InputRecorder(seed, difficulty_id, self.clock.rate, self.sim.collision_mode)
+        self.run = self.db_manager.begin_run()
+        self.recorded_score = 0
+        self.clear_sprites()
+        self.telemetry.start(self.sim)
+        self.apply_difficulty(difficulty_id, difficulty_name)
+
+    def restore_game(self, path):
+        self.clear_sprites()
+        self.sim, self.recorder = load_snapshot(path, self.particles, self.profiler)
+        self.clock.set_rate(self.recorder.sim_rate)
+        self.sim.high_score = max(self.sim.high_score, self.db_manager.get_high_score(self.sim.difficulty_id))
+        if self.sim.is_new_record:
+            self.run = self.db_manager.begin_run((self.sim.difficulty_id, self.sim.score))
+            self.recorded_score = self.sim.score
+        else:
+            self.run = self.db_manager.begin_run()
+            self.recorded_score = 0
+        self.telemetry.start(self.sim)
+        self.apply_difficulty(self.sim.difficulty_id, DIFFICULTY_NAMES[self.sim.difficulty_id])
+
+    def apply_difficulty(self, difficulty_id, difficulty_name):
+        self.difficulty_id = difficulty_id
+        self.difficulty_name = difficulty_name
+        if difficulty_id == DIFFICULTY_EASY:
+            self.difficulty_color = arcade.color.GREEN
+        elif difficulty_id == DIFFICULTY_MEDIUM:
+            self.difficulty_color = arcade.color.YELLOW
+        else:
+            self.difficulty_color = arcade.color.RED
+        self.clock.reset()
+        self.last_autosave = self.sim.total_time
+        self.exit()
+        hud = self.hud
+        hud.set_text("difficulty", f"Сложность: {difficulty_name}")
+        hud.set_color("difficulty", self.difficulty_color)
+        hud.set_text("max_hits", f"Попаданий для метеорита: {self.sim.meteorite_max_hits}")
+        hud.set_color("max_hits", self.difficulty_color)
+        self.update_hud()
+        self.sync_sprites()
+
+    def build_hud(self):
+        hud = self.hud = TextLayer()
+        hud.add("health", "", 10, SCREEN_HEIGHT - 40, arcade.color.WHITE, 24)
+        hud.add("score", "", 10, SCREEN_HEIGHT - 80, arcade.color.WHITE, 24)
+        hud.add("difficulty", "", 10, SCREEN_HEIGHT - 120, arcade.color.WHITE, 24)
+        hud.add("max_hits", "", 10, SCREEN_HEIGHT - 160, arcade.color.WHITE, 20)
+        hud.add("high_score", "", SCREEN_WIDTH - 300, SCREEN_HEIGHT - 40, arcade.color.GOLD, 22)
+        hud.warm("difficulty", [f"Сложность: {name}" for name in DIFFICULTY_NAMES.values()])
+        hud.add("new_record", "НОВЫЙ РЕКОРД!", SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2, arcade.color.GOLD,
+                font_size=60, anchor_x="center", bold=True)
+        hud.add("text_stats", "", 10, 10, arcade.color.LIGHT_GRAY, 14)
+        hud.add("profiler", "", SCREEN_WIDTH - 520, SCREEN_HEIGHT - 90, arcade.color.WHITE, 14,
+                width=500, multiline=True, font_name=("Courier New", "courier"))
+        hud.set_visible("new_record", False)
+        hud.set_visible("text_stats", False)
+        hud.set_visible("profiler", False)
+
+    def update_hud(self):
+        sim = self.sim
+        hud = self.hud
+        hud.set_text("health", f"Здоровье: {sim.player_health}/{PLAYER_MAX_HITS}")
+        hud.set_text("score", f"Счет: {sim.score}")
+        hud.set_text("high_score", f"Лучший счет: {self.db_manager.get_high_score(self.difficulty_id)}")
+        show_record = sim.is_new_record and sim.new_record_timer > 0
+        hud.set_visible("new_record", show_record)
+        if show_record:
+            alpha = int(255 * (sim.new_record_timer / NEW_RECORD_DISPLAY_TIME))
+            alpha = max(0, min(255, alpha))
+            hud.set_color("new_record", (arcade.color.GOLD[0], arcade.color.GOLD[1], arcade.color.GOLD[2], alpha))
+        hud.set_visible("text_stats", self.show_text_stats)
+        if self.show_text_stats:
+            hud.set_text("text_stats", f"Перестроено текстов за кадр: {hud.frame_layouts}, "
+                                       f"записей в спрайты: {self.frame_sprite_writes}, "
+                                       f"качество: {self.quality.level}")
+        profiler = self.profiler
+        hud.set_visible("profiler", profiler.enabled)
+        if profiler.enabled and profiler.frames % PROFILER_OVERLAY_INTERVAL == 0:
+            hud.set_text("profiler", profiler.format_report())
+
+    def create_explosion_particles(self, x, y):
+        quality = self.quality
+        self.particles.emit(x, y, quality.particle_count(PARTICLE_COUNT), quality.particle_lifetime)
+
+    def on_draw(self):
+        mark = self.profiler.mark()
+        self.clear()
+        sim = self.sim
+        arcade.draw_texture_rect(self.background_texture,
+                                 arcade.rect.XYWH(self.width // 2, self.height // 2, self.width, self.height))
+        if sim.player.visible:
+            self.player_list.draw()
+        self.meteorite_list.draw()
+        self.bullet_list.draw()
+        self.particles.draw()
+        self.frame_sprite_writes = self.take_sprite_writes()
+        self.update_hud()
+        self.hud.draw()
+        self.profiler.lap("draw", mark)
+        self.profiler.end_frame(meteorites=len(sim.meteorites), bullets=len(sim.bullets),
+                                particles=len(self.particles), sim_steps=self.clock.last_steps,
+                                sprite_writes=self.frame_sprite_writes, quality_level=self.quality.level)
+        if self.frame_start is not None:
+            frame_time = time.perf_counter() - self.frame_start
+            self.quality.record(frame_time)
+            self.telemetry.record_frame(frame_time)
+            self.frame_start = None
+
+    def input_mask(self):
+        inputs = 0
+        if self.left_pressed:
+            inputs |= INPUT_LEFT
+        if self.right_pressed:
+            inputs |= INPUT_RIGHT
+        if self.up_pressed:
+            inputs |= INPUT_UP
+        if self.down_pressed:
+            inputs |= INPUT_DOWN
+        return inputs
+
+    def on_update(self, delta_time):
+        self.frame_start = time.perf_counter()
+        profiler = self.profiler
+        sim = self.sim
+        clock = self.clock
+        inputs = self.input_mask()
+        for _ in range(clock.advance(delta_time)):
+            self.recorder.record(inputs)
+            events = sim.step(clock.step, inputs)
+            mark = profiler.mark()
+            for event in events:
+                if event[0] == EVENT_METEORITE_DESTROYED:
+                    self.create_explosion_particles(event[1], event[2])
+                elif event[0] == EVENT_GAME_OVER:
+                    self.game_over()
+                    return
+            profiler.lap("events", mark)
+        self.record_score()
+        self.telemetry.update(sim)
+        if sim.total_time - self.last_autosave >= SNAPSHOT_AUTOSAVE_INTERVAL:
+            self.autosave()
+        mark = profiler.mark()
+        if self.streamer is not None and clock.last_steps:
+            self.streamer.publish(sim)
+            mark = profiler.lap("stream", mark)
+        self.sync_sprites(clock.alpha)
+        mark = profiler.lap("sprite_sync", mark)
+        self.particles.update(delta_time)
+        profiler.lap("particles", mark)
+
+    def sync_sprites(self, alpha=1.0):
+        sim = self.sim
+        position = sim.player.interpolated(alpha)
+        if self.player.position != position:
+            self.player.position = position
+            self.sprite_writes += 1
+        meteorites = sim.meteorites
+        self.meteorite_sprites.sync(meteorites, alpha)
+        self.bullet_sprites.sync(sim.bullets, alpha)
+        if sim.flash_timers and self.quality.hit_flash:
+            self.meteorite_sprites.tint(sim.flashing_ids(), arcade.color.RED)
+        elif self.meteorite_sprites.tinted:
+            self.meteorite_sprites.tint((), arcade.color.RED)
+
+    def take_sprite_writes(self):
+        writes = self.sprite_writes + self.meteorite_sprites.take_writes() + self.bullet_sprites.take_writes()
+        self.sprite_writes = 0
+        return writes
+
+    def clear_sprites(self):
+        self.meteorite_sprites.release_all()
+        self.bullet_sprites.release_all()
+        self.particles.clear()
+
+    def save_recording(self):
+        if not len(self.recorder):
+            return None
+        os.makedirs(RECORDINGS_DIR, exist_ok=True)
+        path = os.path.join(RECORDINGS_DIR, f"{self.difficulty_id}_{time.strftime('%Y%m%d_%H%M%S')}_{self.sim.seed}.dfr")
+        self.recorder.save(path, self.sim)
+        prune_recordings()
+        return path
+
+    def autosave(self):
+        self.autosaver.save(pack_snapshot(self.sim, self.particles, self.recorder, self.clock.rate))
+        self.last_autosave = self.sim.total_time
+
+    def record_score(self):
+        sim = self.sim
+        if sim.is_new_record and sim.score != self.recorded_score:
+            self.db_manager.update_run_score(self.run, self.difficulty_id, sim.score)
+            self.recorded_score = sim.score
+
+    def end_run(self):
+        sim = self.sim
+        if sim.is_game_over or sim.is_new_record:
+            self.db_manager.add_run_score(self.difficulty_id, sim.score, self.run)
+        self.telemetry.finish(sim)
+        self.save_recording()
+        self.autosaver.discard()
+        self.autosaver.flush()
+        if self.memory is not None:
+            self.memory.record_run()
+
+    def memory_stats(self):
+        sim = self.sim
+        stats = {"player": {"live": 1, "sprites": len(self.player_list),
+                            "sprite_bytes": object_footprint(self.player_list)[1]}}
+        for kind, store, pool in (("meteorite", sim.meteorites, self.meteorite_sprites),
+                                  ("bullet", sim.bullets, self.bullet_sprites)):
+            stats[kind] = {"live": store.count, "capacity": store.capacity, "store_bytes": store.nbytes,
+                           "sprites": len(pool.active), "free_sprites": len(pool.free), "created": pool.created,
+                           "sprite_bytes": object_footprint(pool)[1]}
+        particles = self.particles
+        stats["particle"] = {"live": len(particles), "capacity": particles.capacity, "store_bytes": particles.nbytes}
+        stats["bullet_hit"] = {"live": sum(len(targets) for targets in sim.bullet_hits.values()),
+                               "bullets": len(sim.bullet_hits)}
+        stats["timer"] = {"live": len(sim.scheduler), "queued": len(sim.scheduler.queue)}
+        return stats
 
     def game_over(self):
-        self.db_manager.save_score(self.difficulty_id, self.score)
-        self.player_list.clear()
-        self.meteorite_list.clear()
-        self.bullet_list.clear()
-        self.particle_list.clear()
-        menu_view = MenuView()
-        self.window.show_view(menu_view)
+        self.end_run()
+        self.clear_sprites()
+        self.window.views.show("menu")
 
     def on_key_press(self, key, modifiers):
         if key == arcade.key.W:
@@ -607,35 +3360,35 @@ class GameView(arcade.View):
         elif key == arcade.key.D:
             self.right_pressed = True
         elif key == arcade.key.ESCAPE:
-            pause_view = PauseView(self)
-            self.window.show_view(pause_view)
+            self.autosave()
+            self.window.views.show("pause")
         elif key == arcade.key.R:
             self.reset_game()
         elif key == arcade.key.M:
-            menu_view = MenuView()
-            self.window.show_view(menu_view)
+            self.end_run()
+            self.window.views.show("menu")
+        elif key == arcade.key.F2:
+            self.show_text_stats = not self.show_text_stats
+        elif key == arcade.key.F3:
+            self.profiler.enabled = not self.profiler.enabled
+            self.profiler.reset()
+        elif key == arcade.key.F4:
+            self.profiler.export_csv(PROFILE_CSV_FILE)
+            self.profiler.export_json(PROFILE_JSON_FILE)
+        elif key == arcade.key.F5:
+            self.save_recording()
+        elif key == arcade.key.F6:
+            quality = self.quality
+            quality.enabled = not quality.enabled
+            if not quality.enabled:
+                quality.level = 0
+        elif key == arcade.key.F7:
+            with open(MEMORY_REPORT_FILE, "w", encoding="utf-8") as file:
+                json.dump(memory_report(self.window), file, ensure_ascii=False, indent=2)
 
     def reset_game(self):
-        self.player_health = PLAYER_MAX_HITS
-        self.score = 0
-        self.speed_bonus = 0.0
-        self.current_meteorite_speed_multiplier = self.base_meteorite_speed_multiplier
-        self.last_bonus_score = 0
-        self.is_new_record = False
-        self.new_record_timer = 0.0
-        self.player.center_x = 100
-        self.player.center_y = SCREEN_HEIGHT // 2
-        self.player.hits = 0
-        self.player.invulnerable = False
-        self.player.visible = True
-        self.meteorite_list.clear()
-        self.bullet_list.clear()
-        self.particle_list.clear()
-        self.meteorite_timer = 0
-        self.left_pressed = False
-        self.right_pressed = False
-        self.up_pressed = False
-        self.down_pressed = False
+        self.end_run()
+        self.start_game(self.difficulty_id, self.difficulty_name)
 
     def on_key_release(self, key, modifiers):
         if key == arcade.key.W:
@@ -648,16 +3401,1205 @@ class GameView(arcade.View):
             self.right_pressed = False
 
 
+class SpectatorView(arcade.View):
+    def __init__(self, client):
+        super().__init__()
+        self.client = client
+        self.background_texture = asset_manager.get_texture("ddd.png")
+        self.player = Player()
+        self.player_list = arcade.SpriteList()
+        self.player_list.append(self.player)
+        self.meteorite_list = arcade.SpriteList()
+        self.bullet_list = arcade.SpriteList()
+        self.meteorite_sprites = SpritePool(self.meteorite_list, Meteorite)
+        self.bullet_sprites = SpritePool(self.bullet_list, Bullet)
+        texts = self.text_layer = TextLayer()
+        texts.add("health", "", 10, SCREEN_HEIGHT - 40, arcade.color.WHITE, 24)
+        texts.add("score", "", 10, SCREEN_HEIGHT - 80, arcade.color.WHITE, 24)
+        texts.add("status", "Ожидание трансляции...", SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2, arcade.color.GOLD,
+                  font_size=40, anchor_x="center")
+
+    def on_update(self, delta_time):
+        try:
+            self.client.poll()
+        except ConnectionError:
+            self.text_layer.set_text("status", "Трансляция завершена")
+            self.text_layer.set_visible("status", True)
+            return
+        if not self.client.decoder.synced:
+            return
+        state = self.client.state
+        self.text_layer.set_visible("status", False)
+        self.player.center_x = state.player_x / STREAM_POSITION_SCALE
+        self.player.center_y = state.player_y / STREAM_POSITION_SCALE
+        self.meteorite_sprites.sync(state.meteorites)
+        self.bullet_sprites.sync(state.bullets)
+        self.text_layer.set_text("health", f"Здоровье: {state.health}/{PLAYER_MAX_HITS}")
+        self.text_layer.set_text("score", f"Счет: {state.score}")
+
+    def on_draw(self):
+        self.clear()
+        arcade.draw_texture_rect(self.background_texture,
+                                 arcade.rect.XYWH(self.width // 2, self.height // 2, self.width, self.height))
+        if self.client.decoder.synced:
+            self.player_list.draw()
+            self.meteorite_list.draw()
+            self.bullet_list.draw()
+        self.text_layer.draw()
+
+
+def benchmark_collision_broadphase(entity_counts=(10, 25, 50, 100, 250, 500, 1000, 2000), frames=60, seed=1):
+    rng = random.Random(seed)
+    print(f"{'entities':>8} {'list, ms':>10} {'grid, ms':>10} {'speedup':>8}")
+    break_even = None
+    for count in entity_counts:
+        meteorite_list = arcade.SpriteList()
+        bullet_list = arcade.SpriteList()
+        for _ in range(count // 2):
+            meteorite = Meteorite()
+            meteorite.change_x = -DEFAULT_METEORITE_SPEED
+            meteorite.center_x = rng.uniform(0, SCREEN_WIDTH)
+            meteorite.center_y = rng.uniform(50, SCREEN_HEIGHT - 50)
+            meteorite_list.append(meteorite)
+        for _ in range(count - count // 2):
+            bullet = Bullet()
+            bullet.position = rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT)
+            bullet_list.append(bullet)
+        grid = SpatialHash()
+        list_time = 0.0
+        grid_time = 0.0
+        for _ in range(frames):
+            for meteorite in meteorite_list:
+                meteorite.center_x -= DEFAULT_METEORITE_SPEED
+                if meteorite.center_x < -100:
+                    meteorite.center_x += SCREEN_WIDTH + 200
+            for bullet in bullet_list:
+                bullet.center_x += DEFAULT_BULLET_SPEED
+                if bullet.center_x > SCREEN_WIDTH + 100:
+                    bullet.center_x -= SCREEN_WIDTH + 200
+            start = time.perf_counter()
+            list_hits = [arcade.check_for_collision_with_list(bullet, meteorite_list, method=3)
+                         for bullet in bullet_list]
+            list_time += time.perf_counter() - start
+            start = time.perf_counter()
+            grid.update_items(meteorite_list)
+            grid_hits = [grid.check_for_collision(bullet) for bullet in bullet_list]
+            grid_time += time.perf_counter() - start
+            if list_hits != grid_hits:
+                raise AssertionError(f"Broadphase hit mismatch at {count} entities")
+        list_ms = list_time * 1000 / frames
+        grid_ms = grid_time * 1000 / frames
+        print(f"{count:>8} {list_ms:>10.3f} {grid_ms:>10.3f} {list_ms / grid_ms:>7.2f}x")
+        if list_ms > grid_ms:
+            break_even = count if break_even is None else break_even
+        else:
+            break_even = None
+    if break_even is None:
+        print("grid broadphase did not beat the list scan at the largest load")
+    else:
+        print(f"grid broadphase is faster from {break_even} entities upward")
+
+
+def enable_god_mode(sim):
+    sim.player.invulnerable = True
+    sim.scheduler.cancel(sim.player.invulnerable_end)
+    sim.player.invulnerable_end = None
+
+
+def benchmark_simulation(ticks=36000, seed=1):
+    print(f"{'difficulty':>10} {'ticks/s':>10} {'score':>7} {'entities':>9}")
+    for difficulty_id in (DIFFICULTY_EASY, DIFFICULTY_MEDIUM, DIFFICULTY_HARD):
+        sim = GameSimulation(difficulty_id, seed)
+        enable_god_mode(sim)
+        start = time.perf_counter()
+        for tick in range(ticks):
+            sim.step(1 / 60, INPUT_UP if (tick // 120) % 2 else INPUT_DOWN)
+        elapsed = time.perf_counter() - start
+        entities = len(sim.meteorites) + len(sim.bullets)
+        print(f"{difficulty_id:>10} {ticks / elapsed:>10.0f} {sim.score:>7} {entities:>9}")
+
+
+def benchmark_particles(live_particles=10000, frames=600, seed=1):
+    particles = ParticleSystem(seed=seed)
+    rng = random.Random(seed)
+    bursts_per_frame = live_particles / (PARTICLE_LIFETIME * 60) / PARTICLE_COUNT
+    pending = 0.0
+    for _ in range(int(PARTICLE_LIFETIME * 60) * 2):
+        pending += bursts_per_frame
+        while pending >= 1:
+            particles.emit(rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT))
+            pending -= 1
+        particles.update(1 / 60)
+    update_time = 0.0
+    pack_time = 0.0
+    peak = 0
+    for _ in range(frames):
+        pending += bursts_per_frame
+        start = time.perf_counter()
+        while pending >= 1:
+            particles.emit(rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT))
+            pending -= 1
+        particles.update(1 / 60)
+        update_time += time.perf_counter() - start
+        start = time.perf_counter()
+        particles.pack_vertices()
+        pack_time += time.perf_counter() - start
+        peak = max(peak, len(particles))
+    print(f"live particles: {len(particles)} (peak {peak})")
+    print(f"emit + update: {update_time * 1000 / frames:.3f} ms/frame")
+    print(f"vertex pack:   {pack_time * 1000 / frames:.3f} ms/frame")
+
+
+def benchmark_profiler_overhead(ticks=18000, seed=1):
+    results = {}
+    for enabled in (False, True):
+        profiler = FrameProfiler(enabled=enabled)
+        sim = GameSimulation(DIFFICULTY_HARD, seed, profiler=profiler)
+        enable_god_mode(sim)
+        start = time.perf_counter()
+        for tick in range(ticks):
+            sim.step(1 / 60, INPUT_UP if (tick // 90) % 2 else INPUT_DOWN)
+            profiler.end_frame(meteorites=len(sim.meteorites), bullets=len(sim.bullets))
+        results[enabled] = (time.perf_counter() - start) * 1000 / ticks
+        if enabled:
+            print(profiler.format_report())
+    print(f"ms/tick: disabled {results[False]:.4f}, enabled {results[True]:.4f}")
+
+
+def run_pooling_pass(pooled, ticks, seed, latencies=None):
+    sim = GameSimulation(DIFFICULTY_HARD, seed)
+    enable_god_mode(sim)
+    meteorite_sprites = SpritePool(arcade.SpriteList(), Meteorite, pooled)
+    bullet_sprites = SpritePool(arcade.SpriteList(), Bullet, pooled)
+    allocated = 0
+    for tick in range(ticks):
+        start = time.perf_counter()
+        before = tracemalloc.get_traced_memory()[0] if latencies is None else 0
+        sim.step(1 / 60, INPUT_UP if (tick // 90) % 2 else INPUT_DOWN)
+        meteorite_sprites.sync(sim.meteorites)
+        bullet_sprites.sync(sim.bullets)
+        if latencies is None:
+            allocated += max(tracemalloc.get_traced_memory()[0] - before, 0)
+        else:
+            latencies[tick] = time.perf_counter() - start
+    return sim, meteorite_sprites.created + bullet_sprites.created, allocated
+
+
+def benchmark_pooling(ticks=18000, seed=1):
+    print(f"{'path':>8} {'p50 ms':>7} {'p99 ms':>7} {'sprites built':>14} {'spawned':>8} {'grown KiB':>10} "
+          f"{'gc runs':>8} {'gc ms':>7}")
+    for pooled in (False, True):
+        latencies = np.zeros(ticks)
+        pauses = []
+
+        def track_gc(phase, info):
+            if phase == "start":
+                pauses.append(time.perf_counter())
+            else:
+                pauses[-1] = time.perf_counter() - pauses[-1]
+
+        gc.collect()
+        gc.callbacks.append(track_gc)
+        try:
+            sim, sprites_built, _ = run_pooling_pass(pooled, ticks, seed, latencies)
+        finally:
+            gc.callbacks.remove(track_gc)
+        tracemalloc.start()
+        _, _, allocated = run_pooling_pass(pooled, ticks, seed)
+        tracemalloc.stop()
+        p50, p99 = np.percentile(latencies, (50, 99)) * 1000
+        label = "pooled" if pooled else "fresh"
+        print(f"{label:>8} {p50:>7.3f} {p99:>7.3f} {sprites_built:>14} {sim.next_entity_id - 1:>8} "
+              f"{allocated / 1024:>10.0f} {len(pauses):>8} {sum(pauses) * 1000:>7.1f}")
+
+
+def benchmark_sprite_writes(meteorites=1000, frames=600, seed=1):
+    sim = GameSimulation(DIFFICULTY_HARD, seed)
+    enable_god_mode(sim)
+    rng = random.Random(seed)
+    meteorite_sprites = SpritePool(arcade.SpriteList(), Meteorite)
+    bullet_sprites = SpritePool(arcade.SpriteList(), Bullet)
+    print(f"{'phase':>8} {'ms/frame':>9} {'writes/frame':>13}")
+    for phase in ("moving", "idle"):
+        fill_meteorites(sim, meteorites, rng)
+        elapsed = 0.0
+        writes = 0
+        for frame in range(frames):
+            if phase == "moving" and frame % 2 == 0:
+                sim.step(1 / SIM_TICK_RATE, INPUT_UP if (frame // 90) % 2 else INPUT_DOWN)
+                fill_meteorites(sim, meteorites, rng)
+            alpha = 1.0 if phase == "idle" or frame % 2 else 0.5
+            start = time.perf_counter()
+            meteorite_sprites.sync(sim.meteorites, alpha)
+            bullet_sprites.sync(sim.bullets, alpha)
+            meteorite_sprites.tint(sim.flashing_ids(), arcade.color.RED)
+            elapsed += time.perf_counter() - start
+            writes += meteorite_sprites.take_writes() + bullet_sprites.take_writes()
+        print(f"{phase:>8} {elapsed * 1000 / frames:>9.3f} {writes / frames:>13.1f}")
+
+
+def busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def benchmark_quality_governor(seed=1, render_rate=RENDER_RATE, particle_cost=15e-6):
+    phases = (("calm", 0, 300), ("overload", 2, 900), ("recovered", 0, 900))
+    governed = GameSimulation(DIFFICULTY_HARD, seed)
+    reference = GameSimulation(DIFFICULTY_HARD, seed)
+    enable_god_mode(governed)
+    enable_god_mode(reference)
+    particles = ParticleSystem(seed=seed)
+    quality = QualityGovernor(1 / render_rate)
+    rng = random.Random(seed)
+    frame = 0
+    print(f"{'phase':>10} {'frames':>7} {'p90 ms':>7} {'level':>6} {'max level':>10} {'particles':>10}")
+    for name, bursts, frames in phases:
+        times = np.zeros(frames)
+        max_level = quality.level
+        for index in range(frames):
+            start = time.perf_counter()
+            inputs = scripted_input(frame)
+            for event in governed.step(1 / 60, inputs):
+                if event[0] == EVENT_METEORITE_DESTROYED:
+                    particles.emit(event[1], event[2], quality.particle_count(), quality.particle_lifetime)
+            reference.step(1 / 60, inputs)
+            for _ in range(bursts):
+                particles.emit(rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT),
+                               quality.particle_count(), quality.particle_lifetime)
+            particles.update(1 / 60)
+            particles.pack_vertices()
+            busy_wait(len(particles) * particle_cost)
+            times[index] = time.perf_counter() - start
+            quality.record(times[index])
+            max_level = max(max_level, quality.level)
+            frame += 1
+        p90 = np.percentile(times[frames // 2:], 90) * 1000
+        print(f"{name:>10} {frames:>7} {p90:>7.2f} {quality.level:>6} {max_level:>10} {len(particles):>10}")
+    stats = quality.stats()
+    print(json.dumps({key: stats[key] for key in ("throttles", "restores", "decisions")}, indent=2))
+    same_outcome = (governed.score, governed.kills, governed.player_health) == \
+                   (reference.score, reference.kills, reference.player_health)
+    ok = stats["throttles"] > 0 and quality.level == 0 and same_outcome
+    print("ok" if ok else "FAILED: governor did not throttle and recover, or gameplay diverged")
+    return ok
+
+
+def benchmark_snapshots(entity_counts=(1000, 5000), repeats=50, ticks=600, seed=1, path="benchmark_snapshot.dfs"):
+    ok = True
+    print(f"{'entities':>8} {'bytes':>9} {'pack ms':>8} {'write ms':>9} {'restore ms':>11} {'resume':>7}")
+    for count in entity_counts:
+        rng = random.Random(seed)
+        sim = GameSimulation(DIFFICULTY_HARD, seed)
+        enable_god_mode(sim)
+        particles = ParticleSystem(seed=seed)
+        recorder = InputRecorder(seed, DIFFICULTY_HARD)
+        for tick in range(ticks):
+            inputs = scripted_input(tick)
+            recorder.record(inputs)
+            for event in sim.step(1 / SIM_TICK_RATE, inputs):
+                if event[0] == EVENT_METEORITE_DESTROYED:
+                    particles.emit(event[1], event[2])
+            fill_meteorites(sim, count // 2, rng)
+        while len(particles) < count // 2:
+            particles.emit(rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT))
+        start = time.perf_counter()
+        for _ in range(repeats):
+            data = pack_snapshot(sim, particles, recorder)
+        pack_time = (time.perf_counter() - start) / repeats
+        start = time.perf_counter()
+        for _ in range(repeats):
+            save_snapshot(path, data)
+        write_time = (time.perf_counter() - start) / repeats
+        restored_particles = ParticleSystem(seed=seed)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            restored, restored_recorder = load_snapshot(path, restored_particles)
+        restore_time = (time.perf_counter() - start) / repeats
+        entities = len(sim.meteorites) + len(sim.bullets) + len(particles)
+        for tick in range(ticks, ticks * 2):
+            sim.step(1 / SIM_TICK_RATE, scripted_input(tick))
+            restored.step(1 / SIM_TICK_RATE, scripted_input(tick))
+        same = (pack_snapshot(sim, particles, recorder) == pack_snapshot(restored, restored_particles,
+                                                                         restored_recorder))
+        ok = ok and same
+        print(f"{entities:>8} {len(data):>9} {pack_time * 1000:>8.3f} {write_time * 1000:>9.3f} "
+              f"{restore_time * 1000:>11.3f} {'same' if same else 'DIVERGED':>7}")
+    os.remove(path)
+    return ok
+
+
+def benchmark_scheduler(pending_counts=(10, 1_000, 100_000), ticks=6000, seed=1):
+    step = 1 / SIM_TICK_RATE
+    horizon = ticks * step
+    print(f"{'pending':>8} {'scheduler us/tick':>18} {'polling us/tick':>16} {'fired':>6}")
+    for count in pending_counts:
+        rng = random.Random(seed)
+        scheduler = Scheduler()
+        for _ in range(count):
+            scheduler.schedule(rng.uniform(horizon, horizon * 2), TIMER_FLASH_END)
+        recurring = scheduler.schedule(step, TIMER_SHOT)
+        cancelled = scheduler.schedule(step * 2, TIMER_SPAWN)
+        now = 0.0
+        start = time.perf_counter()
+        for _ in range(ticks):
+            now += step
+            for entry in scheduler.due(now):
+                if entry is recurring:
+                    scheduler.cancel(cancelled)
+                    cancelled = scheduler.schedule(now + step * 2, TIMER_SPAWN)
+                    recurring = scheduler.schedule(now + step, TIMER_SHOT)
+        scheduler_time = (time.perf_counter() - start) / ticks
+        timers = np.array([rng.uniform(horizon, horizon * 2) for _ in range(count)])
+        start = time.perf_counter()
+        for _ in range(ticks):
+            timers -= step
+            np.flatnonzero(timers <= 0)
+        polling_time = (time.perf_counter() - start) / ticks
+        print(f"{count:>8} {scheduler_time * 1e6:>18.2f} {polling_time * 1e6:>16.2f} {scheduler.fired:>6}")
+
+
+def benchmark_timestep(seconds=120, seed=1, sim_rate=SIM_TICK_RATE):
+    ticks = int(seconds * sim_rate)
+    print(f"{'render':>8} {'frames':>7} {'steps/frame':>12} {'dropped ms':>11} {'score':>6} {'kills':>6} {'health':>7}")
+    outcomes = set()
+    for label, render_rate, jitter, hitch_every in (("30 Hz", 30, 0.0, 0), ("60 Hz", 60, 0.0, 0),
+                                                    ("144 Hz", 144, 0.0, 0), ("jitter", 60, 0.5, 0),
+                                                    ("hitches", 60, 0.0, 300)):
+        rng = random.Random(seed)
+        sim = GameSimulation(DIFFICULTY_HARD, seed)
+        enable_god_mode(sim)
+        clock = FixedTimestep(sim_rate)
+        frames = 0
+        while sim.tick < ticks:
+            frame_time = 1 / render_rate * (1 + rng.uniform(-jitter, jitter))
+            if hitch_every and frames % hitch_every == hitch_every - 1:
+                frame_time = 0.25
+            for _ in range(min(clock.advance(frame_time), ticks - sim.tick)):
+                sim.step(clock.step, scripted_input(sim.tick))
+            frames += 1
+        outcome = (sim.score, sim.kills, sim.player_health, round(sim.player.center_x, 6),
+                   round(sim.player.center_y, 6), tuple(sim.meteorites.ids[:sim.meteorites.count].tolist()))
+        outcomes.add(outcome)
+        print(f"{label:>8} {frames:>7} {clock.total_steps / frames:>12.2f} {clock.dropped_time * 1000:>11.1f} "
+              f"{sim.score:>6} {sim.kills:>6} {sim.player_health:>7}")
+    print(f"identical outcomes across render rates: {'yes' if len(outcomes) == 1 else 'no'}")
+    return len(outcomes) == 1
+
+
+def benchmark_tunneling(seconds=300, seed=1):
+    print(f"{'sim Hz':>7} {'mode':>9} {'ms/tick':>8} {'shots':>6} {'hits':>6} {'kills':>6} {'hits/shot':>10}")
+    for sim_rate in (120, 60, 30, 15):
+        for collision_mode in (COLLISION_DISCRETE, COLLISION_SWEPT):
+            sim = GameSimulation(DIFFICULTY_HARD, seed, collision_mode=collision_mode)
+            enable_god_mode(sim)
+            ticks = seconds * sim_rate
+            start = time.perf_counter()
+            for tick in range(ticks):
+                sim.step(1 / sim_rate, scripted_input(tick * REFERENCE_FRAME_RATE // sim_rate))
+            elapsed = time.perf_counter() - start
+            print(f"{sim_rate:>7} {collision_mode:>9} {elapsed * 1000 / ticks:>8.3f} {sim.shots_fired:>6} "
+                  f"{sim.hits_landed:>6} {sim.kills:>6} {sim.hits_landed / max(sim.shots_fired, 1):>10.3f}")
+
+
+def autopilot(sim):
+    player = sim.player
+    meteorites = sim.meteorites
+    count = meteorites.count
+    distance_x = meteorites.x[:count] - player.center_x
+    ahead = distance_x > player.shape.left - meteorites.shape.right
+    if not ahead.any():
+        return 0
+    distance_x = np.maximum(distance_x[ahead], 1.0)
+    lanes = np.linspace(-player.shape.bottom, SCREEN_HEIGHT - 1 - player.shape.top, AUTOPILOT_LANES)
+    threat = np.abs(lanes[:, None] - meteorites.y[:count][ahead]) < AUTOPILOT_DODGE_HEIGHT
+    near = distance_x < AUTOPILOT_DODGE_DISTANCE
+    current = int(np.abs(lanes - player.center_y).argmin())
+    crossing = threat @ np.where(near & ~threat[current], 1 / distance_x, 0.0)
+    crossing[current + 1:] = np.maximum.accumulate(crossing[current + 1:])
+    if current:
+        crossing[:current] = np.maximum.accumulate(crossing[current - 1::-1])[::-1]
+    danger = threat @ np.where(near, 1 / distance_x, 0.0) + crossing
+    score = (danger - threat @ np.where(near, 0.0, AUTOPILOT_AIM_WEIGHT / distance_x)
+             + np.abs(lanes - player.center_y) * AUTOPILOT_TRAVEL_WEIGHT)
+    target_y = lanes[score.argmin()]
+    if target_y - player.center_y > AUTOPILOT_AIM_TOLERANCE:
+        return INPUT_UP
+    if target_y - player.center_y < -AUTOPILOT_AIM_TOLERANCE:
+        return INPUT_DOWN
+    return 0
+
+
+def run_batch_game(job):
+    difficulty_id, seed, settings, sim_rate, max_seconds = job
+    sim = GameSimulation(difficulty_id, seed, settings=settings)
+    step = 1 / sim_rate
+    max_ticks = int(max_seconds * sim_rate)
+    while not sim.is_game_over and sim.tick < max_ticks:
+        sim.step(step, autopilot(sim))
+    minutes = sim.total_time / 60
+    return {"difficulty": difficulty_id, "seed": seed, "score": sim.score, "kills": sim.kills,
+            "hits": sim.hits_landed, "shots": sim.shots_fired, "survival_seconds": round(sim.total_time, 3),
+            "survived": not sim.is_game_over, "kills_per_minute": sim.kills / minutes if minutes else 0.0}
+
+
+def batch_jobs(games, difficulties, seed, settings, sim_rate, max_seconds):
+    for game in range(games):
+        for difficulty_id in difficulties:
+            yield difficulty_id, seed + game, settings, sim_rate, max_seconds
+
+
+def run_batch(games, difficulties=DIFFICULTIES, workers=None, seed=0, settings=None, sim_rate=SIM_TICK_RATE,
+              max_seconds=BATCH_MAX_SECONDS, output=BATCH_RESULTS_FILE):
+    workers = workers or os.cpu_count() or 1
+    results = {difficulty_id: [] for difficulty_id in difficulties}
+    jobs = batch_jobs(games, difficulties, seed, settings, sim_rate, max_seconds)
+    chunk_size = max(1, min(64, games * len(difficulties) // (workers * 8)))
+    start = time.perf_counter()
+    with open(output, "w", encoding="utf-8") as file, multiprocessing.Pool(workers) as pool:
+        for done, result in enumerate(pool.imap_unordered(run_batch_game, jobs, chunk_size), 1):
+            file.write(json.dumps(result) + "\n")
+            results[result["difficulty"]].append(result)
+            if done % 1000 == 0:
+                file.flush()
+                print(f"{done} games, {done / (time.perf_counter() - start):.1f} games/s")
+    elapsed = time.perf_counter() - start
+    return summarize_batch(results), elapsed
+
+
+def summarize_batch(results):
+    summary = {}
+    for difficulty_id, games in results.items():
+        if not games:
+            continue
+        stats = {"games": len(games), "survived": sum(game["survived"] for game in games)}
+        for field in ("score", "survival_seconds", "kills_per_minute"):
+            values = np.array([game[field] for game in games], dtype=np.float64)
+            p10, p50, p90 = np.percentile(values, (10, 50, 90))
+            stats[field] = {"mean": float(values.mean()), "p10": float(p10), "p50": float(p50),
+                            "p90": float(p90), "max": float(values.max())}
+        summary[difficulty_id] = stats
+    return summary
+
+
+def print_batch_summary(summary, elapsed):
+    games = sum(stats["games"] for stats in summary.values())
+    print(f"{games} games in {elapsed:.1f} s ({games / elapsed:.1f} games/s)")
+    print(f"{'difficulty':>10} {'games':>6} {'survived':>9} {'score p50':>10} {'score p90':>10} "
+          f"{'alive p50 s':>12} {'alive p90 s':>12} {'kills/min':>10}")
+    for difficulty_id, stats in summary.items():
+        print(f"{difficulty_id:>10} {stats['games']:>6} {stats['survived']:>9} "
+              f"{stats['score']['p50']:>10.0f} {stats['score']['p90']:>10.0f} "
+              f"{stats['survival_seconds']['p50']:>12.1f} {stats['survival_seconds']['p90']:>12.1f} "
+              f"{stats['kills_per_minute']['mean']:>10.2f}")
+
+
+def parse_settings(pairs):
+    settings = {}
+    for pair in pairs or ():
+        name, _, value = pair.partition("=")
+        settings[name] = int(value) if name == "meteorite_max_hits" else float(value)
+    return settings
+
+
+def benchmark_batch_scaling(games=40, max_seconds=60, output=BATCH_RESULTS_FILE):
+    cores = os.cpu_count() or 1
+    counts = sorted({1, 2, cores // 2, cores} - {0})
+    print(f"{'workers':>8} {'games/s':>8} {'speedup':>8} {'efficiency':>11}")
+    baseline = None
+    for workers in counts:
+        _, elapsed = run_batch(games * workers, (DIFFICULTY_HARD,), workers, max_seconds=max_seconds, output=output)
+        rate = games * workers / elapsed
+        baseline = baseline or rate
+        print(f"{workers:>8} {rate:>8.1f} {rate / baseline:>8.2f} {rate / baseline / workers:>11.2f}")
+
+
+async def feed_synthetic_inputs(server, session, seed):
+    rng = random.Random(seed)
+    while server.running:
+        await asyncio.sleep(rng.uniform(*SERVER_INPUT_INTERVAL))
+        session.submit(rng.choice(SYNTHETIC_INPUTS))
+
+
+async def serve_harness(server, seconds, seed):
+    server.running = True
+    feeders = [asyncio.ensure_future(feed_synthetic_inputs(server, session, seed + session.session_id))
+               for session in server.sessions]
+    try:
+        await server.run(seconds)
+    finally:
+        for feeder in feeders:
+            feeder.cancel()
+        await asyncio.gather(*feeders, return_exceptions=True)
+
+
+def run_server_harness(sessions, seconds=10, tick_rate=SERVER_TICK_RATE, seed=1):
+    server = TickServer(tick_rate)
+    for index in range(sessions):
+        server.add_session(DIFFICULTIES[index % len(DIFFICULTIES)], seed + index)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    asyncio.run(serve_harness(server, seconds, seed))
+    report = server.report(time.perf_counter() - wall_start, time.process_time() - cpu_start)
+    latency = report["latency_ms"]
+    print(f"{report['sessions']} sessions at {tick_rate:g} Hz for {seconds:g} s: "
+          f"{report['scheduler_ticks']} ticks, {report['scheduler_overruns']} overruns")
+    print(f"tick latency ms: p50 {latency['p50']:.2f}, p95 {latency['p95']:.2f}, p99 {latency['p99']:.2f}, "
+          f"worst session p99 {latency['worst_session_p99']:.2f}")
+    print(f"session ticks {report['session_ticks']} in {report['steps']} steps, "
+          f"coalesced {report['coalesced_ticks']}, skipped {report['skipped_ticks']}, "
+          f"dropped inputs {report['dropped_inputs']}, restarts {report['restarts']}")
+    print(f"cpu utilization {report['cpu_utilization']:.2f}, sessions per core {report['sessions_per_core']:.0f}")
+    return report
+
+
+def replay_recording(path, seek=None):
+    recording = Recording.load(path)
+    session = ReplaySession(recording)
+    start = time.perf_counter()
+    sim = session.seek(len(recording) if seek is None else seek)
+    elapsed = time.perf_counter() - start
+    print(f"{path}: {recording.difficulty_id}, seed {recording.seed}, {recording.sim_rate:g} Hz, "
+          f"{len(recording)} ticks")
+    print(f"tick {sim.tick}: score {sim.score}, kills {sim.kills}, hits {sim.hits_landed}, "
+          f"shots {sim.shots_fired}, health {sim.player_health} "
+          f"({sim.tick / max(elapsed, 1e-9):.0f} ticks/s)")
+    if seek is not None and seek < len(recording):
+        return True
+    mismatches = session.mismatches()
+    for field, (expected, actual) in mismatches.items():
+        print(f"mismatch {field}: recorded {expected}, replayed {actual}")
+    print("verified" if not mismatches else "replay diverged")
+    return not mismatches
+
+
+def profile_recordings(paths, output=REPLAY_PROFILE_FILE):
+    results = {}
+    print(f"{'recording':<48} {'ticks':>7} {'ticks/s':>9} {'p50 ms':>7} {'p99 ms':>7} {'ok':>3}")
+    for path in paths:
+        recording = Recording.load(path)
+        profiler = FrameProfiler(history=len(recording) or 1, enabled=True)
+        session = ReplaySession(recording, profiler)
+        start = time.perf_counter()
+        session.run()
+        elapsed = time.perf_counter() - start
+        report = profiler.report()
+        totals = sum(profiler.phases.values()) * 1000 if profiler.phases else np.zeros(1)
+        p50, p99 = np.percentile(totals, (50, 99))
+        verified = not session.mismatches()
+        results[path] = {"ticks": len(recording), "ticks_per_second": len(recording) / max(elapsed, 1e-9),
+                         "tick_ms": {"p50": float(p50), "p99": float(p99)},
+                         "phases_ms": report["phases_ms"], "verified": verified}
+        print(f"{os.path.basename(path):<48} {len(recording):>7} {len(recording) / max(elapsed, 1e-9):>9.0f} "
+              f"{p50:>7.3f} {p99:>7.3f} {'yes' if verified else 'no':>3}")
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(results, file, ensure_ascii=False, indent=2)
+    return all(result["verified"] for result in results.values())
+
+
+def benchmark_stream(entity_counts=(100, 1000, 5000), ticks=300, seed=1):
+    print(f"{'entities':>8} {'snapshot B':>11} {'delta B':>8} {'ratio':>6} {'snapshot us':>12} "
+          f"{'delta us':>9} {'decode us':>10} {'max err px':>11}")
+    for count in entity_counts:
+        rng = random.Random(seed)
+        sim = GameSimulation(DIFFICULTY_HARD, seed)
+        enable_god_mode(sim)
+        encoder = StateEncoder()
+        decoder = StateDecoder()
+        decoder.apply(encoder.keyframe(0))
+        snapshot_bytes = delta_bytes = 0
+        snapshot_time = delta_time = decode_time = 0.0
+        for tick in range(ticks):
+            fill_meteorites(sim, count, rng)
+            sim.step(1 / SIM_TICK_RATE, scripted_input(tick))
+            start = time.perf_counter()
+            snapshot = encode_snapshot(sim)
+            encoded = time.perf_counter()
+            frame = encoder.encode(sim)
+            delta_encoded = time.perf_counter()
+            decoder.apply(frame)
+            decoded = time.perf_counter()
+            snapshot_bytes += len(snapshot)
+            delta_bytes += len(frame)
+            snapshot_time += encoded - start
+            delta_time += delta_encoded - encoded
+            decode_time += decoded - delta_encoded
+        meteorites = decoder.state.meteorites
+        error = np.abs(meteorites.position[:, 0] / STREAM_POSITION_SCALE
+                       - sim.meteorites.x[:sim.meteorites.count]).max()
+        print(f"{count:>8} {snapshot_bytes / ticks:>11.0f} {delta_bytes / ticks:>8.0f} "
+              f"{snapshot_bytes / delta_bytes:>6.1f} {snapshot_time * 1e6 / ticks:>12.1f} "
+              f"{delta_time * 1e6 / ticks:>9.1f} {decode_time * 1e6 / ticks:>10.1f} {error:>11.3f}")
+    return verify_stream_loopback(seed=seed)
+
+
+def verify_stream_loopback(ticks=1200, join_tick=500, seed=1):
+    server = StateStreamServer(port=0)
+    sim = GameSimulation(DIFFICULTY_HARD, seed)
+    enable_god_mode(sim)
+    client = None
+    for tick in range(ticks):
+        if tick == join_tick:
+            client = StateStreamClient(port=server.port)
+        sim.step(1 / SIM_TICK_RATE, scripted_input(tick))
+        server.publish(sim)
+        time.sleep(0.0005)
+    deadline = time.perf_counter() + 5
+    while client.state.tick != sim.tick and time.perf_counter() < deadline:
+        client.poll()
+        time.sleep(0.01)
+    state = client.state
+    meteorites = sim.meteorites
+    matched = (state.tick == sim.tick and state.score == sim.score and state.health == sim.player_health
+               and np.array_equal(state.meteorites.ids, meteorites.ids[:meteorites.count])
+               and np.array_equal(state.meteorites.position[:, 0], quantize(meteorites.x[:meteorites.count])))
+    print(f"loopback: joined at tick {join_tick}, received {client.decoder.frames} frames, "
+          f"{client.bytes_received} bytes, state at tick {state.tick} {'matches' if matched else 'DIVERGED'}")
+    client.close()
+    server.close()
+    return matched
+
+
+def remove_database(db_file):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_file + suffix):
+            os.remove(db_file + suffix)
+
+
+def benchmark_score_writes(frames=600, write_delay=0.005, db_file="benchmark_scores.db"):
+    remove_database(db_file)
+    db_manager = DatabaseManager(db_file)
+    db_manager.write_delay = write_delay
+    frame_times = []
+    run = db_manager.begin_run()
+    for frame in range(frames):
+        start = time.perf_counter()
+        db_manager.update_run_score(run, DIFFICULTY_HARD, frame * 10)
+        frame_times.append(time.perf_counter() - start)
+    db_manager.add_run_score(DIFFICULTY_HARD, frames * 10, run)
+    start = time.perf_counter()
+    db_manager.flush()
+    flush_time = time.perf_counter() - start
+    frame_times.sort()
+    print(f"write delay: {write_delay * 1000:.0f} ms, records submitted: {frames}, writes: {db_manager.writes}")
+    print(f"update_run_score p50: {frame_times[len(frame_times) // 2] * 1000:.4f} ms, "
+          f"max: {frame_times[-1] * 1000:.4f} ms")
+    print(f"flush: {flush_time * 1000:.1f} ms")
+    db_manager.close()
+    reopened = DatabaseManager(db_file)
+    print(f"persisted high score: {reopened.get_high_score(DIFFICULTY_HARD)}, "
+          f"rows: {len(reopened.get_leaderboard(DIFFICULTY_HARD)[0])}")
+    reopened.close()
+    remove_database(db_file)
+
+
+def benchmark_telemetry(sessions=3, minutes=10, render_rate=RENDER_RATE, seed=1, db_file="benchmark_telemetry.db"):
+    remove_database(db_file)
+    db_manager = DatabaseManager(db_file)
+    rng = random.Random(seed)
+    frames = minutes * 60 * render_rate
+    steps = SIM_TICK_RATE // render_rate
+    step = 1 / SIM_TICK_RATE
+    telemetry_time = 0.0
+    for session in range(sessions):
+        sim = GameSimulation(DIFFICULTIES[session % len(DIFFICULTIES)], seed + session)
+        enable_god_mode(sim)
+        telemetry = SessionTelemetry(db_manager)
+        telemetry.start(sim)
+        for frame in range(frames):
+            for _ in range(steps):
+                sim.step(step, autopilot(sim))
+            frame_time = rng.lognormvariate(-5, 0.5)
+            start = time.perf_counter()
+            telemetry.update(sim)
+            telemetry.record_frame(frame_time)
+            telemetry_time += time.perf_counter() - start
+        start = time.perf_counter()
+        telemetry.finish(sim)
+        telemetry_time += time.perf_counter() - start
+    start = time.perf_counter()
+    db_manager.flush()
+    flush_time = time.perf_counter() - start
+    print(f"frames: {frames * sessions}, telemetry {telemetry_time * 1000 / (frames * sessions):.4f} ms/frame, "
+          f"writer transactions {db_manager.writes}, final drain {flush_time * 1000:.1f} ms")
+    for row in db_manager.get_telemetry_rollup():
+        print(", ".join(f"{key} {value:.2f}" if isinstance(value, float) else f"{key} {value}"
+                        for key, value in row.items()))
+    print(db_manager.get_minute_rollup(DIFFICULTY_HARD)[-1])
+    db_manager.close()
+    remove_database(db_file)
+
+
+def print_telemetry_report(db_file=DB_FILE):
+    db_manager = DatabaseManager(db_file)
+    for row in db_manager.get_telemetry_rollup():
+        print(json.dumps(row, ensure_ascii=False))
+        for minute in db_manager.get_minute_rollup(row["difficulty"]):
+            print("  " + json.dumps(minute, ensure_ascii=False))
+    db_manager.close()
+
+
+def benchmark_leaderboard(row_counts=(10_000, 100_000, 1_000_000, 3_000_000), repeats=200,
+                          db_file="benchmark_leaderboard.db"):
+    print(f"{'rows':>10} {'top-10, ms':>11} {'page 50, ms':>12} {'rank, ms':>9} {'high score, ms':>15}")
+    for row_count in row_counts:
+        remove_database(db_file)
+        db_manager = DatabaseManager(db_file, retention=None)
+        rng = random.Random(row_count)
+        batch = 100_000
+        for offset in range(0, row_count, batch):
+            db_manager.conn.executemany(
+                "INSERT INTO high_scores (difficulty, score) VALUES (?, ?)",
+                ((DIFFICULTIES[i % 3], rng.randint(0, 100_000)) for i in range(offset, min(offset + batch, row_count))))
+        db_manager.conn.commit()
+        timings = []
+        start = time.perf_counter()
+        for _ in range(repeats):
+            db_manager.get_leaderboard(DIFFICULTY_HARD)
+        timings.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        for _ in range(repeats // 10):
+            rows, cursor = db_manager.get_leaderboard(DIFFICULTY_HARD)
+            for _ in range(49):
+                rows, cursor = db_manager.get_leaderboard(DIFFICULTY_HARD, after=cursor)
+        timings.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            db_manager.get_rank(DIFFICULTY_HARD, 99_000)
+        timings.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            db_manager.load_high_scores()
+        timings.append(time.perf_counter() - start)
+        top_ms, page_ms, rank_ms, high_ms = (
+            timings[0] * 1000 / repeats, timings[1] * 1000 / (repeats // 10) / 50,
+            timings[2] * 1000 / repeats, timings[3] * 1000 / repeats)
+        print(f"{row_count:>10} {top_ms:>11.4f} {page_ms:>12.4f} {rank_ms:>9.4f} {high_ms:>15.4f}")
+        db_manager.close()
+    db_manager = DatabaseManager(db_file)
+    start = time.perf_counter()
+    db_manager.prune()
+    db_manager.flush()
+    prune_time = time.perf_counter() - start
+    remaining = db_manager.conn.execute("SELECT COUNT(*) FROM high_scores").fetchone()[0]
+    print(f"retention to top {db_manager.retention}: {prune_time * 1000:.0f} ms, {remaining} rows left")
+    db_manager.close()
+    remove_database(db_file)
+
+
+def scripted_input(tick):
+    phase = (tick // 45) % 6
+    if phase == 0:
+        return INPUT_UP
+    if phase == 1:
+        return INPUT_UP | INPUT_RIGHT
+    if phase == 2:
+        return INPUT_DOWN
+    if phase == 3:
+        return INPUT_DOWN | INPUT_LEFT
+    if phase == 4:
+        return INPUT_RIGHT
+    return INPUT_LEFT
+
+
+def setup_max_speed_bonus(sim, rng):
+    sim.score = int(SCORE_SPEED_BONUS_THRESHOLD * MAX_SPEED_BONUS * 10)
+    sim.high_score = sim.score
+
+
+def fill_meteorites(sim, count, rng):
+    while len(sim.meteorites) < count:
+        sim.spawn_meteorite()
+        sim.meteorites.x[sim.meteorites.count - 1] = rng.uniform(0, SCREEN_WIDTH + 50)
+
+
+def top_up_meteorites(sim, particles, rng):
+    fill_meteorites(sim, 1000, rng)
+
+
+def emit_explosion_bursts(sim, particles, rng):
+    for _ in range(10):
+        particles.emit(rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT))
+
+
+BENCHMARK_SCENARIOS = [
+    ("hard_10_minutes", DIFFICULTY_HARD, 36000, None, None),
+    ("meteorites_1000", DIFFICULTY_HARD, 1800, None, top_up_meteorites),
+    ("explosion_bursts", DIFFICULTY_HARD, 3600, None, emit_explosion_bursts),
+    ("max_speed_bonus", DIFFICULTY_HARD, 18000, setup_max_speed_bonus, None),
+]
+
+
+def run_scenario(difficulty_id, ticks, setup, per_tick, seed, latencies=None):
+    sim = GameSimulation(difficulty_id, seed)
+    enable_god_mode(sim)
+    particles = ParticleSystem(seed=seed)
+    rng = random.Random(seed)
+    if setup is not None:
+        setup(sim, rng)
+    clock = time.perf_counter
+    for tick in range(ticks):
+        start = clock()
+        if per_tick is not None:
+            per_tick(sim, particles, rng)
+        for event in sim.step(1 / 60, scripted_input(tick)):
+            if event[0] == EVENT_METEORITE_DESTROYED:
+                particles.emit(event[1], event[2])
+        particles.update(1 / 60)
+        if latencies is not None:
+            latencies[tick] = clock() - start
+    return sim
+
+
+def run_benchmark_suite(names=None, seed=1, repeats=BENCHMARK_REPEATS):
+    for kind in ("player", "meteorite", "bullet"):
+        get_hit_shape(kind)
+    results = {}
+    for name, difficulty_id, ticks, setup, per_tick in BENCHMARK_SCENARIOS:
+        if names and name not in names:
+            continue
+        latencies = None
+        for _ in range(repeats):
+            samples = np.zeros(ticks)
+            gc.collect()
+            run_scenario(difficulty_id, ticks, setup, per_tick, seed, samples)
+            if latencies is None or samples.mean() < latencies.mean():
+                latencies = samples
+        gc.collect()
+        tracemalloc.start()
+        sim = run_scenario(difficulty_id, ticks, setup, per_tick, seed)
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        p50, p95, p99 = np.percentile(latencies, (50, 95, 99)) * 1000
+        results[name] = {
+            "ticks": ticks,
+            "mean_ms": float(latencies.mean() * 1000),
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": float(latencies.max() * 1000),
+            "retained_kib": retained / 1024,
+            "peak_kib": peak / 1024,
+            "score": sim.score,
+            "kills": sim.kills,
+        }
+    return results
+
+
+def compare_benchmark_results(results, baseline, threshold):
+    failures = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if base["score"] != result["score"]:
+            failures.append(f"{name}: score {result['score']} != baseline {base['score']}")
+        for metric in ("mean_ms", "p95_ms", "peak_kib"):
+            if result[metric] > base[metric] * (1 + threshold):
+                failures.append(f"{name}: {metric} {result[metric]:.3f} > baseline {base[metric]:.3f}")
+    return failures
+
+
+def benchmark_suite(names=None, save_baseline=False, threshold=BENCHMARK_THRESHOLD,
+                    baseline_file=BENCHMARK_BASELINE_FILE, results_file=BENCHMARK_RESULTS_FILE):
+    results = run_benchmark_suite(names)
+    print(f"{'scenario':<18} {'mean':>7} {'p50':>7} {'p95':>7} {'p99':>7} {'max':>7} {'kept KiB':>9} {'peak KiB':>9}")
+    for name, result in results.items():
+        print(f"{name:<18} {result['mean_ms']:>7.3f} {result['p50_ms']:>7.3f} {result['p95_ms']:>7.3f} "
+              f"{result['p99_ms']:>7.3f} {result['max_ms']:>7.3f} {result['retained_kib']:>9.0f} "
+              f"{result['peak_kib']:>9.0f}")
+    with open(results_file, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+    if save_baseline:
+        with open(baseline_file, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+        print(f"baseline saved to {baseline_file}")
+        return True
+    if not os.path.exists(baseline_file):
+        print(f"ERROR no baseline at {baseline_file}, run with --save-baseline first")
+        return False
+    with open(baseline_file, encoding="utf-8") as file:
+        baseline = json.load(file)
+    failures = compare_benchmark_results(results, baseline, threshold)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return not failures
+
+
+def run_memory_soak(cycles, frames, draw_interval, warmup):
+    warmup = max(1, min(warmup, cycles - 1))
+    gc.collect()
+    initial_objects = live_object_counts()
+    window = MyGame(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE)
+    memory = window.memory
+    memory.start()
+    while window.views.current != "menu":
+        window.current_view.on_draw()
+        window.current_view.on_update(1 / 60)
+    key = arcade.key
+    baseline_objects = None
+    baseline_total = 0
+    start = time.perf_counter()
+    for cycle in range(cycles):
+        menu = window.current_view
+        menu.on_key_press(key.S, 0)
+        menu.on_draw()
+        menu.on_key_press(key.SPACE, 0)
+        game = window.current_view
+        for frame in range(frames):
+            inputs = scripted_input(cycle * frames + frame)
+            game.left_pressed = bool(inputs & INPUT_LEFT)
+            game.right_pressed = bool(inputs & INPUT_RIGHT)
+            game.up_pressed = bool(inputs & INPUT_UP)
+            game.down_pressed = bool(inputs & INPUT_DOWN)
+            game.on_update(1 / 60)
+            if window.views.current != "game":
+                break
+            if frame % draw_interval == 0:
+                game.on_draw()
+            if cycle % 4 == 1 and frame == frames // 2:
+                game.on_key_press(key.ESCAPE, 0)
+                window.current_view.on_draw()
+                window.current_view.on_key_press(key.SPACE, 0)
+        if window.views.current == "game":
+            if cycle % 4 == 3:
+                game.on_key_press(key.ESCAPE, 0)
+                window.current_view.on_key_press(key.M, 0)
+            else:
+                game.game_over()
+        if memory.completed == warmup:
+            baseline_objects = live_object_counts()
+            baseline_total = memory.totals[-1]
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    objects = live_object_counts()
+    report = memory_report(window)
+    game = window.views.views["game"]
+    failures = []
+    if memory.leaking:
+        failures.append(f"traced memory grew {report['runs']['growth_kib']:.0f} KiB over the last {memory.runs} runs")
+    growth = memory.totals[-1] - baseline_total
+    if growth > memory.threshold_kib * 1024:
+        failures.append(f"traced memory grew {growth / 1024:.0f} KiB since run {warmup}")
+    expected = {"Meteorite": initial_objects["Meteorite"]["count"] + game.meteorite_sprites.created,
+                "Bullet": initial_objects["Bullet"]["count"] + game.bullet_sprites.created}
+    for name, stats in objects.items():
+        limit = expected.get(name, baseline_objects[name]["count"])
+        if stats["count"] > limit:
+            failures.append(f"{name}: {stats['count']} live objects, expected at most {limit}")
+    deltas = memory.deltas()[warmup:]
+    print(f"cycles: {cycles}, runs recorded: {memory.completed}, elapsed: {elapsed:.1f} s")
+    print(f"traced: {report['runs']['traced_kib']:.0f} KiB, growth since run {warmup}: {growth / 1024:.1f} KiB")
+    if memory.growth() is not None:
+        print(f"growth over the last {memory.runs} runs: {memory.growth() / 1024:.1f} KiB")
+    if deltas:
+        print(f"per-run delta KiB: mean {sum(deltas) / len(deltas) / 1024:.2f}, max {max(deltas) / 1024:.2f}, "
+              f"min {min(deltas) / 1024:.2f}")
+    print(f"{'type':<18} {'warmup':>7} {'final':>7} {'KiB':>9}")
+    for name, stats in objects.items():
+        print(f"{name:<18} {baseline_objects[name]['count']:>7} {stats['count']:>7} {stats['bytes'] / 1024:>9.1f}")
+    for name, stats in report["views"].items():
+        print(f"view {name:<13} {stats['objects']:>7} objects {stats['kib']:>9.1f} KiB")
+    print(json.dumps(report["entities"], indent=2))
+    for line in report["top_growth"]:
+        print(line)
+    for failure in failures:
+        print(f"LEAK {failure}")
+    window.on_close()
+    memory.stop()
+    return not failures
+
+
+def benchmark_memory_soak(cycles=SOAK_CYCLES, frames=SOAK_FRAMES, draw_interval=SOAK_DRAW_INTERVAL,
+                          warmup=MEMORY_GROWTH_RUNS):
+    asset_manager.preload()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            return run_memory_soak(cycles, frames, draw_interval, warmup)
+        finally:
+            os.chdir(cwd)
+
+
 class MyGame(arcade.Window):
-    def __init__(self, width, height, title):
-        super().__init__(width, height, title)
-        menu_view = MenuView()
-        self.show_view(menu_view)
+    def __init__(self, width, height, title, sim_rate=SIM_TICK_RATE, render_rate=RENDER_RATE, stream_port=None,
+                 report_timings=False, report_memory=False):
+        self.startup_start = time.perf_counter()
+        super().__init__(width, height, title, update_rate=1 / render_rate, draw_rate=1 / render_rate)
+        self.startup_timings = {"window": time.perf_counter() - self.startup_start}
+        self.report_timings = report_timings
+        self.sim_rate = sim_rate
+        self.render_rate = render_rate
+        self.streamer = StateStreamServer(port=stream_port) if stream_port is not None else None
+        self.report_memory = report_memory
+        self.memory = MemoryMonitor()
+        if report_memory:
+            self.memory.start()
+        self.db_manager = None
+        self.views = ViewRegistry(self)
+        self.views.register("menu", lambda: MenuView(self.db_manager))
+        self.views.register("game", lambda: GameView(DIFFICULTY_EASY, DIFFICULTY_NAMES[DIFFICULTY_EASY],
+                                                           self.db_manager))
+        self.views.register("pause", lambda: PauseView(self.views.get("game")))
+        self.loader = StartupLoader(DB_FILE)
+        self.show_view(LoadingView(self.loader, (
+            ("connect", self.open_database),
+            ("atlas", lambda: asset_manager.preload(self.ctx.default_atlas)),
+            ("menu_view", lambda: self.views.get("menu")),
+            ("game_view", lambda: self.views.get("game")),
+            ("pause_view", lambda: self.views.get("pause")),
+        )))
+
+    def open_database(self):
+        self.db_manager = DatabaseManager(self.loader.db_file, prepared=True)
+
+    def startup_ready(self):
+        self.views.show("menu")
+        timings = self.startup_timings
+        timings.update(self.loader.timings)
+        timings["ready"] = time.perf_counter() - self.startup_start
+        if self.report_timings:
+            print("startup ms: " + ", ".join(f"{name} {elapsed * 1000:.1f}" for name, elapsed in timings.items()))
+
+    def on_close(self):
+        if self.report_timings:
+            print(json.dumps(self.views.report(), indent=2))
+        if self.report_memory:
+            print(json.dumps(memory_report(self), ensure_ascii=False, indent=2))
+            self.memory.stop()
+        game_view = self.views.views.get("game")
+        if game_view is not None:
+            if self.views.current in ("game", "pause") and not game_view.sim.is_game_over:
+                game_view.autosave()
+                game_view.record_score()
+            game_view.telemetry.finish(game_view.sim)
+            game_view.autosaver.close()
+        self.loader.done.wait()
+        if self.db_manager is not None:
+            self.db_manager.flush()
+            self.db_manager.close()
+        if self.streamer is not None:
+            self.streamer.close()
+        super().on_close()
 
 
 def main():
-    game = MyGame(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE)
-    arcade.run()
+    parser = argparse.ArgumentParser(description=SCREEN_TITLE)
+    parser.add_argument("--bench-collisions", action="store_true")
+    parser.add_argument("--bench-simulation", action="store_true")
+    parser.add_argument("--bench-particles", action="store_true")
+    parser.add_argument("--bench-profiler", action="store_true")
+    parser.add_argument("--bench-pooling", action="store_true")
+    parser.add_argument("--bench-sprite-writes", action="store_true")
+    parser.add_argument("--bench-quality", action="store_true")
+    parser.add_argument("--bench-snapshots", action="store_true")
+    parser.add_argument("--bench-scheduler", action="store_true")
+    parser.add_argument("--bench-telemetry", action="store_true")
+    parser.add_argument("--telemetry-report", action="store_true")
+    parser.add_argument("--bench-score-writes", action="store_true")
+    parser.add_argument("--bench-leaderboard", action="store_true")
+    parser.add_argument("--bench-suite", action="store_true")
+    parser.add_argument("--scenario", action="append")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=BENCHMARK_THRESHOLD)
+    parser.add_argument("--asset-stats", action="store_true")
+    parser.add_argument("--bench-timestep", action="store_true")
+    parser.add_argument("--bench-tunneling", action="store_true")
+    parser.add_argument("--replay")
+    parser.add_argument("--seek", type=int)
+    parser.add_argument("--profile-recordings", nargs="+")
+    parser.add_argument("--batch", type=int, metavar="GAMES")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--difficulty", action="append", choices=DIFFICULTIES)
+    parser.add_argument("--set", action="append", metavar="NAME=VALUE")
+    parser.add_argument("--max-seconds", type=float, default=BATCH_MAX_SECONDS)
+    parser.add_argument("--batch-output", default=BATCH_RESULTS_FILE)
+    parser.add_argument("--bench-batch-scaling", action="store_true")
+    parser.add_argument("--serve-harness", type=int, metavar="SESSIONS")
+    parser.add_argument("--stream-port", type=int)
+    parser.add_argument("--spectate", type=int, metavar="PORT")
+    parser.add_argument("--bench-stream", action="store_true")
+    parser.add_argument("--server-seconds", type=float, default=10)
+    parser.add_argument("--tick-rate", type=float, default=SERVER_TICK_RATE)
+    parser.add_argument("--sim-rate", type=float, default=SIM_TICK_RATE)
+    parser.add_argument("--render-rate", type=float, default=RENDER_RATE)
+    parser.add_argument("--startup-stats", action="store_true")
+    parser.add_argument("--memory-stats", action="store_true")
+    parser.add_argument("--bench-soak", action="store_true")
+    parser.add_argument("--soak-cycles", type=int, default=SOAK_CYCLES)
+    args = parser.parse_args()
+    if args.bench_collisions:
+        benchmark_collision_broadphase()
+    elif args.bench_simulation:
+        benchmark_simulation()
+    elif args.bench_particles:
+        benchmark_particles()
+    elif args.bench_profiler:
+        benchmark_profiler_overhead()
+    elif args.bench_pooling:
+        benchmark_pooling()
+    elif args.bench_sprite_writes:
+        benchmark_sprite_writes()
+    elif args.bench_telemetry:
+        benchmark_telemetry()
+    elif args.telemetry_report:
+        print_telemetry_report()
+    elif args.bench_scheduler:
+        benchmark_scheduler()
+    elif args.bench_snapshots:
+        if not benchmark_snapshots():
+            sys.exit(1)
+    elif args.bench_quality:
+        if not benchmark_quality_governor(render_rate=args.render_rate):
+            sys.exit(1)
+    elif args.bench_score_writes:
+        benchmark_score_writes()
+    elif args.bench_leaderboard:
+        benchmark_leaderboard()
+    elif args.bench_suite:
+        if not benchmark_suite(args.scenario, args.save_baseline, args.threshold):
+            sys.exit(1)
+    elif args.bench_soak:
+        if not benchmark_memory_soak(args.soak_cycles):
+            sys.exit(1)
+    elif args.asset_stats:
+        asset_manager.preload()
+        print(asset_manager.stats())
+    elif args.bench_timestep:
+        if not benchmark_timestep(sim_rate=args.sim_rate):
+            sys.exit(1)
+    elif args.bench_tunneling:
+        benchmark_tunneling()
+    elif args.replay:
+        if not replay_recording(args.replay, args.seek):
+            sys.exit(1)
+    elif args.profile_recordings:
+        if not profile_recordings(args.profile_recordings):
+            sys.exit(1)
+    elif args.batch:
+        summary, elapsed = run_batch(args.batch, args.difficulty or DIFFICULTIES, args.workers,
+                                     settings=parse_settings(args.set), sim_rate=args.sim_rate,
+                                     max_seconds=args.max_seconds, output=args.batch_output)
+        print_batch_summary(summary, elapsed)
+    elif args.bench_batch_scaling:
+        benchmark_batch_scaling()
+    elif args.serve_harness:
+        run_server_harness(args.serve_harness, args.server_seconds, args.tick_rate)
+    elif args.bench_stream:
+        if not benchmark_stream():
+            sys.exit(1)
+    elif args.spectate:
+        window = arcade.Window(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE)
+        asset_manager.preload(window.ctx.default_atlas)
+        window.show_view(SpectatorView(StateStreamClient(port=args.spectate)))
+        arcade.run()
+    else:
+        game = MyGame(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE, args.sim_rate, args.render_rate, args.stream_port,
+                      args.startup_stats, args.memory_stats)
+        arcade.run()
 
 
 if __name__ == "__main__":
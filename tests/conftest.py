@@ -0,0 +1,53 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("ARCADE_HEADLESS", "1")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+spec = importlib.util.spec_from_file_location("dfвgd", os.path.join(ROOT, "dfвgd.py"))
+game = importlib.util.module_from_spec(spec)
+sys.modules[spec.name] = game
+spec.loader.exec_module(game)
+
+
+@pytest.fixture
+def module():
+    return game
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def play(module):
+    def play(seed, ticks, sim_rate=module.SIM_TICK_RATE, high_score=0, god_mode=False):
+        sim = module.GameSimulation(module.DIFFICULTY_HARD, seed, high_score)
+        if god_mode:
+            module.enable_god_mode(sim)
+        particles = module.ParticleSystem(seed=seed)
+        recorder = module.InputRecorder(seed, module.DIFFICULTY_HARD, sim_rate)
+        for tick in range(ticks):
+            inputs = module.scripted_input(tick)
+            recorder.record(inputs)
+            for event in sim.step(1 / sim_rate, inputs):
+                if event[0] == module.EVENT_METEORITE_DESTROYED:
+                    particles.emit(event[1], event[2])
+            particles.update(1 / sim_rate)
+            if sim.is_game_over:
+                break
+        return sim, particles, recorder
+
+    return play
+
+
+@pytest.fixture
+def textures(module):
+    missing = [name for name in module.TEXTURE_FILES if not os.path.exists(os.path.join(module.ASSET_DIR, name))]
+    if missing:
+        pytest.skip(f"missing textures: {', '.join(missing)}")
@@ -0,0 +1,85 @@
+import random
+
+
+def random_box(rng, size):
+    left = rng.uniform(-200, 2200)
+    bottom = rng.uniform(-200, 1200)
+    return left, bottom, left + rng.uniform(1, size), bottom + rng.uniform(1, size)
+
+
+def overlaps(box, other):
+    return other[0] <= box[2] and other[2] >= box[0] and other[1] <= box[3] and other[3] >= box[1]
+
+
+def test_spatial_hash_matches_brute_force(module):
+    rng = random.Random(11)
+    grid = module.SpatialHash()
+    boxes = {}
+    for item in range(300):
+        boxes[item] = random_box(rng, 300)
+        grid.insert(item, *boxes[item])
+    for _ in range(5):
+        for item in rng.sample(sorted(boxes), 100):
+            boxes[item] = random_box(rng, 300)
+            grid.move(item, *boxes[item])
+        for item in rng.sample(sorted(boxes), 20):
+            del boxes[item]
+            grid.remove(item)
+        for _ in range(200):
+            query = random_box(rng, 400)
+            expected = [item for item in sorted(boxes, key=lambda item: grid.entries[item][0])
+                        if overlaps(query, boxes[item])]
+            assert grid.query(*query) == expected
+    assert set(grid.entries) == set(boxes)
+    assert all(grid.cells.values())
+
+
+def test_sprite_collisions_match_list_scan(module):
+    rng = random.Random(5)
+    meteorites = module.arcade.SpriteList()
+    bullets = []
+    for _ in range(60):
+        meteorite = module.Meteorite()
+        meteorite.position = rng.uniform(0, module.SCREEN_WIDTH), rng.uniform(0, module.SCREEN_HEIGHT)
+        meteorites.append(meteorite)
+    for _ in range(120):
+        bullet = module.Bullet()
+        bullet.position = rng.uniform(0, module.SCREEN_WIDTH), rng.uniform(0, module.SCREEN_HEIGHT)
+        bullets.append(bullet)
+    grid = module.SpatialHash()
+    grid.update_items(meteorites)
+    hits = [grid.check_for_collision(bullet) for bullet in bullets]
+    assert any(hits)
+    assert hits == [module.arcade.check_for_collision_with_list(bullet, meteorites, method=3) for bullet in bullets]
+
+
+def test_sweep_catches_bullet_that_jumps_over_meteorite(module):
+    bullet = module.get_hit_shape("bullet")
+    meteorite = module.get_hit_shape("meteorite")
+    start = (-200.0, 0.0)
+    end = (200.0, 0.0)
+    assert not module.shapes_collide(bullet, *start, meteorite, 0.0, 0.0)
+    assert not module.shapes_collide(bullet, *end, meteorite, 0.0, 0.0)
+    assert module.shapes_sweep_collide(bullet, start, end, meteorite, (0.0, 0.0), (0.0, 0.0))
+    assert module.shapes_sweep_collide(bullet, start, end, meteorite, (40.0, 0.0), (-40.0, 0.0))
+
+
+def test_sweep_rejects_paths_that_miss(module):
+    bullet = module.get_hit_shape("bullet")
+    meteorite = module.get_hit_shape("meteorite")
+    assert not module.shapes_sweep_collide(bullet, (-200.0, 80.0), (200.0, 80.0), meteorite, (0.0, 0.0), (0.0, 0.0))
+    assert not module.shapes_sweep_collide(bullet, (-200.0, 0.0), (-120.0, 0.0), meteorite, (0.0, 0.0), (0.0, 0.0))
+    assert not module.shapes_sweep_collide(bullet, (-200.0, -200.0), (200.0, 200.0), meteorite,
+                                           (0.0, 150.0), (0.0, 150.0))
+
+
+def test_swept_mode_stops_tunneling_at_low_tick_rates(module):
+    sim_rate = 15
+    hits = {}
+    for collision_mode in module.COLLISION_MODES:
+        sim = module.GameSimulation(module.DIFFICULTY_HARD, 1, collision_mode=collision_mode)
+        module.enable_god_mode(sim)
+        for tick in range(60 * sim_rate):
+            sim.step(1 / sim_rate, module.scripted_input(tick * module.REFERENCE_FRAME_RATE // sim_rate))
+        hits[collision_mode] = sim.hits_landed
+    assert hits[module.COLLISION_SWEPT] > hits[module.COLLISION_DISCRETE]
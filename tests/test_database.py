@@ -0,0 +1,154 @@
+import sqlite3
+import time
+
+import pytest
+
+
+@pytest.fixture
+def db(module, tmp_path):
+    manager = module.DatabaseManager(str(tmp_path / "scores.db"), retention=3)
+    yield manager
+    manager.close()
+
+
+def test_scores_write_behind(module, db):
+    db.write_delay = 0.2
+    start = time.perf_counter()
+    assert db.add_run_score(module.DIFFICULTY_EASY, 40)
+    assert not db.add_run_score(module.DIFFICULTY_EASY, 10)
+    assert time.perf_counter() - start < db.write_delay
+    assert db.get_high_score(module.DIFFICULTY_EASY) == 40
+    assert db.flush(5)
+    rows, _ = db.get_leaderboard(module.DIFFICULTY_EASY)
+    assert [score for _, score, _ in rows] == [40, 10]
+    assert db.writes == 2 and db.failed_writes == 0
+
+
+def test_scores_survive_reopen(module, db, tmp_path):
+    for score in (5, 30, 20, 10, 25):
+        db.add_run_score(module.DIFFICULTY_HARD, score)
+    db.close()
+    reopened = module.DatabaseManager(str(tmp_path / "scores.db"), retention=3)
+    try:
+        assert reopened.get_high_score(module.DIFFICULTY_HARD) == 30
+        rows, _ = reopened.get_leaderboard(module.DIFFICULTY_HARD)
+        assert [score for _, score, _ in rows] == [30, 25, 20]
+    finally:
+        reopened.close()
+
+
+def test_reset_clears_scores(module, db):
+    db.add_run_score(module.DIFFICULTY_MEDIUM, 15)
+    db.reset_scores()
+    assert db.get_all_high_scores() == {}
+    assert db.flush(5)
+    assert db.get_leaderboard(module.DIFFICULTY_MEDIUM) == ([], None)
+
+
+def test_record_updates_coalesce_into_one_row(module, db):
+    db.write_delay = 0.2
+    run = db.begin_run()
+    for score in range(10, 110, 10):
+        assert db.update_run_score(run, module.DIFFICULTY_EASY, score)
+    assert db.pending_writes() == 1
+    assert db.flush(5)
+    assert db.writes == 1
+    db.write_delay = 0.0
+    db.update_run_score(run, module.DIFFICULTY_EASY, 120)
+    db.add_run_score(module.DIFFICULTY_EASY, 130, run)
+    assert db.flush(5)
+    rows, _ = db.get_leaderboard(module.DIFFICULTY_EASY)
+    assert [score for _, score, _ in rows] == [130]
+
+
+def test_resumed_run_keeps_its_row(module, db, tmp_path):
+    run = db.begin_run()
+    db.update_run_score(run, module.DIFFICULTY_HARD, 60)
+    db.close()
+    reopened = module.DatabaseManager(str(tmp_path / "scores.db"), retention=3)
+    try:
+        resumed = reopened.begin_run((module.DIFFICULTY_HARD, 60))
+        reopened.add_run_score(module.DIFFICULTY_HARD, 90, resumed)
+        reopened.add_run_score(module.DIFFICULTY_HARD, 20)
+        assert reopened.flush(5)
+        rows, _ = reopened.get_leaderboard(module.DIFFICULTY_HARD)
+        assert [score for _, score, _ in rows] == [90, 20]
+    finally:
+        reopened.close()
+
+
+def test_window_close_keeps_live_record(module, textures, tmp_path):
+    window = module.MyGame(module.SCREEN_WIDTH, module.SCREEN_HEIGHT, module.SCREEN_TITLE)
+    window.loader.done.wait()
+    window.open_database()
+    window.views.show("menu")
+    window.current_view.on_key_press(module.arcade.key.SPACE, 0)
+    game = window.current_view
+    module.enable_god_mode(game.sim)
+    frame = 0
+    while game.sim.score < 60:
+        game.up_pressed = bool(module.scripted_input(frame) & module.INPUT_UP)
+        game.down_pressed = bool(module.scripted_input(frame) & module.INPUT_DOWN)
+        game.on_update(1 / 60)
+        frame += 1
+    window.on_close()
+    with sqlite3.connect(str(tmp_path / module.DB_FILE)) as conn:
+        rows = conn.execute("SELECT score FROM high_scores").fetchall()
+    assert rows == [(game.sim.score,)]
+
+
+@pytest.fixture
+def leaderboard(module, tmp_path):
+    manager = module.DatabaseManager(str(tmp_path / "leaderboard.db"), retention=0)
+    for index in range(25):
+        manager.add_run_score(module.DIFFICULTY_EASY, (index * 7) % 10 * 10)
+        manager.add_run_score(module.DIFFICULTY_HARD, index)
+    assert manager.flush(5)
+    yield manager
+    manager.close()
+
+
+def test_leaderboard_pages_cover_every_row_once(module, leaderboard):
+    rows, next_page = leaderboard.get_leaderboard(module.DIFFICULTY_EASY, limit=100)
+    assert next_page is None and len(rows) == 25
+    expected = sorted(rows, key=lambda row: (-row[1], row[0]))
+    assert rows == expected
+    paged = []
+    after = None
+    while True:
+        page, after = leaderboard.get_leaderboard(module.DIFFICULTY_EASY, limit=4, after=after)
+        paged.extend(page)
+        if after is None:
+            break
+        assert len(page) == 4
+    assert paged == expected
+
+
+def test_rank_counts_strictly_better_scores(module, leaderboard):
+    rows, _ = leaderboard.get_leaderboard(module.DIFFICULTY_EASY, limit=100)
+    scores = [score for _, score, _ in rows]
+    for score in (95, 90, 50, 0, -1):
+        assert leaderboard.get_rank(module.DIFFICULTY_EASY, score) == 1 + sum(other > score for other in scores)
+    assert leaderboard.get_rank(module.DIFFICULTY_MEDIUM, 10) == 1
+
+
+def test_prune_keeps_top_rows_per_difficulty(module, leaderboard):
+    easy_before, _ = leaderboard.get_leaderboard(module.DIFFICULTY_EASY, limit=100)
+    leaderboard.prune(keep=5)
+    assert leaderboard.flush(5)
+    easy, _ = leaderboard.get_leaderboard(module.DIFFICULTY_EASY, limit=100)
+    hard, _ = leaderboard.get_leaderboard(module.DIFFICULTY_HARD, limit=100)
+    assert easy == easy_before[:5]
+    assert [score for _, score, _ in hard] == [24, 23, 22, 21, 20]
+
+
+def test_leaderboard_query_uses_the_index(module, leaderboard):
+    plan = " ".join(row[-1] for row in leaderboard.conn.execute('''
+        EXPLAIN QUERY PLAN
+        SELECT id, score, timestamp FROM high_scores
+        WHERE difficulty = ?
+        ORDER BY score DESC, id
+        LIMIT ?
+    ''', (module.DIFFICULTY_EASY, 10)))
+    assert "idx_high_scores_difficulty_score" in plan
+    assert "TEMP B-TREE" not in plan
@@ -0,0 +1,36 @@
+RUNS = 5
+
+
+def test_monitor_flags_growth(module):
+    monitor = module.MemoryMonitor(runs=RUNS, threshold_kib=64)
+    monitor.start()
+    retained = []
+    try:
+        for _ in range(RUNS * 2):
+            retained.append(bytearray(64 * 1024))
+            monitor.record_run()
+    finally:
+        monitor.stop()
+    assert monitor.leaking
+    assert monitor.stats()["growth_kib"] >= RUNS * 64
+
+
+def test_simulation_soak_does_not_grow(module, play):
+    monitor = module.MemoryMonitor(runs=RUNS, threshold_kib=64)
+    monitor.start()
+    try:
+        for seed in range(RUNS * 3):
+            sim, particles, recorder = play(seed, 600)
+            module.restore_snapshot(module.pack_snapshot(sim, particles, recorder), module.ParticleSystem())
+            monitor.record_run()
+    finally:
+        monitor.stop()
+    assert monitor.growth() is not None
+    assert not monitor.leaking, monitor.stats()
+
+
+def test_window_soak_does_not_grow(module, textures):
+    frames = 60
+    draw_interval = 10
+    warmup = module.QUALITY_WINDOW // (frames // draw_interval) + 2
+    assert module.benchmark_memory_soak(cycles=warmup + 8, frames=frames, draw_interval=draw_interval, warmup=warmup)
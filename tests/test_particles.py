@@ -0,0 +1,60 @@
+import numpy as np
+
+
+class ReferenceParticle:
+    def __init__(self, system, index):
+        self.x, self.y = system.position[index].tolist()
+        self.change_x, self.change_y = system.velocity[index].tolist()
+        self.lifetime = float(system.lifetime[index])
+        self.initial_lifetime = float(system.duration[index])
+        self.alpha = 255
+
+    def update(self, delta_time):
+        self.x += self.change_x
+        self.y += self.change_y
+        self.lifetime -= delta_time
+        if self.lifetime <= 0:
+            return False
+        self.alpha = max(0, int(255 * (self.lifetime / self.initial_lifetime)))
+        self.change_x *= 0.98
+        self.change_y *= 0.98
+        self.change_y -= 0.1
+        return True
+
+
+def emit(system, reference, x, y, count, lifetime):
+    start = len(system)
+    system.emit(x, y, count, lifetime)
+    reference.extend(ReferenceParticle(system, index) for index in range(start, len(system)))
+
+
+def test_update_matches_per_particle_reference(module):
+    system = module.ParticleSystem(capacity=16, seed=4)
+    reference = []
+    delta_time = 1 / module.REFERENCE_FRAME_RATE
+    for frame in range(150):
+        if frame % 20 == 0:
+            emit(system, reference, 100.0 + frame, 200.0, 15, module.PARTICLE_LIFETIME * (1 + frame % 3) / 2 + 0.005)
+        system.update(delta_time)
+        reference = [particle for particle in reference if particle.update(delta_time)]
+        assert len(system) == len(reference)
+        count = len(system)
+        np.testing.assert_allclose(system.position[:count], [(p.x, p.y) for p in reference], rtol=1e-4, atol=1e-2)
+        np.testing.assert_allclose(system.velocity[:count], [(p.change_x, p.change_y) for p in reference],
+                                   rtol=1e-4, atol=1e-4)
+        alpha = np.rint(system.color[:count, 3] * 255)
+        assert np.abs(alpha - [p.alpha for p in reference]).max(initial=0) <= 1
+    assert system.capacity > 16
+
+
+def test_emit_is_seeded_and_update_drops_expired(module):
+    first = module.ParticleSystem(seed=9)
+    second = module.ParticleSystem(seed=9)
+    first.emit(10, 20)
+    second.emit(10, 20)
+    assert np.array_equal(first.velocity[:len(first)], second.velocity[:len(second)])
+    assert np.array_equal(first.color[:len(first)], second.color[:len(second)])
+    first.emit(30, 40, lifetime=0.05)
+    first.update(0.1)
+    assert len(first) == module.PARTICLE_COUNT
+    assert first.pack_vertices().shape == (module.PARTICLE_COUNT, 7)
@@ -0,0 +1,48 @@
+BUDGET = 1 / 60
+
+
+def feed(governor, frame_time, frames):
+    levels = []
+    for _ in range(frames):
+        governor.record(frame_time)
+        levels.append(governor.level)
+    return levels
+
+
+def test_governor_steps_down_under_load(module):
+    governor = module.QualityGovernor(BUDGET)
+    levels = feed(governor, BUDGET * 2, module.QUALITY_WINDOW * len(module.QUALITY_LEVELS) * 2)
+    assert levels[module.QUALITY_WINDOW - 2] == 0
+    assert governor.level == len(module.QUALITY_LEVELS) - 1
+    assert levels == sorted(levels)
+    assert governor.throttles == len(module.QUALITY_LEVELS) - 1
+    assert governor.particle_count() < module.PARTICLE_COUNT
+
+
+def test_governor_steps_back_up_after_headroom(module):
+    governor = module.QualityGovernor(BUDGET)
+    feed(governor, BUDGET * 2, module.QUALITY_WINDOW * len(module.QUALITY_LEVELS) * 2)
+    levels = feed(governor, BUDGET * 0.1, (module.QUALITY_WINDOW + module.QUALITY_RESTORE_DELAY) *
+                  len(module.QUALITY_LEVELS) * 2)
+    assert governor.level == 0
+    assert levels == sorted(levels, reverse=True)
+    assert governor.restores == len(module.QUALITY_LEVELS) - 1
+    assert governor.settings == module.QUALITY_LEVELS[0]
+    assert [decision["to"] for decision in governor.stats()["decisions"]] == \
+        list(range(1, len(module.QUALITY_LEVELS))) + list(range(len(module.QUALITY_LEVELS) - 2, -1, -1))
+
+
+def test_governor_holds_level_inside_band(module):
+    governor = module.QualityGovernor(BUDGET)
+    feed(governor, BUDGET * 2, module.QUALITY_WINDOW)
+    level = governor.level
+    feed(governor, BUDGET * (module.QUALITY_RESTORE_RATIO + module.QUALITY_THROTTLE_RATIO) / 2,
+         module.QUALITY_WINDOW * 10)
+    assert governor.level == level == 1
+
+
+def test_disabled_governor_never_throttles(module):
+    governor = module.QualityGovernor(BUDGET, enabled=False)
+    feed(governor, BUDGET * 4, module.QUALITY_WINDOW * 4)
+    assert governor.level == 0
+    assert governor.frames == module.QUALITY_WINDOW * 4
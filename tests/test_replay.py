@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+TICKS = 900
+
+
+@pytest.fixture
+def recorded(play, tmp_path):
+    path = str(tmp_path / "run.dfr")
+    sim, _, recorder = play(7, TICKS)
+    recorder.save(path, sim)
+    return path, sim, recorder
+
+
+def test_recording_round_trip(module, recorded):
+    path, sim, recorder = recorded
+    recording = module.Recording.load(path)
+    assert (recording.seed, recording.difficulty_id, recording.sim_rate) == (7, module.DIFFICULTY_HARD,
+                                                                              module.SIM_TICK_RATE)
+    assert len(recording) == len(recorder) == sim.tick
+    assert recording.summary["score"] == sim.score
+
+
+def test_replay_verifies(module, recorded):
+    path, sim, _ = recorded
+    session = module.ReplaySession(module.Recording.load(path))
+    replayed = session.run()
+    assert session.mismatches() == {}
+    assert (replayed.score, replayed.kills, replayed.player_health) == (sim.score, sim.kills, sim.player_health)
+
+
+def test_replay_seek_backwards(module, recorded):
+    path, _, _ = recorded
+    session = module.ReplaySession(module.Recording.load(path))
+    session.run()
+    assert session.seek(TICKS // 3).tick == TICKS // 3
+    session.run()
+    assert session.mismatches() == {}
+
+
+def test_replay_detects_divergence(module, recorded):
+    path, _, _ = recorded
+    recording = module.Recording.load(path)
+    recording.summary["score"] += 10
+    session = module.ReplaySession(recording)
+    session.run()
+    assert set(session.mismatches()) == {"score"}
+
+
+def test_replay_recording_command(module, recorded):
+    path, _, _ = recorded
+    assert module.replay_recording(path)
+    assert module.replay_recording(path, seek=TICKS // 2)
+
+
+def test_prune_recordings_keeps_newest(module, tmp_path):
+    for index in range(5):
+        path = tmp_path / f"run{index}.dfr"
+        path.write_bytes(b"")
+        os.utime(path, (index, index))
+    assert module.prune_recordings(str(tmp_path), keep=2) == 3
+    assert sorted(os.listdir(tmp_path)) == ["run3.dfr", "run4.dfr"]
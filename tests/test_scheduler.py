@@ -0,0 +1,46 @@
+import random
+
+
+def test_due_fires_in_time_then_schedule_order(module):
+    scheduler = module.Scheduler()
+    rng = random.Random(8)
+    expected = []
+    for payload in range(200):
+        due = rng.choice((0.5, 1.0, 1.5, rng.uniform(0, 3)))
+        entry = scheduler.schedule(due, module.TIMER_FLASH_END, payload)
+        expected.append((due, entry[1], payload))
+    expected.sort()
+    fired = []
+    for now in (0.25, 0.5, 1.0, 2.0, 3.0):
+        batch = [(entry[0], entry[1], entry[3]) for entry in scheduler.due(now)]
+        assert all(due <= now + module.TIMER_EPSILON for due, _, _ in batch)
+        fired.extend(batch)
+    assert fired == expected
+    assert len(scheduler) == 0 and scheduler.fired == 200
+
+
+def test_cancelled_timers_never_fire(module):
+    scheduler = module.Scheduler()
+    entries = [scheduler.schedule(index * 0.1, module.TIMER_SPAWN, index) for index in range(10)]
+    for entry in entries[::2]:
+        scheduler.cancel(entry)
+    scheduler.cancel(entries[0])
+    scheduler.cancel(None)
+    assert len(scheduler) == 5 and scheduler.cancelled == 5
+    assert [entry[3] for entry in scheduler.entries()] == [1, 3, 5, 7, 9]
+    assert [entry[3] for entry in scheduler.due(1.0)] == [1, 3, 5, 7, 9]
+    scheduler.cancel(entries[1])
+    assert scheduler.cancelled == 5 and len(scheduler) == 0
+
+
+def test_timer_scheduled_while_firing_waits_for_its_due_time(module):
+    scheduler = module.Scheduler()
+    scheduler.schedule(0.1, module.TIMER_SHOT)
+    fired = []
+    for step in range(1, 6):
+        now = step * 0.1
+        for entry in scheduler.due(now):
+            fired.append(round(now, 6))
+            scheduler.schedule(entry[0] + 0.2, module.TIMER_SHOT)
+    assert fired == [0.1, 0.3, 0.5]
+    assert len(scheduler) == 1
@@ -0,0 +1,23 @@
+import pytest
+
+
+def test_simulation_runs_without_textures(module, monkeypatch, tmp_path):
+    def load_texture(*args, **kwargs):
+        raise AssertionError("the simulation loaded a texture")
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(module.arcade, "load_texture", load_texture)
+    monkeypatch.setattr(module, "HIT_SHAPES", {})
+    sim = module.GameSimulation(module.DIFFICULTY_HARD, 5)
+    module.enable_god_mode(sim)
+    for tick in range(1200):
+        sim.step(1 / module.SIM_TICK_RATE, module.scripted_input(tick))
+    assert sim.shots_fired and len(sim.meteorites)
+
+
+@pytest.mark.parametrize("kind, sprite", [("player", "Player"), ("meteorite", "Meteorite"), ("bullet", "Bullet")])
+def test_hit_shapes_match_sprites(module, kind, sprite):
+    shape = module.get_hit_shape(kind)
+    expected = module.HitShape.from_sprite(getattr(module, sprite)())
+    assert shape.points == expected.points
+    assert shape.radius == expected.radius
@@ -0,0 +1,110 @@
+import os
+
+import pytest
+
+TICKS = 1050
+
+
+@pytest.fixture
+def game_state(play):
+    return play(3, TICKS, high_score=120, god_mode=True)
+
+
+def test_snapshot_load_is_identical(module, game_state, tmp_path):
+    path = str(tmp_path / "save.dfs")
+    sim, particles, recorder = game_state
+    assert sim.score and len(particles) and len(sim.bullets)
+    data = module.pack_snapshot(sim, particles, recorder)
+    module.save_snapshot(path, data)
+    restored_particles = module.ParticleSystem()
+    restored, restored_recorder = module.load_snapshot(path, restored_particles)
+    assert module.pack_snapshot(restored, restored_particles, restored_recorder) == data
+    assert restored_recorder.runs == recorder.runs
+    assert len(restored.meteorites) == len(sim.meteorites)
+    assert (restored.tick, restored.score, restored.player_health) == (sim.tick, sim.score, sim.player_health)
+
+
+def test_restored_game_stays_in_step(module, game_state, tmp_path):
+    path = str(tmp_path / "save.dfs")
+    sim, particles, recorder = game_state
+    module.save_snapshot(path, module.pack_snapshot(sim, particles, recorder))
+    restored, restored_recorder = module.load_snapshot(path)
+    for tick in range(TICKS, TICKS * 2):
+        inputs = module.scripted_input(tick)
+        sim.step(1 / module.SIM_TICK_RATE, inputs)
+        restored.step(1 / module.SIM_TICK_RATE, inputs)
+    assert module.pack_snapshot(restored) == module.pack_snapshot(sim)
+
+
+def test_snapshot_keeps_sim_rate(module, play, tmp_path):
+    path = str(tmp_path / "save.dfs")
+    sim, particles, recorder = play(3, TICKS, sim_rate=240, god_mode=True)
+    module.save_snapshot(path, module.pack_snapshot(sim, particles, recorder, sim_rate=240))
+    _, restored_recorder = module.load_snapshot(path)
+    assert restored_recorder.sim_rate == 240
+
+
+def test_peek_snapshot(module, game_state, tmp_path):
+    path = str(tmp_path / "save.dfs")
+    sim, _, _ = game_state
+    module.save_snapshot(path, module.pack_snapshot(sim))
+    assert module.peek_snapshot(path) == {"difficulty": module.DIFFICULTY_HARD, "score": sim.score, "tick": sim.tick}
+    assert module.peek_snapshot(str(tmp_path / "missing.dfs")) is None
+
+
+def test_truncated_snapshot_is_rejected(module, game_state, tmp_path):
+    path = str(tmp_path / "save.dfs")
+    sim, particles, recorder = game_state
+    data = module.pack_snapshot(sim, particles, recorder)
+    with pytest.raises(ValueError):
+        module.restore_snapshot(data[:16])
+    module.save_snapshot(path, data[:-1])
+    assert module.peek_snapshot(path) is None
+    with pytest.raises(ValueError):
+        module.load_snapshot(path)
+
+
+def test_unknown_difficulty_is_rejected(module, game_state, tmp_path):
+    path = str(tmp_path / "save.dfs")
+    sim, _, _ = game_state
+    data = bytearray(module.pack_snapshot(sim))
+    offset = module.SNAPSHOT_HEADER.fields["difficulty"][1]
+    data[offset:offset + 4] = b"bogu"
+    module.save_snapshot(path, bytes(data))
+    assert module.peek_snapshot(path) is None
+    with pytest.raises(ValueError):
+        module.load_snapshot(path)
+
+
+def test_autosaver_writes_and_discards(module, game_state, tmp_path):
+    path = str(tmp_path / "autosave.dfs")
+    sim, _, _ = game_state
+    autosaver = module.SnapshotAutosaver(path)
+    try:
+        autosaver.save(module.pack_snapshot(sim))
+        assert autosaver.flush(5)
+        assert module.peek_snapshot(path)["tick"] == sim.tick
+        autosaver.discard()
+        assert autosaver.flush(5)
+        assert module.peek_snapshot(path) is None
+    finally:
+        autosaver.close()
+
+
+def test_menu_drops_autosave_that_fails_to_load(module, textures, game_state):
+    sim, particles, recorder = game_state
+    data = module.pack_snapshot(sim, particles, recorder)
+    module.save_snapshot(module.SNAPSHOT_FILE, data)
+    window = module.MyGame(module.SCREEN_WIDTH, module.SCREEN_HEIGHT, module.SCREEN_TITLE)
+    try:
+        window.loader.done.wait()
+        window.open_database()
+        menu = window.views.show("menu")
+        assert menu.saved_game is not None
+        module.save_snapshot(module.SNAPSHOT_FILE, data[:-1])
+        menu.on_key_press(module.arcade.key.L, 0)
+        assert window.views.current == "menu"
+        assert menu.saved_game is None
+        assert not os.path.exists(module.SNAPSHOT_FILE)
+    finally:
+        window.on_close()
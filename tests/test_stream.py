@@ -0,0 +1,56 @@
+import random
+
+import numpy as np
+
+
+def assert_mirrors(module, state, sim):
+    assert (state.tick, state.score, state.health) == (sim.tick, sim.score, sim.player_health)
+    assert (state.player_x, state.player_y) == tuple(
+        module.quantize(np.array((sim.player.center_x, sim.player.center_y))).tolist())
+    for kind in module.StreamState.kinds:
+        store = getattr(sim, kind)
+        entities = getattr(state, kind)
+        assert np.array_equal(entities.ids, store.ids[:store.count])
+        assert np.array_equal(entities.position[:, 0], module.quantize(store.x[:store.count]))
+        assert np.array_equal(entities.position[:, 1], module.quantize(store.y[:store.count]))
+
+
+def test_deltas_round_trip(module):
+    rng = random.Random(2)
+    sim = module.GameSimulation(module.DIFFICULTY_HARD, 2)
+    module.enable_god_mode(sim)
+    encoder = module.StateEncoder()
+    decoder = module.StateDecoder()
+    assert decoder.apply(encoder.keyframe(sim.tick))
+    sizes = []
+    for tick in range(900):
+        if tick % 150 == 0:
+            module.fill_meteorites(sim, len(sim.meteorites) + 40, rng)
+        sim.step(1 / module.SIM_TICK_RATE, module.scripted_input(tick))
+        frame = encoder.encode(sim)
+        sizes.append(len(frame))
+        assert decoder.apply(frame)
+        assert_mirrors(module, decoder.state, sim)
+    assert np.median(sizes) < len(encoder.keyframe()) / 4
+
+
+def test_client_joins_mid_stream(module):
+    sim = module.GameSimulation(module.DIFFICULTY_HARD, 3)
+    module.enable_god_mode(sim)
+    encoder = module.StateEncoder()
+    late = module.StateDecoder()
+    for tick in range(600):
+        sim.step(1 / module.SIM_TICK_RATE, module.scripted_input(tick))
+        frame = encoder.encode(sim)
+        if tick < 300:
+            continue
+        if tick == 300:
+            assert not late.apply(frame)
+            late.apply(encoder.keyframe())
+        else:
+            assert late.apply(frame)
+        assert_mirrors(module, late.state, sim)
+
+
+def test_socket_loopback_with_late_join(module):
+    assert module.verify_stream_loopback(ticks=600, join_tick=250)
@@ -0,0 +1,65 @@
+import pytest
+
+FRAMES = 750
+
+
+@pytest.fixture
+def db(module, tmp_path):
+    manager = module.DatabaseManager(str(tmp_path / "telemetry.db"))
+    yield manager
+    manager.close()
+
+
+def run_session(module, db, difficulty_id, seed, slow_every=0):
+    sim = module.GameSimulation(difficulty_id, seed)
+    module.enable_god_mode(sim)
+    telemetry = module.SessionTelemetry(db)
+    telemetry.start(sim)
+    for frame in range(FRAMES):
+        sim.step(1 / 60, module.scripted_input(frame))
+        telemetry.update(sim)
+        telemetry.record_frame(0.020 if slow_every and frame % slow_every == 0 else 0.004)
+    telemetry.finish(sim)
+    return sim
+
+
+def test_samples_are_written_in_batches(module, db, monkeypatch):
+    monkeypatch.setattr(module, "TELEMETRY_SAMPLE_INTERVAL", 1.0)
+    batches = []
+    record_telemetry = db.record_telemetry
+    monkeypatch.setattr(db, "record_telemetry", lambda session, samples: (
+        batches.append((session is not None, len(samples))), record_telemetry(session, samples)))
+    run_session(module, db, module.DIFFICULTY_HARD, 1)
+    assert batches == [(False, module.TELEMETRY_FLUSH_SAMPLES), (False, module.TELEMETRY_FLUSH_SAMPLES), (True, 3)]
+    assert db.flush(5)
+    assert db.conn.execute("SELECT COUNT(*) FROM session_samples").fetchone()[0] == 13
+    assert db.failed_writes == 0
+
+
+def test_rollups_summarise_sessions(module, db, monkeypatch):
+    monkeypatch.setattr(module, "TELEMETRY_SAMPLE_INTERVAL", 1.0)
+    hard = [run_session(module, db, module.DIFFICULTY_HARD, seed, slow_every=10) for seed in (1, 2)]
+    easy = run_session(module, db, module.DIFFICULTY_EASY, 3)
+    assert db.flush(5)
+    rollup = {row["difficulty"]: row for row in db.get_telemetry_rollup()}
+    assert set(rollup) == {module.DIFFICULTY_EASY, module.DIFFICULTY_HARD}
+    assert rollup[module.DIFFICULTY_HARD]["sessions"] == 2
+    assert rollup[module.DIFFICULTY_HARD]["avg_score"] == pytest.approx(sum(sim.score for sim in hard) / 2)
+    assert rollup[module.DIFFICULTY_HARD]["avg_kills"] == pytest.approx(sum(sim.kills for sim in hard) / 2)
+    assert rollup[module.DIFFICULTY_HARD]["avg_duration"] == pytest.approx(FRAMES / 60)
+    assert rollup[module.DIFFICULTY_EASY]["avg_shots"] == easy.shots_fired
+    assert rollup[module.DIFFICULTY_EASY]["avg_frame_p95"] == pytest.approx(4.05)
+    assert rollup[module.DIFFICULTY_HARD]["max_frame_p99"] == pytest.approx(20.05)
+    minutes = db.get_minute_rollup(module.DIFFICULTY_HARD)
+    assert [row["minute"] for row in minutes] == list(range(13))
+    assert all(row["sessions"] == 2 for row in minutes)
+
+
+def test_empty_session_writes_nothing(module, db):
+    sim = module.GameSimulation(module.DIFFICULTY_EASY, 1)
+    telemetry = module.SessionTelemetry(db)
+    telemetry.start(sim)
+    telemetry.finish(sim)
+    telemetry.finish(sim)
+    assert db.flush(5)
+    assert db.get_telemetry_rollup() == []
@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+SECONDS = 20
+
+
+def drive(module, render_rate, jitter=0.0, hitch_every=0, seed=1):
+    ticks = SECONDS * module.SIM_TICK_RATE
+    rng = random.Random(seed)
+    sim = module.GameSimulation(module.DIFFICULTY_HARD, seed)
+    module.enable_god_mode(sim)
+    clock = module.FixedTimestep(module.SIM_TICK_RATE)
+    frames = 0
+    while sim.tick < ticks:
+        frame_time = 1 / render_rate * (1 + rng.uniform(-jitter, jitter))
+        if hitch_every and frames % hitch_every == hitch_every - 1:
+            frame_time = 0.25
+        for _ in range(min(clock.advance(frame_time), ticks - sim.tick)):
+            sim.step(clock.step, module.scripted_input(sim.tick))
+        assert 0.0 <= clock.alpha <= 1.0
+        frames += 1
+    return module.pack_snapshot(sim), frames
+
+
+def test_outcome_does_not_depend_on_render_rate(module):
+    reference, frames = drive(module, 60)
+    assert frames == SECONDS * 60
+    for render_rate, jitter, hitch_every in ((30, 0.0, 0), (144, 0.0, 0), (60, 0.5, 0), (60, 0.0, 120)):
+        assert drive(module, render_rate, jitter, hitch_every)[0] == reference
+
+
+def test_advance_accumulates_partial_frames(module):
+    clock = module.FixedTimestep(120)
+    assert [clock.advance(1 / 144) for _ in range(6)] == [0, 1, 1, 1, 1, 1]
+    assert clock.alpha == pytest.approx(0.0, abs=1e-6)
+    assert clock.advance(1 / 240) == 0
+    assert clock.alpha == pytest.approx(0.5)
+
+
+def test_advance_caps_steps_after_a_hitch(module):
+    clock = module.FixedTimestep(120, max_steps=5)
+    assert clock.advance(1.0) == 5
+    assert clock.dropped_time == pytest.approx(1.0 - 5 / 120)
+    assert clock.accumulator == pytest.approx(0.0, abs=1e-9)
+    assert clock.total_steps == 5